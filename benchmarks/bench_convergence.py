@@ -0,0 +1,119 @@
+"""
+End-to-end convergence scenarios on generated topologies, run in the in-process simulator:
+cold start, a link cost change through the update command, a flap storm (a link taken down
+and back up with update every half interval, measured over its fixed window) and the
+recovery from it, and a node crash through crash.
+
+--no-damping turns off flap damping and triggered update pacing on every router, to
+measure what they save.
+
+Usage: python3 benchmarks/bench_convergence.py [--topologies ring grid] [--sizes 25 50] [--no-damping]
+    [-o results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.routing_update import INFINITY
+from dvrp.simulator import Simulation
+from topology_generators import GENERATORS, generate
+
+
+FLAPS = 10
+
+
+def disable_damping(simulation: Simulation):
+    for router in simulation.routers.values():
+        router.neighbor_damping = router.route_damping = None
+        router.triggered_update_gap = 0
+
+
+def run_scenarios(kind: str, size: int, seed: int = 429, interval: float = 1.0, max_time: float = 600.0,
+                  damping: bool = True):
+    rng = random.Random(seed)
+    servers, links = generate(kind, size, seed)
+    simulation = Simulation(servers, dict(links), interval=interval, seed=seed)
+    if not damping:
+        disable_damping(simulation)
+
+    results = []
+
+    def record(scenario, report):
+        report.update(topology=kind, nodes=size, scenario=scenario, mismatches=len(simulation.verify()))
+        results.append(report)
+
+    simulation.start()
+    record("cold_start", simulation.run(max_time))
+
+    # Raise one link's cost tenfold on both ends
+    (id1, id2), cost = rng.choice(sorted(links.items()))
+    simulation.set_link_cost(id1, id2, cost * 10)
+    record("link_cost_change", simulation.run(max_time))
+
+    # Take another link down and back up FLAPS times, every half interval
+    (id1, id2), cost = rng.choice(sorted(links.items()))
+    for flap in range(FLAPS):
+        simulation.schedule(flap * interval, simulation.set_link_cost, id1, id2, INFINITY)
+        simulation.schedule((flap + 0.5) * interval, simulation.set_link_cost, id1, id2, cost)
+    # The storm itself over a fixed window, so both settings send as many periodic updates
+    storm = simulation.run(FLAPS * interval, quiet_intervals=2 * FLAPS)
+    storm["converged"] = None
+    record("flap_storm", storm)
+    # Suppressed neighbors are only reused once their penalty decays, up to 20 intervals
+    # (4 half-lives) after the storm, so no change for a while is not convergence yet
+    record("flap_recovery", simulation.run(max_time, quiet_intervals=25))
+
+    # Crash the busiest router, the worst case for its neighbors
+    degree = {}
+    for pair in links:
+        for server_id in pair:
+            degree[server_id] = degree.get(server_id, 0) + 1
+    simulation.execute(max(degree, key=degree.get), "crash")
+    record("node_crash", simulation.run(max_time))
+    return results
+
+
+def run(topologies=("ring", "grid", "geometric", "scale-free"), sizes=(25,), seed: int = 429,
+        damping: bool = True):
+    results = []
+    for kind in topologies:
+        for size in sizes:
+            results += run_scenarios(kind, size, seed, damping=damping)
+    return results
+
+
+def ok(result: dict):
+    if result["converged"] is None:
+        return "-"
+    return "yes" if result["converged"] and not result["mismatches"] else "no"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convergence scenario benchmarks")
+    parser.add_argument("--topologies", nargs="+", choices=sorted(GENERATORS),
+                        default=["ring", "grid", "geometric", "scale-free"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[25])
+    parser.add_argument("--seed", type=int, default=429)
+    parser.add_argument("--no-damping", action="store_true",
+                        help="Turn off flap damping and triggered update pacing")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.topologies, args.sizes, args.seed, damping=not args.no_damping)
+    print(f"{'topology':>10} {'nodes':>6} {'scenario':>17} {'rounds':>7} {'messages':>9} {'wall s':>7} {'ok':>3}")
+    for r in results:
+        print(
+            f"{r['topology']:>10} {r['nodes']:>6} {r['scenario']:>17} {r['rounds']:>7.2f} "
+            f"{r['messages']:>9} {r['wall_time']:>7.2f} {ok(r):>3}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: pure-Python vs. NumPy distance vector stores. Their parity is checked by
+tests/test_distance_vector.py.
+
+Usage: python3 benchmarks/bench_distance_vector.py [--destinations 1000 5000] [--neighbors 8 32]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.distance_vector import DistanceVectorStore
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, RoutingUpdateEncoder, decode_routing_update
+from dvrp.vectorized_distance_vector import VectorizedDistanceVectorStore
+
+OWN_ID = 1
+
+
+def make_table(num_destinations):
+    table = RoutingTable()
+    for dest_id in range(1, num_destinations + 1):
+        if dest_id == OWN_ID:
+            table.add(dest_id, "127.0.0.1", 1024 + dest_id, 0, OWN_ID)
+        else:
+            table.add(dest_id, "127.0.0.1", 1024 + dest_id)
+    return table
+
+
+def make_updates(rng, num_destinations, neighbor_ids, count):
+    """
+    Random full table updates from random neighbors, encoded on the wire format.
+    """
+    encoder = RoutingUpdateEncoder("127.0.0.1", 9000)
+    table = make_table(num_destinations)
+    updates = []
+    for _ in range(count):
+        for index in range(len(table)):
+            table.costs[index] = rng.choice((rng.randint(1, 200), INFINITY))
+        packet = encoder.encode_table(table, len(table))
+        updates.append((rng.choice(neighbor_ids), packet))
+    return updates
+
+
+def make_store(store_cls, num_destinations, neighbor_ids, link_costs):
+    store = store_cls(OWN_ID, make_table(num_destinations))
+    for neighbor_id in neighbor_ids:
+        store.add_neighbor(neighbor_id, link_costs[neighbor_id])
+    return store
+
+
+def run(store, updates):
+    start = time.perf_counter()
+    for neighbor_id, packet in updates:
+        store.update_vector(neighbor_id, decode_routing_update(packet)[2])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distance vector backend benchmark")
+    parser.add_argument("--destinations", nargs="+", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--neighbors", nargs="+", type=int, default=[4, 32])
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=429)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'dests':>7} {'nbrs':>5} {'python us/upd':>14} {'numpy us/upd':>13} {'speedup':>8}")
+    for num_destinations in args.destinations:
+        for num_neighbors in args.neighbors:
+            neighbor_ids = list(range(2, 2 + num_neighbors))
+            link_costs = {n: rng.randint(1, 20) for n in neighbor_ids}
+            updates = make_updates(rng, num_destinations, neighbor_ids, args.updates)
+
+            timings = [
+                run(make_store(cls, num_destinations, neighbor_ids, link_costs), updates) / len(updates) * 1e6
+                for cls in (DistanceVectorStore, VectorizedDistanceVectorStore)
+            ]
+            print(
+                f"{num_destinations:>7} {num_neighbors:>5} {timings[0]:>14.1f} {timings[1]:>13.1f} "
+                f"{timings[0] / timings[1]:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: cached routing update encoder vs. the original bytes concatenation path.
+
+Usage: python3 benchmarks/bench_encoder.py [--sizes 10 100 1000 5000] [--repeat 5]
+"""
+import argparse
+import os
+import socket
+import struct
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import VERSION_FIELD, VERSION_OFFSET, WIRE_VERSION, RoutingUpdateEncoder
+
+
+def legacy_encode(ip, port, routing_table):
+    # Original TCPServer.send_routing_update packet construction
+    num_update_fields = len(routing_table)
+    packet_format = f"!H H 4s {num_update_fields * 12}s"
+    server_ip = socket.inet_aton(ip)
+
+    routing_data = b""
+    for dest, info in routing_table.items():
+        dest_ip = socket.inet_aton(info['ip'])
+        routing_data += struct.pack("!4s H 2s H H", dest_ip, info['port'], b'\x00\x00', dest, int(info['cost']))
+
+    return struct.pack(packet_format, num_update_fields, port, server_ip, routing_data)
+
+
+def make_table(size):
+    return {
+        dest_id: {
+            "ip": f"10.{dest_id >> 16 & 255}.{dest_id >> 8 & 255}.{dest_id & 255}",
+            "port": 1024 + dest_id % 60000,
+            "cost": dest_id % 50,
+            "next_hop": dest_id,
+        }
+        for dest_id in range(1, size + 1)
+    }
+
+
+def bench(size, repeat):
+    table = make_table(size)
+    routing_table = RoutingTable()
+    for dest_id, info in table.items():
+        routing_table.add(dest_id, **info)
+    number = max(1, 20000 // size)
+    encoder = RoutingUpdateEncoder("127.0.0.1", 9091, size)
+
+    # Same bytes, but for the wire version advertised in the first entry's padding
+    legacy_packet = bytearray(legacy_encode("127.0.0.1", 9091, table))
+    VERSION_FIELD.pack_into(legacy_packet, VERSION_OFFSET, WIRE_VERSION)
+    assert encoder.encode(routing_table) == legacy_packet
+
+    def dirty():
+        encoder.mark_dirty()
+        encoder.encode(routing_table)
+
+    def legacy():
+        legacy_encode("127.0.0.1", 9091, table)
+
+    def idle():
+        encoder.encode(routing_table)
+
+    results = {}
+    for name, fn in (("legacy", legacy), ("encoder", dirty), ("cached", idle)):
+        best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+        results[name] = best * 1e6
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing update encoder micro-benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'routes':>8} {'legacy us':>12} {'encoder us':>12} {'cached us':>12} {'speedup':>8}")
+    for size in args.sizes:
+        r = bench(size, args.repeat)
+        print(
+            f"{size:>8} {r['legacy']:>12.1f} {r['encoder']:>12.1f} {r['cached']:>12.3f} {r['legacy'] / r['encoder']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
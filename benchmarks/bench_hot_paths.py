@@ -0,0 +1,118 @@
+"""
+Hot path benchmarks: encode, decode, update_routing_table and read_topology.
+
+Usage: python3 benchmarks/bench_hot_paths.py [--sizes 100 1000 5000] [-o results.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, RoutingUpdateEncoder, decode_routing_update
+from dvrp.tcp_server import TCPServer
+from dvrp.topology_parser import read_topology
+from topology_generators import BASE_PORT, generate
+
+NEIGHBORS = 8
+
+
+def make_table(size: int):
+    table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        table.add(dest_id, "127.0.0.1", BASE_PORT + dest_id, dest_id % 50, 2 + dest_id % NEIGHBORS)
+    return table
+
+
+def make_router(size: int):
+    """
+    Router 1 with NEIGHBORS neighbors and size destinations, built without sockets.
+    """
+    servers = [{"id": i, "ip": "127.0.0.1", "port": BASE_PORT + i} for i in range(1, size + 1)]
+    neighbors = [{"id1": 1, "id2": i, "cost": i} for i in range(2, 2 + NEIGHBORS)]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        router = TCPServer(1, "127.0.0.1", BASE_PORT + 1, 1, listen=False)
+        router.add_connections(servers[1:], neighbors)
+        router.create_routing_table(servers[1:], neighbors)
+    return router
+
+
+def measure(fn, repeat: int, budget: float = 0.2):
+    number = max(1, int(budget / max(timeit.timeit(fn, number=1), 1e-7)))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_size(size: int, repeat: int):
+    table = make_table(size)
+    encoder = RoutingUpdateEncoder("127.0.0.1", BASE_PORT, size)
+    packet = encoder.encode(table)
+    delta_ids = list(range(1, size + 1, 10))
+
+    def encode_full():
+        encoder.mark_dirty()
+        encoder.encode(table)
+
+    def decode():
+        for _ in decode_routing_update(packet)[2]:
+            pass
+
+    router = make_router(size)
+    neighbor = next(iter(router.neighbors))
+    shifted = make_table(size)
+    for index, cost in enumerate(shifted.costs):
+        shifted.costs[index] = (cost + 7) % 60
+    updates = [RoutingUpdateEncoder("127.0.0.1", neighbor.port, size).encode(t) for t in (table, shifted)]
+    state = [0]
+
+    def update_routing_table():
+        # Alternate between two vectors so every call changes routes
+        state[0] ^= 1
+        view = decode_routing_update(updates[state[0]])[2]
+        router.update_routing_table(neighbor.id, neighbor.cost, view)
+
+    servers, links = generate("scale-free", size)
+    lines = [str(len(servers)), str(len(links))]
+    lines += [f"{s['id']} {s['ip']} {s['port']}" for s in servers.values()]
+    lines += [f"{a} {b} {cost}" for (a, b), cost in links.items()]
+
+    results = []
+    for name, fn in (
+        ("encode_full", encode_full),
+        ("encode_cached", lambda: encoder.encode(table)),
+        ("encode_delta_10pct", lambda: encoder.encode_delta(table, delta_ids)),
+        ("decode", decode),
+        ("update_routing_table", update_routing_table),
+        ("read_topology", lambda: read_topology(lines, network=True)),
+    ):
+        results.append({"name": name, "size": size, "us_per_op": measure(fn, repeat)})
+    return results
+
+
+def run(sizes=(100, 1000, 5000), repeat: int = 3):
+    results = []
+    for size in sizes:
+        results += bench_size(min(size, INFINITY - BASE_PORT), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path benchmarks")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    for result in results:
+        print(f"{result['name']:>22} {result['size']:>7} {result['us_per_op']:>12.2f} us")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Route queries: the cost of publishing a forwarding table snapshot, batched lookup
+throughput of the route query service over a Unix socket, and how much a query load
+slows down the convergence of a simulated network.
+
+Usage: python3 benchmarks/bench_route_query.py [--sizes 1000 10000] [--batches 1 100 1000] [-o results.json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.forwarding_table import ForwardingTable
+from dvrp.route_query import RouteQueryClient, RouteQueryServer
+from dvrp.routing_table import RoutingTable
+from dvrp.simulator import Simulation
+from topology_generators import BASE_PORT, generate
+
+
+class Router:
+    # The only parts of a router the query service reads
+    forwarding_table = None
+    last_route_change = 0.0
+    interval = 1.0
+
+    def publish_routes(self):
+        self.forwarding_table = ForwardingTable.of(self.table, self.forwarding_table)
+
+
+def bench_publish(size: int, repeat: int = 5):
+    table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        table.add(dest_id, "127.0.0.1", BASE_PORT + dest_id, dest_id % 60, 2 + dest_id % 8)
+    snapshot = ForwardingTable.of(table)
+    number = 200
+    shared = min(timeit.repeat(lambda: ForwardingTable.of(table, snapshot), number=number, repeat=repeat))
+    copied = min(timeit.repeat(lambda: ForwardingTable.of(table), number=number, repeat=repeat))
+    return {"size": size, "publish_us": shared / number * 1e6, "publish_new_rows_us": copied / number * 1e6}
+
+
+def _client(path: str, batch: list, stop, count):
+    with RouteQueryClient(path) as connection:
+        while not stop.is_set():
+            connection.lookup(batch)
+            with count.get_lock():
+                count.value += 1
+
+
+def query_load(path: str, clients: int, batch: list):
+    """
+    Queries path from client processes, like tooling outside the router would, until
+    the returned event is set.
+
+    Returns:
+        tuple: (stop event, request counter, processes)
+    """
+    stop, count = multiprocessing.Event(), multiprocessing.Value("q", 0)
+    processes = [multiprocessing.Process(target=_client, args=(path, batch, stop, count)) for _ in range(clients)]
+    for process in processes:
+        process.start()
+    return stop, count, processes
+
+
+def stop_load(stop, processes):
+    stop.set()
+    for process in processes:
+        process.join()
+
+
+def bench_lookups(size: int, batch_size: int, clients: int, duration: float):
+    router = Router()
+    router.table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        router.table.add(dest_id, "127.0.0.1", BASE_PORT + dest_id, dest_id % 60, 2 + dest_id % 8)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "routes.sock")
+        server = RouteQueryServer(router, path, workers=clients)
+        batch = [1 + i * 7919 % size for i in range(batch_size)]
+        stop, count, processes = query_load(path, clients, batch)
+        start = count.value
+        time.sleep(duration)
+        requests = count.value - start
+        stop_load(stop, processes)
+        server.close()
+    return {
+        "size": size,
+        "batch": batch_size,
+        "clients": clients,
+        "requests_per_second": requests / duration,
+        "lookups_per_second": requests * batch_size / duration,
+    }
+
+
+def bench_convergence(nodes: int, clients: int, batch_size: int):
+    servers, links = generate("scale-free", nodes)
+    results = []
+    for load in (False, True):
+        simulation = Simulation(servers, links, seed=1)
+        router = simulation.routers[min(servers)]
+        requests = 0
+        with tempfile.TemporaryDirectory() as directory:
+            if load:
+                path = os.path.join(directory, "routes.sock")
+                server = RouteQueryServer(router, path, workers=clients)
+                batch = [1 + i % nodes for i in range(batch_size)]
+                stop, count, processes = query_load(path, clients, batch)
+                # Running before the simulation starts
+                while count.value == 0:
+                    time.sleep(0.01)
+                requests = count.value
+            simulation.start()
+            report = simulation.run()
+            if load:
+                requests = count.value - requests
+                stop_load(stop, processes)
+                server.close()
+        results.append({
+            "nodes": nodes,
+            "query_load": load,
+            "wall_time": report["wall_time"],
+            "requests_per_second": requests / report["wall_time"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forwarding table snapshots and the route query service")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--batches", nargs="+", type=int, default=[1, 100, 1000])
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=1.0)
+    parser.add_argument("--nodes", type=int, default=300, help="Routers in the convergence run")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    publish = [bench_publish(size) for size in args.sizes]
+    print(f"{'routes':>7} {'publish us':>11} {'new rows us':>12}")
+    for r in publish:
+        print(f"{r['size']:>7} {r['publish_us']:>11.1f} {r['publish_new_rows_us']:>12.1f}")
+
+    lookups = [bench_lookups(size, batch, args.clients, args.duration)
+               for size in args.sizes for batch in args.batches]
+    print(f"\n{'routes':>7} {'batch':>6} {'requests/s':>11} {'lookups/s':>11}")
+    for r in lookups:
+        print(f"{r['size']:>7} {r['batch']:>6} {r['requests_per_second']:>11.0f} {r['lookups_per_second']:>11.0f}")
+
+    convergence = bench_convergence(args.nodes, args.clients, max(args.batches))
+    print(f"\n{'nodes':>6} {'query load':>10} {'wall s':>7} {'requests/s':>11}")
+    for r in convergence:
+        print(f"{r['nodes']:>6} {str(r['query_load']):>10} {r['wall_time']:>7.2f} {r['requests_per_second']:>11.0f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"publish": publish, "lookups": lookups, "convergence": convergence}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
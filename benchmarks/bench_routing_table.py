@@ -0,0 +1,145 @@
+"""
+Memory and speed benchmark: dict of route dicts (the original routing table layout)
+vs. the column-backed RoutingTable.
+
+Usage: python3 benchmarks/bench_routing_table.py [--sizes 1000 10000 50000] [-o results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, RoutingUpdateEncoder
+
+
+def route_info(dest_id: int):
+    return f"10.{dest_id >> 16 & 255}.{dest_id >> 8 & 255}.{dest_id & 255}", 1024 + dest_id % 60000
+
+
+def make_dict_table(size: int):
+    table = {}
+    for dest_id in range(1, size + 1):
+        ip, port = route_info(dest_id)
+        table[dest_id] = {"ip": ip, "port": port, "cost": dest_id % 50, "next_hop": 2 + dest_id % 8}
+    return table
+
+
+def make_routing_table(size: int):
+    table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        ip, port = route_info(dest_id)
+        table.add(dest_id, ip, port, dest_id % 50, 2 + dest_id % 8)
+    return table
+
+
+def allocated(factory, size: int):
+    tracemalloc.start()
+    table = factory(size)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    return current
+
+
+def dict_operations(table: dict, encoder: RoutingUpdateEncoder):
+    dest_ids = list(table)
+
+    def scan():
+        # Read every route the way Bellman-Ford does
+        for info in table.values():
+            if info["cost"] < INFINITY and info["next_hop"] == 3:
+                pass
+
+    def update():
+        # Look up and rewrite routes by destination id, like DistanceVectorStore._refresh
+        for dest_id in dest_ids:
+            route = table.get(dest_id)
+            if route["cost"] < INFINITY:
+                route["cost"] = dest_id & 63
+                route["next_hop"] = 5
+
+    def encode():
+        encoder.encode_entries(table.items(), len(table))
+
+    return scan, update, encode
+
+
+def table_operations(table: RoutingTable, encoder: RoutingUpdateEncoder):
+    dest_ids = list(table)
+    index_of, costs, next_hops = table.index_of, table.costs, table.next_hops
+
+    def scan():
+        for cost, next_hop in zip(costs, next_hops):
+            if cost < INFINITY and next_hop == 3:
+                pass
+
+    def update():
+        for dest_id in dest_ids:
+            index = index_of(dest_id)
+            if costs[index] < INFINITY:
+                costs[index] = dest_id & 63
+                next_hops[index] = 5
+
+    def encode():
+        encoder.encode_table(table, len(table))
+
+    return scan, update, encode
+
+
+def measure(fn, repeat: int, budget: float = 0.2):
+    number = max(1, int(budget / max(timeit.timeit(fn, number=1), 1e-7)))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_size(size: int, repeat: int):
+    dict_table, routing_table = make_dict_table(size), make_routing_table(size)
+    encoder = RoutingUpdateEncoder("127.0.0.1", 9000, size)
+    assert encoder.encode_entries(dict_table.items(), size) == encoder.encode_table(routing_table, size)
+
+    result = {
+        "size": size,
+        "dict_bytes": allocated(make_dict_table, size),
+        "table_bytes": allocated(make_routing_table, size),
+    }
+    for layout, operations in (
+        ("dict", dict_operations(dict_table, encoder)),
+        ("table", table_operations(routing_table, encoder)),
+    ):
+        for name, fn in zip(("scan", "update", "encode"), operations):
+            result[f"{layout}_{name}_us"] = measure(fn, repeat)
+    return result
+
+
+def run(sizes=(1000, 10000, 50000), repeat: int = 3):
+    return [bench_size(size, repeat) for size in sizes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing table layout benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'routes':>7} {'dict KiB':>9} {'table KiB':>10} {'memory':>7}  "
+          f"{'scan':>6} {'update':>7} {'encode':>7}  (speedup)")
+    for r in results:
+        print(
+            f"{r['size']:>7} {r['dict_bytes'] / 1024:>9.0f} {r['table_bytes'] / 1024:>10.0f} "
+            f"{r['dict_bytes'] / r['table_bytes']:>6.1f}x  "
+            f"{r['dict_scan_us'] / r['table_scan_us']:>5.1f}x {r['dict_update_us'] / r['table_update_us']:>6.1f}x "
+            f"{r['dict_encode_us'] / r['table_encode_us']:>6.1f}x"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Liveness tracking cost: a per-tick scan of every neighbor's last heard time (what a
+periodic check does) vs. one TimerWheel timer per neighbor.
+
+Every neighbor is heard from once per interval at a random offset; the clock advances by
+one wheel tick at a time for the given number of intervals.
+
+Usage: python3 benchmarks/bench_timers.py [--neighbors 100 1000 10000] [--intervals 5] [-o results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.timer_wheel import TimerWheel
+
+INTERVAL = 1.0
+DEAD_INTERVAL = 3 * INTERVAL
+TICK = 0.05
+
+
+def heard_schedule(num_neighbors: int, ticks: int, seed: int = 429):
+    # Tick -> neighbors heard from on that tick
+    rng = random.Random(seed)
+    per_interval = int(INTERVAL / TICK)
+    heard = [[] for _ in range(ticks)]
+    for neighbor in range(num_neighbors):
+        offset = rng.randrange(per_interval)
+        for tick in range(offset, ticks, per_interval):
+            heard[tick].append(neighbor)
+    return heard
+
+
+def run_scan(num_neighbors: int, heard):
+    last_heard = [0.0] * num_neighbors
+    expired = 0
+    start = time.perf_counter()
+    for tick, neighbors in enumerate(heard):
+        now = tick * TICK
+        for neighbor in neighbors:
+            last_heard[neighbor] = now
+        for neighbor in range(num_neighbors):
+            if now - last_heard[neighbor] >= DEAD_INTERVAL:
+                expired += 1
+    return time.perf_counter() - start, expired
+
+
+def run_wheel(num_neighbors: int, heard):
+    clock = [0.0]
+    wheel = TimerWheel(tick=TICK, clock=lambda: clock[0])
+    last_heard = [0.0] * num_neighbors
+    expired = [0]
+
+    def check(neighbor):
+        remaining = last_heard[neighbor] + DEAD_INTERVAL - clock[0]
+        if remaining > 0:
+            wheel.schedule(remaining, check, neighbor)
+        else:
+            expired[0] += 1
+
+    for neighbor in range(num_neighbors):
+        wheel.schedule(DEAD_INTERVAL, check, neighbor)
+
+    start = time.perf_counter()
+    for tick, neighbors in enumerate(heard):
+        clock[0] = now = tick * TICK
+        for neighbor in neighbors:
+            last_heard[neighbor] = now
+        wheel.advance()
+    return time.perf_counter() - start, expired[0]
+
+
+def run(neighbor_counts=(100, 1000, 10000), intervals: int = 5):
+    ticks = int(intervals * INTERVAL / TICK)
+    results = []
+    for num_neighbors in neighbor_counts:
+        heard = heard_schedule(num_neighbors, ticks)
+        scan_time, scan_expired = run_scan(num_neighbors, heard)
+        wheel_time, wheel_expired = run_wheel(num_neighbors, heard)
+        # Nobody goes silent, so neither side may expire anyone
+        assert scan_expired == wheel_expired == 0
+        results.append({
+            "neighbors": num_neighbors,
+            "ticks": ticks,
+            "scan_us_per_tick": scan_time / ticks * 1e6,
+            "wheel_us_per_tick": wheel_time / ticks * 1e6,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neighbor liveness: per-tick scan vs. timer wheel")
+    parser.add_argument("--neighbors", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--intervals", type=int, default=5)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.neighbors, args.intervals)
+    print(f"{'neighbors':>9} {'scan us/tick':>13} {'wheel us/tick':>14} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['neighbors']:>9} {r['scan_us_per_tick']:>13.1f} {r['wheel_us_per_tick']:>14.1f} "
+            f"{r['scan_us_per_tick'] / r['wheel_us_per_tick']:>7.1f}x"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Topology loading: parsing a whole network file line by line vs. loading its compiled
+cache, for generated scale-free topologies.
+
+Usage: python3 benchmarks/bench_topology.py [--nodes 1000 10000 50000] [-o results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.topology_parser import CACHE_SUFFIX, load_topology
+from topology_generators import generate, write_network
+
+
+def measure(fn, repeat: int = 3):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1e3
+
+
+def run(node_counts=(1000, 10000, 50000)):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for nodes in node_counts:
+            path = os.path.join(directory, f"scale-free-{nodes}.txt")
+            servers, links = generate("scale-free", nodes)
+            write_network(path, servers, links)
+
+            parse_ms = measure(lambda: load_topology(path, network=True))
+            # The first cached load compiles the cache
+            load_topology(path, network=True, cache=True)
+            cached_ms = measure(lambda: load_topology(path, network=True, cache=True))
+            topology = load_topology(path, network=True, cache=True)
+            to_dicts_ms = measure(lambda: (topology.servers(), topology.links()))
+            results.append({
+                "nodes": nodes,
+                "links": len(links),
+                "file_kb": os.path.getsize(path) / 1024,
+                "cache_kb": os.path.getsize(path + CACHE_SUFFIX) / 1024,
+                "parse_ms": parse_ms,
+                "cached_ms": cached_ms,
+                "to_dicts_ms": to_dicts_ms,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topology parsing vs. compiled cache loading")
+    parser.add_argument("--nodes", nargs="+", type=int, default=[1000, 10000, 50000])
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.nodes)
+    print(f"{'nodes':>6} {'links':>7} {'parse ms':>9} {'cached ms':>10} {'speedup':>8} {'to dicts ms':>12}")
+    for r in results:
+        print(
+            f"{r['nodes']:>6} {r['links']:>7} {r['parse_ms']:>9.2f} {r['cached_ms']:>10.2f} "
+            f"{r['parse_ms'] / r['cached_ms']:>7.1f}x {r['to_dicts_ms']:>12.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Throughput comparison of the TCP and UDP transports over loopback.
+
+Full table updates go through the real send path (Neighbor.send/flush over a TCP
+connection, or a DatagramLink) and are framed and decoded on the receiving socket.
+
+burst: the sender pushes updates as fast as it can while a receiver thread decodes them.
+    UDP drops datagrams once the receiver falls behind, so the delivery ratio is reported.
+lockstep: one update in flight at a time, like routers exchanging periodic updates,
+    measuring the per-update cost of each path.
+
+Usage: python3 benchmarks/bench_transport.py [--sizes 10 100 1000] [--updates 5000] [-o results.json]
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from select import select
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.frame_buffer import FrameBuffer
+from dvrp.neighbor import Neighbor
+from dvrp.routing_update import RoutingUpdateEncoder, decode_routing_update
+from dvrp.udp_engine import DatagramLink
+from bench_hot_paths import make_table
+from topology_generators import BASE_PORT
+
+
+class Receiver(threading.Thread):
+    def __init__(self, sock, expected: int, framed: bool):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.expected = expected
+        self.framed = framed
+        self.received = 0
+        self.finished = None
+
+    def decode(self, packet):
+        for _ in decode_routing_update(packet)[2]:
+            pass
+        self.received += 1
+
+    def run(self):
+        frame_buffer = FrameBuffer()
+        self.sock.settimeout(0.5)
+        while self.received < self.expected:
+            try:
+                data = self.sock.recv(64 * 1024)
+            except socket.timeout:
+                # Nothing more is coming, the rest was dropped
+                break
+            if not data:
+                break
+            if self.framed:
+                frame_buffer.feed(data)
+                for frame in frame_buffer.read_frames():
+                    self.decode(frame)
+            else:
+                self.decode(data)
+            self.finished = time.perf_counter()
+
+
+def tcp_pair(updates: int):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    sender = socket.create_connection(listener.getsockname())
+    sender.setblocking(False)
+    receiver_sock, _ = listener.accept()
+    listener.close()
+
+    neighbor = Neighbor(2, "127.0.0.1", 0, 1, max_queue_depth=updates)
+    neighbor.attach_socket(sender)
+    return neighbor, sender, receiver_sock
+
+
+def udp_pair():
+    receiver_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver_sock.bind(("127.0.0.1", 0))
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.bind(("127.0.0.1", 0))
+    return DatagramLink(sender, receiver_sock.getsockname()), sender, receiver_sock
+
+
+def burst_tcp(packet: bytes, updates: int):
+    neighbor, sender, receiver_sock = tcp_pair(updates)
+    receiver = Receiver(receiver_sock, updates, framed=True)
+    receiver.start()
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        neighbor.send(packet)
+        # Flush like mainloop does whenever select reports the socket writable
+        while neighbor.wants_write and select([], [sender], [], 0)[1]:
+            if not neighbor.flush():
+                break
+    while neighbor.wants_write:
+        select([], [sender], [], 1)
+        neighbor.flush()
+    receiver.join()
+
+    for sock in (sender, receiver_sock):
+        sock.close()
+    return receiver.received, (receiver.finished or start) - start
+
+
+def burst_udp(packet: bytes, updates: int):
+    link, sender, receiver_sock = udp_pair()
+    receiver = Receiver(receiver_sock, updates, framed=False)
+    receiver.start()
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        link.write(packet)
+    receiver.join()
+
+    for sock in (sender, receiver_sock):
+        sock.close()
+    return receiver.received, (receiver.finished or start) - start
+
+
+def lockstep_tcp(packet: bytes, updates: int):
+    neighbor, sender, receiver_sock = tcp_pair(updates)
+    receiver = Receiver(receiver_sock, updates, framed=True)
+    frame_buffer = FrameBuffer()
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        neighbor.send(packet)
+        while not neighbor.flush():
+            select([], [sender], [], 1)
+        frames = []
+        while not frames:
+            frame_buffer.feed(receiver_sock.recv(64 * 1024))
+            frames = frame_buffer.read_frames()
+        for frame in frames:
+            receiver.decode(frame)
+    elapsed = time.perf_counter() - start
+
+    for sock in (sender, receiver_sock):
+        sock.close()
+    return receiver.received, elapsed
+
+
+def lockstep_udp(packet: bytes, updates: int):
+    link, sender, receiver_sock = udp_pair()
+    receiver = Receiver(receiver_sock, updates, framed=False)
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        link.write(packet)
+        receiver.decode(receiver_sock.recv(64 * 1024))
+    elapsed = time.perf_counter() - start
+
+    for sock in (sender, receiver_sock):
+        sock.close()
+    return receiver.received, elapsed
+
+
+BENCHMARKS = {
+    ("burst", "tcp"): burst_tcp,
+    ("burst", "udp"): burst_udp,
+    ("lockstep", "tcp"): lockstep_tcp,
+    ("lockstep", "udp"): lockstep_udp,
+}
+
+
+def run(sizes=(10, 100, 1000), updates: int = 5000):
+    results = []
+    for size in sizes:
+        packet = RoutingUpdateEncoder("127.0.0.1", BASE_PORT + 1, size).encode(make_table(size))
+        for (mode, transport), bench in BENCHMARKS.items():
+            received, elapsed = bench(packet, updates)
+            results.append({
+                "mode": mode,
+                "transport": transport,
+                "size": size,
+                "sent": updates,
+                "received": received,
+                "updates_per_s": received / elapsed if elapsed else 0.0,
+                "mb_per_s": received * len(packet) / elapsed / 1e6 if elapsed else 0.0,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TCP vs. UDP transport throughput")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.updates)
+    print(f"{'mode':>8} {'transport':>9} {'routes':>7} {'delivered':>10} {'updates/s':>11} {'MB/s':>8}")
+    for r in results:
+        print(
+            f"{r['mode']:>8} {r['transport']:>9} {r['size']:>7} {r['received'] / r['sent']:>9.1%} "
+            f"{r['updates_per_s']:>11.0f} {r['mb_per_s']:>8.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
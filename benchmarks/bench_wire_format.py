@@ -0,0 +1,119 @@
+"""
+Wire formats: size, encode and decode throughput of full table updates as version 1
+packets and as compact version 2 packets, raw and zlib compressed.
+
+Encoding covers a changed table sent to every neighbor with its poisoned reverse
+variant; decoding walks every entry, as update_vector does.
+
+Usage: python3 benchmarks/bench_wire_format.py [--sizes 100 1000 10000] [-o results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, RoutingUpdateEncoder, decode_entries
+from topology_generators import BASE_PORT
+
+NEIGHBORS = 8
+
+
+def make_table(size: int):
+    # Costs of a converged router: mostly small, a few destinations unreachable
+    rng = random.Random(size)
+    table = RoutingTable()
+    for dest_id in range(1, size + 1):
+        cost = INFINITY if rng.random() < 0.05 else rng.randrange(1, 60)
+        table.add(dest_id, "127.0.0.1", BASE_PORT + dest_id, cost, 2 + dest_id % NEIGHBORS)
+    return table
+
+
+def measure(fn, repeat: int, budget: float = 0.2):
+    number = max(1, int(budget / max(timeit.timeit(fn, number=1), 1e-7)))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench_size(size: int, repeat: int):
+    table = make_table(size)
+    neighbors = range(2, 2 + NEIGHBORS)
+    encoders = {
+        "compact": RoutingUpdateEncoder("127.0.0.1", BASE_PORT, size, compress_threshold=None),
+        "compressed": RoutingUpdateEncoder("127.0.0.1", BASE_PORT, size, compress_threshold=0),
+    }
+    v1_encoder = RoutingUpdateEncoder("127.0.0.1", BASE_PORT, size)
+
+    def encode_v1():
+        v1_encoder.mark_dirty()
+        for neighbor_id in neighbors:
+            v1_encoder.encode(table, neighbor_id)
+
+    def encode_compact(encoder):
+        def encode():
+            encoder.mark_dirty()
+            update = encoder.encode_compact(table)
+            for neighbor_id in neighbors:
+                update.for_neighbor(neighbor_id, encoder.num_addresses)
+        return encode
+
+    def decode(packet):
+        def walk():
+            for _ in decode_entries(packet, {}):
+                pass
+        return walk
+
+    packets = {"v1": v1_encoder.encode(table, 2)}
+    encode = {"v1": encode_v1}
+    for name, encoder in encoders.items():
+        update = encoder.encode_compact(table)
+        packets[name] = update.for_neighbor(2, encoder.num_addresses)
+        encode[name] = encode_compact(encoder)
+    # The first packet to a neighbor carries every address
+    first_packet = encoders["compressed"].encode_compact(table).for_neighbor(2, 0)
+
+    results = []
+    for name, packet in packets.items():
+        results.append({
+            "format": name,
+            "size": size,
+            "bytes": len(packet),
+            "ratio": len(packets["v1"]) / len(packet),
+            "encode_us": measure(encode[name], repeat),
+            "decode_us": measure(decode(packet), repeat),
+        })
+    results[-1]["first_packet_bytes"] = len(first_packet)
+    return results
+
+
+def run(sizes=(100, 1000, 10000), repeat: int = 3):
+    results = []
+    for size in sizes:
+        results += bench_size(min(size, INFINITY - BASE_PORT), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Version 1 vs. compact version 2 routing updates")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'routes':>7} {'format':>11} {'bytes':>8} {'smaller':>8} {'encode us':>10} {'decode us':>10}")
+    for r in results:
+        print(
+            f"{r['size']:>7} {r['format']:>11} {r['bytes']:>8} {r['ratio']:>7.1f}x "
+            f"{r['encode_us']:>10.1f} {r['decode_us']:>10.1f}"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
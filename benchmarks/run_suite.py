@@ -0,0 +1,87 @@
+"""
+Runs the hot path and convergence benchmarks and writes one machine-readable JSON report.
+
+Usage: python3 benchmarks/run_suite.py -o bench_output.json [--budgets budgets.json]
+
+A budgets file maps result keys to upper bounds, e.g.
+    {"hot_paths.decode.1000.us_per_op": 300, "convergence.ring.25.node_crash.rounds": 5}
+and the run exits with status 1 if any of them is exceeded.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import bench_convergence
+import bench_hot_paths
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def flatten(report: dict):
+    """
+    Flattens results into "section.name.size.metric" style keys for budgets and diffs.
+    """
+    flat = {}
+    for result in report["hot_paths"]:
+        flat[f"hot_paths.{result['name']}.{result['size']}.us_per_op"] = result["us_per_op"]
+    for result in report["convergence"]:
+        prefix = f"convergence.{result['topology']}.{result['nodes']}.{result['scenario']}"
+        for metric in ("rounds", "messages", "bytes", "wall_time"):
+            flat[f"{prefix}.{metric}"] = result[metric]
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DVRP benchmark suite")
+    parser.add_argument("-o", "--output", default="bench_output.json")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 5000],
+                        help="Routing table sizes for the hot path benchmarks")
+    parser.add_argument("--nodes", nargs="+", type=int, default=[25],
+                        help="Topology sizes for the convergence scenarios")
+    parser.add_argument("--topologies", nargs="+", default=["ring", "grid", "geometric", "scale-free"])
+    parser.add_argument("--budgets", help="JSON file of result key -> maximum value")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "hot_paths": bench_hot_paths.run(args.sizes),
+        "convergence": bench_convergence.run(args.topologies, args.nodes),
+    }
+    report["flat"] = flatten(report)
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(report['flat'])} results to {args.output}")
+
+    if args.budgets:
+        with open(args.budgets) as file:
+            budgets = json.load(file)
+        exceeded = [
+            (key, report["flat"].get(key), limit) for key, limit in budgets.items()
+            if report["flat"].get(key) is None or report["flat"][key] > limit
+        ]
+        for key, value, limit in exceeded:
+            print(f"Budget exceeded: {key} = {value} (limit {limit})")
+        if exceeded:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
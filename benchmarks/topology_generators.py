@@ -0,0 +1,159 @@
+"""
+Topology generators writing the topologies/*.txt format.
+
+A whole network file lists every server and every link (read with read_topology(network=True)
+or simulate.py). With --per-router, one file per server is written instead, in the exact
+layout main.py expects: the server itself first and only its own links.
+
+Usage: python3 benchmarks/topology_generators.py ring 1000 -o topologies/ring1000.txt
+"""
+import argparse
+import math
+import os
+import random
+
+BASE_PORT = 10000
+MAX_NODES = 65535 - BASE_PORT
+
+
+def ring(n: int, rng: random.Random, max_cost: int = 10):
+    return {(i, i % n + 1): rng.randint(1, max_cost) for i in range(1, n + 1)}
+
+
+def grid(n: int, rng: random.Random, max_cost: int = 10):
+    # Closest to square grid holding n nodes, the last row may be partial
+    cols = math.ceil(math.sqrt(n))
+    links = {}
+    for i in range(1, n + 1):
+        if i % cols and i + 1 <= n:
+            links[(i, i + 1)] = rng.randint(1, max_cost)
+        if i + cols <= n:
+            links[(i, i + cols)] = rng.randint(1, max_cost)
+    return links
+
+
+def random_geometric(n: int, rng: random.Random, max_cost: int = 10, degree: float = 6.0):
+    """
+    Nodes scattered in the unit square, linked when closer than the radius giving the
+    requested mean degree. Cost grows with distance; a ring through the nodes sorted by x
+    keeps the graph connected.
+    """
+    radius = math.sqrt(degree / (math.pi * n))
+    points = {i: (rng.random(), rng.random()) for i in range(1, n + 1)}
+
+    # Bucket points in radius sized cells so only neighboring cells are compared
+    cells = {}
+    for i, (x, y) in points.items():
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(i)
+
+    links = {}
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    for i in members:
+                        if i < j:
+                            distance = math.dist(points[i], points[j])
+                            if distance <= radius:
+                                links[(i, j)] = 1 + int(distance / radius * (max_cost - 1))
+
+    by_x = sorted(points, key=lambda i: points[i][0])
+    for a, b in zip(by_x, by_x[1:]):
+        links.setdefault((min(a, b), max(a, b)), max_cost)
+    return links
+
+
+def scale_free(n: int, rng: random.Random, max_cost: int = 10, m: int = 2):
+    """
+    Barabasi-Albert preferential attachment: each new node links to m existing nodes
+    chosen proportionally to their degree.
+    """
+    m = min(m, n - 1)
+    links = {}
+    for i in range(1, m + 2):
+        for j in range(i + 1, m + 2):
+            links[(i, j)] = rng.randint(1, max_cost)
+    # Every endpoint appears once per link, so sampling it is degree proportional
+    endpoints = [node for link in links for node in link]
+
+    for i in range(m + 2, n + 1):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(endpoints))
+        for j in chosen:
+            links[(j, i)] = rng.randint(1, max_cost)
+            endpoints += (i, j)
+    return links
+
+
+def full_mesh(n: int, rng: random.Random, max_cost: int = 10):
+    return {(i, j): rng.randint(1, max_cost) for i in range(1, n + 1) for j in range(i + 1, n + 1)}
+
+
+GENERATORS = {
+    "ring": ring,
+    "grid": grid,
+    "geometric": random_geometric,
+    "scale-free": scale_free,
+    "mesh": full_mesh,
+}
+
+
+def generate(kind: str, n: int, seed: int = 429, max_cost: int = 10):
+    """
+    Returns:
+        tuple: (servers, links) in the shapes produced by simulator.load_network.
+    """
+    if not 2 <= n <= MAX_NODES:
+        raise ValueError(f"Number of nodes must be within 2-{MAX_NODES}")
+    rng = random.Random(seed)
+    links = GENERATORS[kind](n, rng, max_cost)
+    servers = {i: {"id": i, "ip": "127.0.0.1", "port": BASE_PORT + i} for i in range(1, n + 1)}
+    return servers, links
+
+
+def write_network(path: str, servers: dict, links: dict):
+    with open(path, "w") as file:
+        file.write(f"{len(servers)}\n{len(links)}\n")
+        file.writelines(f"{s['id']} {s['ip']} {s['port']}\n" for s in servers.values())
+        file.writelines(f"{id1} {id2} {cost}\n" for (id1, id2), cost in links.items())
+
+
+def write_per_router(directory: str, prefix: str, servers: dict, links: dict):
+    adjacency = {server_id: [] for server_id in servers}
+    for (id1, id2), cost in links.items():
+        adjacency[id1].append((id2, cost))
+        adjacency[id2].append((id1, cost))
+
+    os.makedirs(directory, exist_ok=True)
+    server_lines = {s["id"]: f"{s['id']} {s['ip']} {s['port']}\n" for s in servers.values()}
+    for server_id, neighbors in adjacency.items():
+        with open(os.path.join(directory, f"{prefix}{server_id}.txt"), "w") as file:
+            file.write(f"{len(servers)}\n{len(neighbors)}\n")
+            file.write(server_lines[server_id])
+            file.writelines(line for other, line in server_lines.items() if other != server_id)
+            file.writelines(f"{server_id} {other} {cost}\n" for other, cost in neighbors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates topology files")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("nodes", type=int)
+    parser.add_argument("-o", "--output", required=True,
+                        help="Network file path, or a directory with --per-router")
+    parser.add_argument("--per-router", action="store_true",
+                        help="Write one main.py topology file per server into the output directory")
+    parser.add_argument("--seed", type=int, default=429)
+    parser.add_argument("--max-cost", type=int, default=10)
+    args = parser.parse_args()
+
+    servers, links = generate(args.kind, args.nodes, args.seed, args.max_cost)
+    if args.per_router:
+        write_per_router(args.output, f"{args.kind}{args.nodes}_", servers, links)
+    else:
+        write_network(args.output, servers, links)
+    print(f"Generated {args.kind} topology with {len(servers)} servers and {len(links)} links")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,19 @@ from commands.base_command import Command
 
 
 class DisableCommand(Command):
-    def __init__(self, server_id=None, *args):
-        super().__init__(*args)
+    def __init__(self, server, server_id=None, *args):
+        super().__init__(server, *args)
         self.server_id = server_id
 
     def execute(self):
-        if self.server_id:
-            print(f"Disabling link to {self.server_id}")
-        else:
+        try:
+            server_id = int(self.server_id)
+        except (TypeError, ValueError):
             print("Please provide valid server-ID")
+            return
+
+        if server_id not in self.server.neighbors:
+            print(f"Server {server_id} is not a neighbor")
+            return
+        print(f"Disabling link to {server_id}")
+        self.server.disable_link(server_id)
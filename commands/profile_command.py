@@ -0,0 +1,22 @@
+from commands.base_command import Command
+
+
+class ProfileCommand(Command):
+    def __init__(self, server, action=None, argument=None, *args):
+        super().__init__(server, *args)
+        self.action = action
+        self.argument = argument
+
+    def execute(self):
+        # Profiler errors are ValueErrors, printed by TCPServer.execute_command
+        profiler = self.server.profiler
+        if self.action == "start":
+            profiler.start(self.argument or "cprofile")
+            print(f"Profiling ({profiler.mode})")
+        elif self.action == "stop":
+            profiler.stop()
+            print("Profiling stopped")
+        elif self.action == "dump":
+            print(profiler.dump(self.argument))
+        else:
+            print("Usage: profile start [cprofile|sample] | profile stop | profile dump [path]")
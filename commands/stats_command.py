@@ -0,0 +1,40 @@
+import time
+
+from commands.base_command import Command
+from dvrp.metrics import NEIGHBOR_COUNTERS
+
+
+class StatsCommand(Command):
+    def __init__(self, *args):
+        super().__init__(*args)
+
+    def execute(self):
+        metrics = self.server.metrics
+        print(f"Stats for router {self.server.id}, up {time.time() - metrics.started:.0f}s")
+        for name, value in metrics.counters.items():
+            print(f"{name.replace('_', ' ')}: {value}")
+        for name, (_, value) in metrics.gauges.items():
+            value = value()
+            if name.endswith("_timestamp_seconds"):
+                # Unix times read better as an age
+                name = name[:-len("_timestamp_seconds")]
+                value = f"{time.time() - value:.1f}s ago" if value else "never"
+            print(f"{name.replace('_', ' ')}: {value}")
+
+        # Per-neighbor traffic, one column per counter
+        print("Neighbor\t" + "\t".join(name.replace("_", " ") for name in NEIGHBOR_COUNTERS))
+        for neighbor in self.server.neighbors:
+            values = (metrics.neighbor_counters[name].get(neighbor.id, 0) for name in NEIGHBOR_COUNTERS)
+            print(f"{neighbor.id}\t\t" + "\t\t".join(str(value) for value in values))
+
+        # Latencies in microseconds, quantiles rounded up to their histogram bucket
+        print("Latency (us)\t\tcount\tmean\tp50\tp99")
+        for name, histogram in metrics.histograms.items():
+            if not histogram.count:
+                print(f"{name:<24}0\t-\t-\t-")
+                continue
+            p50, p99 = (histogram.quantile(q) for q in (0.5, 0.99))
+            print(
+                f"{name:<24}{histogram.count}\t{histogram.total / histogram.count / 1000:.1f}\t"
+                f"{'-' if p50 is None else p50 // 1000}\t{'-' if p99 is None else p99 // 1000}"
+            )
@@ -1,4 +1,5 @@
 from commands.base_command import Command
+from dvrp.routing_update import INFINITY
 
 
 class UpdateCommand(Command):
@@ -9,8 +10,21 @@ class UpdateCommand(Command):
         self.link_cost = link_cost
 
     def execute(self):
-        if self.server_id1 and self.server_id2 and self.link_cost:
-            neighbor_id = self.server_id2 if self.server_id1 == self.server.id else self.server_id1
-            self.server.update_link_cost(neighbor_id, self.link_cost)
-        else:
+        try:
+            server_id1 = int(self.server_id1)
+            server_id2 = int(self.server_id2)
+            link_cost = INFINITY if self.link_cost.lower() == "inf" else int(self.link_cost)
+        except (TypeError, ValueError, AttributeError):
             print("Please provide valid server-ID1, server-ID2, and Link Cost")
+            return
+        # The cost columns are unsigned and a zero cost link would loop
+        if link_cost < 1:
+            print("Please provide valid server-ID1, server-ID2, and Link Cost")
+            return
+
+        if self.server.id not in (server_id1, server_id2):
+            print(f"Link {server_id1}-{server_id2} does not belong to server {self.server.id}")
+            return
+
+        neighbor_id = server_id2 if server_id1 == self.server.id else server_id1
+        self.server.update_link_cost(neighbor_id, min(link_cost, INFINITY))
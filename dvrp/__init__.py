@@ -6,10 +6,19 @@ from .dvrp_error import (
     InvalidNumNeighborsError,
     InvalidServerInfoError,
     InvalidNumServersError,
+    MalformedPacketError,
 )
 
-from .topology_parser import read_topology
+from .topology_parser import Topology, load_topology, parse_topology, read_topology, topology_path
+from .log import LEVELS as LOG_LEVELS, configure_logging
+from .metrics import Metrics, serve_metrics
+from .routing_table import RoutingTable
+from .forwarding_table import ForwardingTable
+from .route_query import RouteQueryClient, RouteQueryServer
 from .tcp_server import TCPServer
+from .async_engine import AsyncEngine
+from .capture import CaptureWriter, read_capture, replay
+from .udp_engine import UDPEngine
 
 __all__ = [
     "DVRPError",
@@ -19,6 +28,24 @@ __all__ = [
     "InvalidNumNeighborsError",
     "InvalidServerInfoError",
     "InvalidNumServersError",
+    "MalformedPacketError",
+    "Topology",
+    "load_topology",
+    "parse_topology",
     "read_topology",
+    "topology_path",
+    "LOG_LEVELS",
+    "configure_logging",
+    "Metrics",
+    "serve_metrics",
+    "RoutingTable",
+    "ForwardingTable",
+    "RouteQueryClient",
+    "RouteQueryServer",
     "TCPServer",
+    "AsyncEngine",
+    "CaptureWriter",
+    "read_capture",
+    "replay",
+    "UDPEngine",
 ]
@@ -0,0 +1,158 @@
+import asyncio
+import sys
+from dvrp.connection_manager import Backoff
+from dvrp.dvrp_error import MalformedPacketError
+from dvrp.frame_buffer import FrameBuffer
+from dvrp.log import get_logger
+
+log = get_logger("connections")
+
+
+class AsyncEngine:
+    """
+    Drives a TCPServer from an asyncio event loop instead of TCPServer.mainloop.
+
+    Inbound peers are served by asyncio.start_server, outbound neighbor connections are
+    opened in background tasks so an unreachable neighbor never stalls the loop, and the
+    server's timers (periodic updates, liveness, hold-downs) run from a loop callback armed
+    for the earliest one. Several engines can share one event loop.
+
+    Like the ConnectionManager used by mainloop, at most max_concurrent connects are in
+    flight and failed ones are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, server, read_stdin: bool = True, connect_timeout: float = 5.0,
+                 max_concurrent: int = 64, backoff: Backoff = None):
+        self.server = server
+        self.read_stdin = read_stdin
+        self.connect_timeout = connect_timeout
+        self.backoff = backoff or Backoff()
+        self.max_concurrent = max_concurrent
+        # Created in run(), asyncio primitives bind to the running loop on Python < 3.10
+        self._connect_slots = None
+        # Neighbor id -> task opening (and then watching) the outbound connection
+        self._connecting = {}
+        # Set once run() exits, so lost connections are no longer redialed
+        self._closed = False
+        # Loop callback that advances the server's timers
+        self._timer_handle = None
+        server.engine = self
+
+    async def run(self):
+        server = self.server
+        self._connect_slots = asyncio.Semaphore(self.max_concurrent)
+        listener = await asyncio.start_server(self._serve_peer, sock=server.socket)
+        server.connect_neighbors()
+        server.start_timers()
+        self._arm_timers()
+
+        tasks = []
+        if self.read_stdin:
+            tasks.append(asyncio.create_task(self._read_commands()))
+
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            self._closed = True
+            if self._timer_handle is not None:
+                self._timer_handle.cancel()
+            for task in tasks + list(self._connecting.values()):
+                task.cancel()
+
+    def connect(self, neighbor):
+        if self._closed or neighbor.id in self._connecting:
+            return
+        task = asyncio.get_running_loop().create_task(self._maintain_connection(neighbor))
+        self._connecting[neighbor.id] = task
+        task.add_done_callback(lambda _: self._connecting.pop(neighbor.id, None))
+
+    async def _open_connection(self, neighbor):
+        while not neighbor.disabled:
+            async with self._connect_slots:
+                try:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_connection(neighbor.ip, neighbor.port), self.connect_timeout
+                    )
+                    self.backoff.succeeded(neighbor.id)
+                    return connection
+                except (OSError, asyncio.TimeoutError):
+                    pass
+            if self.backoff.failures(neighbor.id) == 0:
+                log.warning("Failed to connect to neighbor %d, retrying in the background", neighbor.id)
+            await asyncio.sleep(self.backoff.failed(neighbor.id))
+        return None, None
+
+    async def _maintain_connection(self, neighbor):
+        # Redial for as long as the neighbor has no connection, e.g. after losing this one
+        while neighbor.is_down and not neighbor.disabled:
+            reader, writer = await self._open_connection(neighbor)
+            if writer is None:
+                return
+            if not self.server.adopt_connection(neighbor, writer, dialed=True):
+                writer.close()
+                return
+            # The dialed connection carries updates in both directions
+            await self._read_frames(reader, writer)
+
+    async def _serve_peer(self, reader, writer):
+        address = writer.get_extra_info("peername")
+        log.info("The connection to peer %s is successfully established;", address)
+        try:
+            await self._read_frames(reader, writer)
+        except asyncio.CancelledError:
+            pass
+        log.info("Peer %s terminates the connection", address[0] if address else None)
+
+    async def _read_frames(self, reader, writer):
+        server = self.server
+        frame_buffer = FrameBuffer()
+        try:
+            while True:
+                data = await reader.read(server.RECV_SIZE)
+                if not data:
+                    break
+                frame_buffer.feed(data)
+                try:
+                    frames = frame_buffer.read_frames()
+                except MalformedPacketError as e:
+                    server.stream_error(e)
+                    break
+                for frame in frames:
+                    server.handle_frame(frame, writer)
+                server.send_triggered_update()
+                self._arm_timers()
+        except ConnectionError:
+            pass
+        finally:
+            server.connection_lost(writer)
+
+    def _arm_timers(self):
+        # Called whenever handling an event may have scheduled a timer earlier than the armed one
+        timeout = self.server.timers.timeout()
+        if self._timer_handle is not None:
+            self._timer_handle.cancel()
+            self._timer_handle = None
+        if timeout is not None and not self._closed:
+            self._timer_handle = asyncio.get_running_loop().call_later(timeout, self._run_timers)
+
+    def _run_timers(self):
+        self._timer_handle = None
+        self.server.timers.advance()
+        self.server.send_triggered_update()
+        self._arm_timers()
+
+    async def _read_commands(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        print(">> ", end="", flush=True)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.server.execute_command(line.decode().strip())
+            self.server.send_triggered_update()
+            self._arm_timers()
+            print(">> ", end="", flush=True)
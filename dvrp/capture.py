@@ -0,0 +1,222 @@
+import contextlib
+import mmap
+import os
+import random
+import struct
+import time
+from dvrp.dvrp_error import DVRPError
+from dvrp.tcp_server import TCPServer
+from dvrp.timer_wheel import TimerWheel
+from dvrp.topology_parser import load_topology
+
+# magic, version, id of the capturing router, its update interval
+HEADER = struct.Struct("<4s H I d")
+# receive time (the router's timer clock), sender id (0 if not yet known), frame length
+RECORD = struct.Struct("<d I I")
+MAGIC = b"DVCP"
+VERSION = 1
+# Sender id of records holding a command typed at the router instead of a frame
+COMMAND = 0xFFFFFFFF
+# Commands that change routes, run again on replay; the others (display, profile ...) are skipped
+REPLAYED_COMMANDS = {"update", "disable", "crash"}
+
+
+class CaptureWriter:
+    """
+    Appends every frame a router receives to a capture log: a header naming the router,
+    then one RECORD and the raw frame per frame, in arrival order. Commands typed at the
+    router are logged in between, so link cost changes are replayed too.
+
+    Records are written in large blocks. The router also calls flush from its timer wheel
+    every flush_interval seconds, so a killed router loses at most that much of its log,
+    however quiet its links are.
+    """
+
+    def __init__(self, path: str, router_id: int, interval: float, flush_interval: float = 1.0):
+        self.path = path
+        self.frames = 0
+        self.flush_interval = flush_interval
+        self._flushed = float("-inf")
+        self._file = open(path, "wb", buffering=1 << 20)
+        self._file.write(HEADER.pack(MAGIC, VERSION, router_id, interval))
+
+    def record(self, at: float, sender_id: int, frame):
+        self._file.write(RECORD.pack(at, sender_id, len(frame)))
+        self._file.write(frame)
+        self.frames += 1
+        if at - self._flushed >= self.flush_interval:
+            self.flush(at)
+
+    def record_command(self, at: float, command_string: str):
+        self.record(at, COMMAND, command_string.encode())
+
+    def flush(self, at: float):
+        if not self._file.closed:
+            self._file.flush()
+            self._flushed = at
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_capture(path: str):
+    """
+    Memory-maps a capture log.
+
+    Returns:
+        tuple: (router_id, interval, records), where records yields (time, sender_id, frame)
+            with each frame sliced out of the map as bytes, like a recv would return it.
+            Command records have the sender id COMMAND.
+
+    Raises:
+        DVRPError: If the file is not a capture log or is truncated.
+    """
+    with open(path, "rb") as file:
+        try:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            raise DVRPError(f"{path} is not a capture log.") from None
+    if len(view) < HEADER.size:
+        raise DVRPError(f"{path} is not a capture log.")
+    magic, version, router_id, interval = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise DVRPError(f"{path} is not a capture log (version {VERSION}).")
+
+    def records():
+        offset, end = HEADER.size, len(view)
+        unpack_from, record_size = RECORD.unpack_from, RECORD.size
+        try:
+            while offset < end:
+                if offset + record_size > end:
+                    raise DVRPError(f"{path} is truncated at byte {offset}.")
+                at, sender_id, length = unpack_from(view, offset)
+                offset += record_size
+                if offset + length > end:
+                    raise DVRPError(f"{path} is truncated at byte {offset}.")
+                yield at, sender_id, view[offset:offset + length]
+                offset += length
+        finally:
+            view.close()
+
+    return router_id, interval, records()
+
+
+class _DiscardWriter:
+    # Connection of a replayed neighbor: counts what the router sends and drops it
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, message):
+        self.bytes += len(message)
+
+    def close(self):
+        pass
+
+
+class ReplayEngine:
+    """
+    Engine hook for a replayed router: every neighbor is connected to a _DiscardWriter,
+    so the router runs its usual send paths without sockets.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        server.engine = self
+
+    def connect(self, neighbor):
+        if neighbor.is_down and not neighbor.disabled:
+            neighbor.attach_writer(_DiscardWriter())
+
+
+def replay(capture_path: str, topology_path: str, speed: float = None, vectorized: bool = False, seed: int = 0):
+    """
+    Feeds a capture log into a fresh router built from the same topology file.
+
+    The router's timers run on the recorded receive times, and its update jitter is
+    seeded, so every replay of a log ends with the same routing table. Frames from
+    neighbors known at capture time take the same path as on a connection bound to
+    the neighbor, the others are matched by their header address. Logged commands in
+    REPLAYED_COMMANDS run at their recorded time.
+
+    Args:
+        capture_path (str): The capture log.
+        topology_path (str): The topology file the captured router was started with.
+        speed (float): None to replay as fast as possible, else the recorded pacing
+            sped up by this factor (1 for real time).
+
+    Returns:
+        tuple: (router, report) with the replayed TCPServer and the replay statistics.
+
+    Raises:
+        DVRPError: If the log does not belong to the first server of the topology.
+    """
+    router_id, interval, records = read_capture(capture_path)
+    topology = load_topology(topology_path)
+    servers, neighbors = topology.servers(), topology.links()
+    server_info = servers.pop(0)
+    if server_info["id"] != router_id:
+        raise DVRPError(f"The capture is of router {router_id}, the topology is of router {server_info['id']}.")
+
+    clock = [0.0]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        router = TCPServer(router_id, server_info["ip"], server_info["port"], interval, vectorized, listen=False)
+        router.add_connections(servers, neighbors)
+        router.create_routing_table(servers, neighbors)
+    router.random = random.Random(seed)
+
+    # A bound connection per neighbor, so their frames skip the sender lookup as they did live
+    connections = {}
+    for neighbor in router.neighbors:
+        connections[neighbor.id] = connection = object()
+        router.neighbors.bind_connection(connection, neighbor)
+
+    frames = commands = 0
+    started = None
+    wall_start = time.perf_counter()
+    handle_frame = router.handle_frame
+    for at, sender_id, frame in records:
+        if started is None:
+            # The wheel starts at the first receive time, not at 0 on the recorded clock
+            started = clock[0] = at
+            router.timers = TimerWheel(clock=lambda: clock[0])
+            ReplayEngine(router)
+            router.connect_neighbors()
+            router.start_timers()
+            wall_start = time.perf_counter()
+        if speed is not None:
+            delay = wall_start + (at - started) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        clock[0] = at
+        router.timers.advance()
+        if sender_id == COMMAND:
+            command_string = frame.decode()
+            if command_string.split()[0].lower() in REPLAYED_COMMANDS:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    router.execute_command(command_string)
+                commands += 1
+        else:
+            handle_frame(frame, connections.get(sender_id))
+            frames += 1
+        router.send_triggered_update()
+    wall_time = time.perf_counter() - wall_start
+
+    histograms = router.metrics.histograms
+    report = {
+        "router": router_id,
+        "frames": frames,
+        "commands": commands,
+        "decode_errors": router.metrics.counters["decode_errors"],
+        "route_changes": router.metrics.counters["route_changes"],
+        "recorded_time": 0.0 if started is None else clock[0] - started,
+        "wall_time": wall_time,
+        "updates_per_second": frames / wall_time if wall_time else 0.0,
+    }
+    for name in ("decode", "update_routing_table"):
+        histogram = histograms[name]
+        report[f"{name}_mean_us"] = histogram.total / histogram.count / 1000 if histogram.count else 0.0
+    return router, report
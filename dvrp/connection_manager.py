@@ -0,0 +1,165 @@
+import errno
+import heapq
+import itertools
+import random
+import socket
+import time
+from dvrp.log import get_logger
+
+log = get_logger("connections")
+
+# connect_ex results meaning the connection is still being established
+IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY}
+
+
+class Backoff:
+    """
+    Jittered exponential backoff per key: the n-th consecutive failure waits
+    base * 2 ** (n - 1) seconds, capped at maximum, scaled down by up to jitter so that
+    neighbors that failed together do not retry in lockstep.
+    """
+
+    def __init__(self, base: float = 0.5, maximum: float = 30.0, jitter: float = 0.5, rng=None):
+        self.base = base
+        self.maximum = maximum
+        self.jitter = jitter
+        self.random = rng or random.Random()
+        self._failures = {}
+
+    def failures(self, key):
+        return self._failures.get(key, 0)
+
+    def failed(self, key):
+        """
+        Records a failure.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        failures = self._failures[key] = self._failures.get(key, 0) + 1
+        delay = min(self.base * 2 ** (failures - 1), self.maximum)
+        return delay * (1 - self.jitter * self.random.random())
+
+    def succeeded(self, key):
+        self._failures.pop(key, None)
+
+
+class ConnectionManager:
+    """
+    Opens outbound neighbor connections for the select mainloop without ever blocking it.
+
+    Connects are started with connect_ex on non-blocking sockets and completed once select
+    reports the socket writable. At most max_concurrent attempts are in flight, failed or
+    timed out attempts are retried with jittered exponential backoff, and only the first
+    failure of a streak is printed.
+
+    Connected sockets are handed to on_connected(neighbor, sock), which attaches them to
+    the neighbor by default.
+    """
+
+    def __init__(self, max_concurrent: int = 64, connect_timeout: float = 5.0, backoff: Backoff = None,
+                 clock=time.monotonic, on_connected=None):
+        self.on_connected = on_connected or self._attach
+        self.max_concurrent = max_concurrent
+        self.connect_timeout = connect_timeout
+        self.backoff = backoff or Backoff()
+        self.clock = clock
+        # (due time, sequence, neighbor) of scheduled attempts
+        self._due = []
+        self._sequence = itertools.count()
+        # Neighbor ids scheduled or in flight, so requests are idempotent
+        self._pending = set()
+        # Socket -> (neighbor, deadline) of connects in flight
+        self._in_flight = {}
+
+    @property
+    def sockets(self):
+        # Connecting sockets, to be watched for writability
+        return list(self._in_flight)
+
+    def request(self, neighbor):
+        """
+        Schedules a connection attempt to a neighbor that is down, right away unless an
+        attempt is already scheduled or in flight.
+        """
+        if neighbor.is_down and not neighbor.disabled and neighbor.id not in self._pending:
+            self._schedule(neighbor, 0.0)
+
+    def timeout(self):
+        """
+        Returns:
+            float: Seconds until the manager next needs poll, None if it is idle.
+        """
+        deadlines = [deadline for _, deadline in self._in_flight.values()]
+        if self._due and len(self._in_flight) < self.max_concurrent:
+            deadlines.append(self._due[0][0])
+        if not deadlines:
+            return None
+        return max(min(deadlines) - self.clock(), 0)
+
+    def on_writable(self, sock):
+        """
+        Completes a connect that select reported writable.
+        """
+        neighbor, _ = self._in_flight.pop(sock)
+        error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            sock.close()
+            self._failed(neighbor)
+            return
+        self._pending.discard(neighbor.id)
+        self.backoff.succeeded(neighbor.id)
+        self.on_connected(neighbor, sock)
+
+    @staticmethod
+    def _attach(neighbor, sock):
+        try:
+            neighbor.attach_socket(sock)
+        except RuntimeError:
+            # Connected another way in the meantime
+            sock.close()
+
+    def poll(self):
+        """
+        Expires timed out connects and starts due attempts, up to max_concurrent.
+        """
+        now = self.clock()
+        for sock, (neighbor, deadline) in list(self._in_flight.items()):
+            if deadline <= now:
+                del self._in_flight[sock]
+                sock.close()
+                self._failed(neighbor)
+
+        while self._due and self._due[0][0] <= now and len(self._in_flight) < self.max_concurrent:
+            _, _, neighbor = heapq.heappop(self._due)
+            self._start(neighbor, now)
+
+    def _schedule(self, neighbor, delay: float):
+        self._pending.add(neighbor.id)
+        heapq.heappush(self._due, (self.clock() + delay, next(self._sequence), neighbor))
+
+    def _start(self, neighbor, now: float):
+        if not neighbor.is_down or neighbor.disabled:
+            self._pending.discard(neighbor.id)
+            return
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        error = sock.connect_ex((neighbor.ip, neighbor.port))
+        if error in IN_PROGRESS:
+            self._in_flight[sock] = (neighbor, now + self.connect_timeout)
+        elif error == 0:
+            self._in_flight[sock] = (neighbor, now + self.connect_timeout)
+            self.on_writable(sock)
+        else:
+            sock.close()
+            self._failed(neighbor)
+
+    def _failed(self, neighbor):
+        if self.backoff.failures(neighbor.id) == 0:
+            log.warning("Failed to connect to neighbor %d, retrying in the background", neighbor.id)
+        delay = self.backoff.failed(neighbor.id)
+        if neighbor.disabled:
+            self._pending.discard(neighbor.id)
+            return
+        heapq.heappush(self._due, (self.clock() + delay, next(self._sequence), neighbor))
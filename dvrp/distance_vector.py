@@ -0,0 +1,159 @@
+from dvrp.routing_table import NO_HOP
+from dvrp.routing_update import INFINITY
+
+
+class DistanceVectorStore:
+    """
+    Keeps the latest distance vector advertised by every neighbor and derives the best
+    route per destination from them.
+
+    Routes are written into the cost and next hop columns of the server's RoutingTable.
+    Every update only touches the destinations it affects: a better candidate is taken
+    directly, while a route that got worse through its current next hop is recomputed
+    over all neighbors (full Bellman-Ford for that destination).
+
+    When a route is lost through its next hop and only worse alternatives remain, those
+    may be stale routes looping back through this router. If on_hold_down(dest_id) agrees,
+    the destination is held down instead: it stays unreachable, and only a route at most
+    as costly as the lost one is taken, until release(dest_id) ends the hold-down.
+    """
+
+    def __init__(self, own_id: int, routing_table, on_hold_down=None):
+        self.own_id = own_id
+        self.routing_table = routing_table
+        self.on_hold_down = on_hold_down
+        # Held down destination id -> cost of the lost route
+        self.held = {}
+        # Neighbor id -> link cost, INFINITY while the neighbor is down
+        self.link_costs = {}
+        # Neighbor id -> {dest_id: advertised cost}
+        self.vectors = {}
+
+    def __contains__(self, neighbor_id):
+        return neighbor_id in self.vectors
+
+    def add_neighbor(self, neighbor_id: int, cost: int):
+        self.link_costs[neighbor_id] = cost
+        # A neighbor is always reachable at its link cost, even before it advertises anything
+        self.vectors[neighbor_id] = {neighbor_id: 0}
+        return self._refresh(neighbor_id, (neighbor_id,))
+
+    def set_link_cost(self, neighbor_id: int, cost: int):
+        """
+        Changes the cost of the link to a neighbor.
+
+        Returns:
+            set: Destination ids whose route changed.
+        """
+        if self.link_costs.get(neighbor_id) == cost:
+            return set()
+        self.link_costs[neighbor_id] = cost
+        return self._refresh(neighbor_id, list(self.vectors[neighbor_id]))
+
+    def update_vector(self, neighbor_id: int, routing_update, learn=None):
+        """
+        Merges the entries of a routing update into a neighbor's vector.
+
+        Args:
+            neighbor_id (int): The neighbor that sent the update.
+            routing_update (RoutingUpdateView): The decoded (dest_id, cost, ip, port) entries.
+            learn (callable): Called as learn(dest_id, ip, port) for destinations missing
+                from the routing table, returning whether it added them. Unknown
+                destinations are ignored if not given.
+
+        Returns:
+            set: Destination ids whose route changed.
+        """
+        vector = self.vectors[neighbor_id]
+        index_of = self.routing_table.index_of
+        own_id = self.own_id
+        changed = []
+        for dest_id, cost, ip, port in routing_update:
+            if dest_id == own_id or vector.get(dest_id) == cost:
+                continue
+            if index_of(dest_id) is None:
+                # Unreachable destinations are not worth learning
+                if learn is None or cost >= INFINITY or not learn(dest_id, ip, port):
+                    continue
+            vector[dest_id] = cost
+            changed.append(dest_id)
+        return self._refresh(neighbor_id, changed)
+
+    def remove_neighbor(self, neighbor_id: int):
+        """
+        Forgets a neighbor's vector and treats its link as down until it is heard from again.
+
+        Returns:
+            set: Destination ids whose route changed.
+        """
+        affected = list(self.vectors[neighbor_id])
+        self.link_costs[neighbor_id] = INFINITY
+        self.vectors[neighbor_id] = {neighbor_id: 0}
+        return self._refresh(neighbor_id, affected)
+
+    def release(self, dest_id: int):
+        """
+        Ends the hold-down of a destination and takes the best route now on offer.
+
+        Returns:
+            set: {dest_id} if its route changed.
+        """
+        if self.held.pop(dest_id, None) is None:
+            return set()
+        return {dest_id} if self._recompute(dest_id, self.routing_table.index_of(dest_id)) else set()
+
+    def forget(self, dest_id: int):
+        """
+        Drops a destination, e.g. one garbage collected from the routing table, from every vector.
+        """
+        self.held.pop(dest_id, None)
+        for vector in self.vectors.values():
+            vector.pop(dest_id, None)
+
+    def _refresh(self, neighbor_id: int, dest_ids):
+        changed = set()
+        routing_table = self.routing_table
+        index_of = routing_table.index_of
+        costs, next_hops = routing_table.costs, routing_table.next_hops
+        link_cost = self.link_costs[neighbor_id]
+        vector = self.vectors[neighbor_id]
+        held = self.held
+
+        for dest_id in dest_ids:
+            index = index_of(dest_id)
+            if index is None or dest_id == self.own_id:
+                continue
+            candidate = min(link_cost + vector.get(dest_id, INFINITY), INFINITY)
+            if held and dest_id in held:
+                # A route as good as the lost one ends the hold-down early
+                if candidate <= held[dest_id]:
+                    del held[dest_id]
+                    if self._recompute(dest_id, index):
+                        changed.add(dest_id)
+            elif candidate < costs[index]:
+                costs[index] = candidate
+                next_hops[index] = neighbor_id
+                changed.add(dest_id)
+            elif next_hops[index] == neighbor_id and candidate != costs[index]:
+                # The current route got worse, another neighbor may now be better
+                if self._recompute(dest_id, index, lost=candidate == INFINITY):
+                    changed.add(dest_id)
+        return changed
+
+    def _recompute(self, dest_id: int, index: int, lost: bool = False):
+        best_cost, best_hop = INFINITY, NO_HOP
+        link_costs = self.link_costs
+        for neighbor_id, vector in self.vectors.items():
+            cost = link_costs[neighbor_id] + vector.get(dest_id, INFINITY)
+            if cost < best_cost:
+                best_cost, best_hop = cost, neighbor_id
+
+        costs, next_hops = self.routing_table.costs, self.routing_table.next_hops
+        if lost and best_cost > costs[index] and self.on_hold_down is not None and self.on_hold_down(dest_id):
+            self.held[dest_id] = costs[index]
+            best_cost, best_hop = INFINITY, NO_HOP
+        if costs[index] == best_cost and next_hops[index] == best_hop:
+            return False
+        costs[index] = best_cost
+        next_hops[index] = best_hop
+        return True
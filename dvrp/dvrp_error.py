@@ -32,3 +32,9 @@ class InvalidArgumentsError(DVRPError):
         super().__init__(default_message + (":\n\t " + message if message else ""))
         self.name = "InvalidArgumentsError"
 
+
+class MalformedPacketError(DVRPError):
+    def __init__(self, message: str = None):
+        default_message = "Malformed routing update packet"
+        super().__init__(default_message + (":\n\t " + message if message else ""))
+        self.name = "MalformedPacketError"
@@ -0,0 +1,76 @@
+import math
+
+
+class FlapDamping:
+    """
+    Route flap damping in the style of RFC 2439, per key (neighbor or destination id).
+
+    Every flap adds penalty to the key's figure of merit, which decays exponentially with
+    the given half-life. A key is suppressed once its penalty reaches suppress and stays
+    suppressed until it decays below reuse. The penalty is capped so that a key is never
+    suppressed for longer than max_suppress_time after its last flap.
+
+    Decay is computed when a key is looked at, so idle keys cost nothing, and checks for
+    keys that are not suppressed are a set lookup.
+    """
+
+    def __init__(self, half_life: float, penalty: float = 1000.0, suppress: float = 2000.0,
+                 reuse: float = 750.0, max_suppress_time: float = None):
+        if not 0 < reuse < suppress:
+            raise ValueError("Damping thresholds must satisfy 0 < reuse < suppress.")
+        self.half_life = half_life
+        self.penalty = penalty
+        self.suppress = suppress
+        self.reuse = reuse
+        max_suppress_time = 4 * half_life if max_suppress_time is None else max_suppress_time
+        self.ceiling = reuse * 2 ** (max_suppress_time / half_life)
+        # Key -> [penalty, time of the penalty]
+        self._state = {}
+        self.suppressed = set()
+
+    def _decayed(self, state, now: float):
+        penalty = state[0] * 2 ** ((state[1] - now) / self.half_life)
+        state[0], state[1] = penalty, now
+        return penalty
+
+    def flap(self, key, now: float):
+        """
+        Records a flap of key.
+
+        Returns:
+            bool: Whether key is suppressed now.
+        """
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [0.0, now]
+        penalty = state[0] = min(self._decayed(state, now) + self.penalty, self.ceiling)
+        if penalty >= self.suppress:
+            self.suppressed.add(key)
+        return key in self.suppressed
+
+    def is_suppressed(self, key, now: float):
+        if key not in self.suppressed:
+            return False
+        if self._decayed(self._state[key], now) < self.reuse:
+            # Back in use, and the history is forgotten once it has decayed this far
+            self.suppressed.discard(key)
+            del self._state[key]
+            return False
+        return True
+
+    def penalty_of(self, key, now: float):
+        state = self._state.get(key)
+        return 0.0 if state is None else self._decayed(state, now)
+
+    def reuse_delay(self, key, now: float):
+        """
+        Returns:
+            float: Seconds until key is no longer suppressed, 0 if it is not.
+        """
+        if not self.is_suppressed(key, now):
+            return 0.0
+        return self.half_life * math.log2(self._state[key][0] / self.reuse)
+
+    def forget(self, key):
+        self._state.pop(key, None)
+        self.suppressed.discard(key)
@@ -0,0 +1,66 @@
+from itertools import repeat
+from dvrp.routing_table import NO_HOP
+from dvrp.routing_update import INFINITY
+
+
+class ForwardingTable:
+    """
+    Immutable snapshot of a routing table's routes: destination id -> (next hop, cost).
+
+    The router builds a new snapshot whenever routes change and swaps it in with one
+    attribute assignment, so readers on other threads always see a whole table without
+    locking. A snapshot holds copies of the next hop and cost columns, plus an extra row
+    (NO_HOP, INFINITY) that unknown destinations resolve to, and the destination index,
+    which is shared with the previous snapshot while no rows were added or removed.
+    """
+
+    __slots__ = ("version", "layout", "_index", "_unknown", "_next_hops", "_costs")
+
+    def __init__(self, version: int, layout: int, index: dict, next_hops, costs):
+        self.version = version
+        self.layout = layout
+        self._index = index
+        self._unknown = len(index)
+        self._next_hops = next_hops
+        self._costs = costs
+
+    @classmethod
+    def of(cls, routing_table, previous=None):
+        """
+        Snapshots routing_table, reusing the index of previous if the rows have not moved.
+        """
+        if previous is not None and previous.layout == routing_table.layout:
+            index = previous._index
+        else:
+            index = routing_table.copy_index()
+        next_hops, costs = routing_table.next_hops[:], routing_table.costs[:]
+        next_hops.append(NO_HOP)
+        costs.append(INFINITY)
+        version = 1 if previous is None else previous.version + 1
+        return cls(version, routing_table.layout, index, next_hops, costs)
+
+    def __len__(self):
+        return self._unknown
+
+    def __contains__(self, dest_id):
+        return dest_id in self._index
+
+    def lookup(self, dest_id: int):
+        """
+        Returns:
+            tuple: (next_hop, cost), next_hop None if the destination is unreachable or unknown.
+        """
+        row = self._index.get(dest_id, self._unknown)
+        next_hop = self._next_hops[row]
+        return (None if next_hop == NO_HOP else next_hop), self._costs[row]
+
+    def lookup_many(self, dest_ids):
+        """
+        Looks up a batch of destinations without a Python level loop.
+
+        Returns:
+            tuple: (next_hops, costs) lists in the order of dest_ids, with NO_HOP as the
+                next hop of unreachable or unknown destinations.
+        """
+        rows = list(map(self._index.get, dest_ids, repeat(self._unknown)))
+        return list(map(self._next_hops.__getitem__, rows)), list(map(self._costs.__getitem__, rows))
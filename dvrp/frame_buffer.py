@@ -0,0 +1,59 @@
+from dvrp.routing_update import frame_size
+
+
+class FrameBuffer:
+    """
+    Per-connection receive buffer that cuts a TCP byte stream into routing update frames.
+
+    Frames are delimited by their header (the num_update_fields of version 1 packets, the
+    body length of compact ones), so partial reads are kept until the rest of the frame
+    arrives and several frames received together are split apart.
+    """
+
+    def __init__(self, compact_threshold: int = 64 * 1024):
+        self._buffer = bytearray()
+        self._offset = 0
+        self.compact_threshold = compact_threshold
+
+    def __len__(self):
+        return len(self._buffer) - self._offset
+
+    def feed(self, data):
+        self._buffer += data
+
+    def read_frames(self):
+        """
+        Removes every complete frame from the buffer.
+
+        Returns:
+            list: The complete frames, as bytes, in arrival order.
+
+        Raises:
+            MalformedPacketError: If a frame header cannot be trusted. The connection has to
+                be closed, the buffer does not resynchronize.
+        """
+        frames = []
+        buffer = self._buffer
+        offset = self._offset
+        end = len(buffer)
+
+        with memoryview(buffer) as view:
+            while True:
+                size = frame_size(view, offset)
+                if size is None or end - offset < size:
+                    break
+                frames.append(bytes(view[offset:offset + size]))
+                offset += size
+
+        self._offset = offset
+        self._compact()
+        return frames
+
+    def _compact(self):
+        if self._offset == len(self._buffer):
+            self._buffer.clear()
+            self._offset = 0
+        elif self._offset >= self.compact_threshold:
+            # Drop consumed bytes only occasionally so a trickle of small reads stays cheap
+            del self._buffer[:self._offset]
+            self._offset = 0
@@ -0,0 +1,124 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# Event log categories are children of this logger, e.g. dvrp.updates
+ROOT = "dvrp"
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "off": logging.CRITICAL + 1,
+}
+
+# Nothing is logged until configure_logging is called, not even through logging's last resort
+logging.getLogger(ROOT).addHandler(logging.NullHandler())
+
+
+class _RateLimit:
+    # Shared by every category, set by configure_logging
+    rate = 50.0
+    burst = 100
+
+
+class EventLogger:
+    """
+    Event log of one category (e.g. dvrp.updates), wrapping its logging.Logger.
+
+    A token bucket lets through bursts of up to burst records, refilled at rate records
+    per second, and drops the rest before a LogRecord is even created. The number of
+    records dropped is appended to the next one let through.
+    """
+
+    __slots__ = ("logger", "_tokens", "_refilled", "_dropped")
+
+    def __init__(self, logger):
+        self.logger = logger
+        self._tokens = float(_RateLimit.burst)
+        self._refilled = time.monotonic()
+        self._dropped = 0
+
+    def log(self, level: int, msg: str, *args):
+        if self.logger.isEnabledFor(level):
+            self._emit(level, msg, args)
+
+    def debug(self, msg: str, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, msg, args)
+
+    def info(self, msg: str, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, msg, args)
+
+    def warning(self, msg: str, *args):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, msg, args)
+
+    def error(self, msg: str, *args):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args)
+
+    def _emit(self, level: int, msg: str, args):
+        now = time.monotonic()
+        tokens = min(_RateLimit.burst, self._tokens + (now - self._refilled) * _RateLimit.rate)
+        self._refilled = now
+        if tokens < 1:
+            self._tokens = tokens
+            self._dropped += 1
+            return
+        self._tokens = tokens - 1
+        if self._dropped:
+            msg = f"{msg} [{self._dropped} more dropped]"
+            self._dropped = 0
+        self.logger.log(level, msg, *args)
+
+
+_loggers = {}
+
+
+def get_logger(category: str):
+    logger = _loggers.get(category)
+    if logger is None:
+        logger = _loggers[category] = EventLogger(logging.getLogger(f"{ROOT}.{category}"))
+    return logger
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # Queues the record as is, so the message is formatted on the listener thread
+    def prepare(self, record):
+        return record
+
+
+def configure_logging(level: str = "info", stream=None, rate: float = 50.0, burst: int = 100):
+    """
+    Sends the event log to stream (stderr by default) at the given level, kept apart from
+    the prompt and command output on stdout.
+
+    Records below the level cost a level check. Records at or above it are rate limited
+    per category (see EventLogger) and handed to a background thread that formats and
+    writes them, so the event loop never waits on terminal or file I/O.
+
+    Returns:
+        QueueListener: The running listener, stopped automatically at exit.
+    """
+    _RateLimit.rate, _RateLimit.burst = rate, burst
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(LEVELS[level])
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    records = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(records))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in nanoseconds: 1 us to about 1 s, doubling
+BUCKETS_NS = tuple(1000 * 2 ** i for i in range(21))
+
+# Name -> help text, exported as dvrp_<name>_total
+COUNTERS = {
+    "decode_errors": "Malformed routing update frames.",
+    "route_changes": "Routes whose cost or next hop changed.",
+}
+NEIGHBOR_COUNTERS = {
+    "packets_received": "Routing update frames received from the neighbor.",
+    "bytes_received": "Routing update bytes received from the neighbor.",
+    "packets_sent": "Routing update frames sent to the neighbor.",
+    "bytes_sent": "Routing update bytes sent to the neighbor.",
+    "reconnects": "Connections to the neighbor lost and redialed.",
+    "timeouts": "Times the neighbor was not heard from for a dead interval.",
+}
+# Name -> help text, exported as dvrp_<name>_seconds
+HISTOGRAMS = {
+    "decode": "Time to decode a routing update header and wrap its entries.",
+    "update_routing_table": "Time to merge a routing update into the routing table.",
+    "encode": "Time to encode a routing update.",
+}
+
+
+class Histogram:
+    """
+    Latency histogram over the fixed BUCKETS_NS buckets.
+    """
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # One count per bucket, plus one for everything above the last bound
+        self.counts = [0] * (len(BUCKETS_NS) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, ns: int):
+        self.counts[bisect_left(BUCKETS_NS, ns)] += 1
+        self.total += ns
+        self.count += 1
+
+    def quantile(self, q: float):
+        """
+        Returns:
+            int: Upper bound in nanoseconds of the bucket holding the q-quantile, None if
+                empty or above the last bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_NS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class Metrics:
+    """
+    Counters, per-neighbor counters and latency histograms of one router.
+
+    Updates are plain dict and list increments from the thread running the router, so
+    they are cheap enough for the hot paths. Readers (the stats command, the HTTP
+    endpoint) copy what they need and may see a snapshot a few updates old.
+    """
+
+    def __init__(self, router_id: int):
+        self.router_id = router_id
+        self.started = time.time()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        # Counter name -> neighbor id -> value
+        self.neighbor_counters = {name: {} for name in NEIGHBOR_COUNTERS}
+        self.histograms = {name: Histogram() for name in HISTOGRAMS}
+        # Name -> (help text, callable returning the current value)
+        self.gauges = {}
+
+    def inc(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def inc_neighbor(self, name: str, neighbor_id: int, amount: int = 1):
+        values = self.neighbor_counters[name]
+        values[neighbor_id] = values.get(neighbor_id, 0) + amount
+
+    def observe(self, name: str, ns: int):
+        self.histograms[name].observe(ns)
+
+    def gauge(self, name: str, help_text: str, value):
+        self.gauges[name] = (help_text, value)
+
+    def render_prometheus(self):
+        """
+        Returns:
+            str: Every metric in the Prometheus text exposition format.
+        """
+        router = f'router="{self.router_id}"'
+        lines = []
+        for name, help_text in COUNTERS.items():
+            lines += [f"# HELP dvrp_{name}_total {help_text}", f"# TYPE dvrp_{name}_total counter",
+                      f"dvrp_{name}_total{{{router}}} {self.counters[name]}"]
+        for name, help_text in NEIGHBOR_COUNTERS.items():
+            lines += [f"# HELP dvrp_{name}_total {help_text}", f"# TYPE dvrp_{name}_total counter"]
+            for neighbor_id, value in sorted(self.neighbor_counters[name].items()):
+                lines.append(f'dvrp_{name}_total{{{router},neighbor="{neighbor_id}"}} {value}')
+        for name, (help_text, value) in list(self.gauges.items()):
+            lines += [f"# HELP dvrp_{name} {help_text}", f"# TYPE dvrp_{name} gauge",
+                      f"dvrp_{name}{{{router}}} {value()}"]
+        for name, help_text in HISTOGRAMS.items():
+            histogram = self.histograms[name]
+            counts, total, count = list(histogram.counts), histogram.total, histogram.count
+            lines += [f"# HELP dvrp_{name}_seconds {help_text}", f"# TYPE dvrp_{name}_seconds histogram"]
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS_NS, counts):
+                cumulative += bucket
+                lines.append(f'dvrp_{name}_seconds_bucket{{{router},le="{bound / 1e9:g}"}} {cumulative}')
+            lines += [f'dvrp_{name}_seconds_bucket{{{router},le="+Inf"}} {cumulative + counts[-1]}',
+                      f"dvrp_{name}_seconds_sum{{{router}}} {total / 1e9:g}",
+                      f"dvrp_{name}_seconds_count{{{router}}} {count}"]
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(metrics: Metrics, port: int, host: str = "127.0.0.1"):
+    """
+    Serves metrics.render_prometheus() at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server, shut down with shutdown().
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes would otherwise be written to stderr
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
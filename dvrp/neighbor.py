@@ -1,31 +1,39 @@
 import socket
+from collections import deque
+from itertools import islice
+from dvrp.log import get_logger
+
+log = get_logger("connections")
 
 
 class Neighbor:
-    def __init__(self, server_id, ip, port, cost):
+    # Most frames handed to a single sendmsg call
+    MAX_IOV = 64
+
+    def __init__(self, server_id, ip, port, cost, max_queue_depth: int = 16):
         self.id = server_id
         self.ip = ip
         self.port = port
         self.cost = cost
-        self._missed_updates = 0
+        # Timer clock reading of the last update received from this neighbor
+        self.last_heard = None
         self._connection = None
+        # asyncio StreamWriter (or any object with write/close) used instead of the socket,
+        # e.g. when driven by AsyncEngine or the simulator
+        self._writer = None
         self._is_down = True
-
-    @property
-    def missed_updates(self):
-        return self._missed_updates
-
-    @missed_updates.setter
-    def missed_updates(self, value):
-        if value < 0:
-            raise ValueError("Missed updates count cannot be negative.")
-        self._missed_updates = value
-
-    def increment_missed_updates(self):
-        self._missed_updates += 1
-
-    def reset_missed_updates(self):
-        self._missed_updates = 0
+        # Set by the disable command, a disabled link is never reconnected
+        self.disabled = False
+        # Outbound frames, flushed by the mainloop when writable
+        self._outbound = deque()
+        # Bytes of the first queued frame already written to the socket
+        self._outbound_offset = 0
+        self.max_queue_depth = max_queue_depth
+        self.dropped_frames = 0
+        # Wire version of the updates sent to this neighbor, raised once it advertises more
+        self.wire_version = 1
+        # How many of the encoder's addresses went out in compact updates on this connection
+        self.addresses_sent = 0
 
     @property
     def connection(self):
@@ -36,37 +44,122 @@ class Neighbor:
         if not isinstance(value, socket.socket) and value is not None:
             raise ValueError("Connection must be a socket instance or None.")
         self._connection = value
-        print(f"connection established on {self.id} using setter")
+        log.debug("Connection established on %d using setter", self.id)
 
     @property
     def is_down(self):
         return self._is_down
 
-    def connect(self):
-        print("connecting")
-        try:
-            print(self._connection)
-            if self._connection is not None:
-                raise RuntimeError("A connection already exists.")
-            self._connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._connection.connect((self.ip, self.port))
-            self._is_down = False
-        except socket.error:
-            self._connection.close()
-            self._connection = None
-            self._is_down = True
-            print(f"Failed to connect to neighbor {self.id}")
+    @property
+    def writer(self):
+        return self._writer
+
+    @property
+    def max_frame_size(self):
+        # Set by writers that send each frame as one datagram, None for streams
+        return getattr(self._writer, "max_frame_size", None)
+
+    def attach_writer(self, writer):
+        if self._connection is not None or self._writer is not None:
+            raise RuntimeError("A connection already exists.")
+        self._writer = writer
+        self._is_down = False
+
+    def attach_socket(self, sock):
+        """
+        Adopts a connected non-blocking socket, e.g. one opened by the ConnectionManager.
+        """
+        if self._connection is not None or self._writer is not None:
+            raise RuntimeError("A connection already exists.")
+        self._connection = sock
+        self._is_down = False
 
     def close_connection(self):
+        self._outbound.clear()
+        self._outbound_offset = 0
+        # The next connection may reach a restarted or older peer, so negotiate again
+        self.wire_version = 1
+        self.addresses_sent = 0
         if self._connection is not None:
             self._connection.close()
             self._connection = None
             self._is_down = True
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._is_down = True
+
+    @property
+    def wants_write(self):
+        return bool(self._outbound)
+
+    @property
+    def queue_depth(self):
+        return len(self._outbound)
+
+    def send(self, message, full_table: bool = False):
+        """
+        Queues a frame for the neighbor; the mainloop writes it out once the socket is writable.
+
+        A full table update supersedes every queued frame that has not started going out,
+        and the oldest unsent frames are dropped once the queue exceeds max_queue_depth.
+
+        Args:
+            message (bytes): The encoded frame.
+            full_table (bool): Whether the frame carries the whole routing table.
+        """
+        if self._writer is not None:
+            # StreamWriter buffers the message and the event loop flushes it
+            self._writer.write(message)
+            return
+        if self._connection is None:
+            log.warning("Error sending routing update to %d: No connection exists", self.id)
+            return
+
+        # The first frame may be partially written and must stay in place
+        outbound = self._outbound
+        first_pending = 1 if self._outbound_offset else 0
+        dropped = self.dropped_frames
+        if full_table:
+            while len(outbound) > first_pending:
+                outbound.pop()
+                self.dropped_frames += 1
+        outbound.append(message)
+
+        while len(outbound) > self.max_queue_depth and len(outbound) > first_pending + 1:
+            del outbound[first_pending]
+            self.dropped_frames += 1
+        if self.dropped_frames != dropped:
+            # A dropped compact update may have carried addresses, send them all again
+            self.addresses_sent = 0
+
+    def flush(self):
+        """
+        Writes as much of the outbound queue as the socket accepts in one sendmsg call.
+
+        Returns:
+            bool: True if the queue has been fully written.
+        """
+        outbound = self._outbound
+        if not outbound or self._connection is None:
+            return True
+
+        buffers = [memoryview(frame) for frame in islice(outbound, self.MAX_IOV)]
+        if self._outbound_offset:
+            buffers[0] = buffers[0][self._outbound_offset:]
 
-    def send(self, message):
         try:
-            if self._connection is None:
-                raise ValueError("No connection exists")
-            self._connection.send(message)
+            sent = self._connection.sendmsg(buffers)
+        except BlockingIOError:
+            return False
         except socket.error as e:
-            print(f"Error sending routing update to {self.id}: {e}")
+            log.warning("Error sending routing update to %d: %s", self.id, e)
+            self.close_connection()
+            return True
+
+        # Pop every frame that went out completely and remember how far into the next one we got
+        sent += self._outbound_offset
+        while outbound and sent >= len(outbound[0]):
+            sent -= len(outbound.popleft())
+        self._outbound_offset = sent
+        return not outbound
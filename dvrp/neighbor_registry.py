@@ -0,0 +1,44 @@
+class NeighborRegistry:
+    """
+    Neighbors of a server, indexed by id, by (ip, port) and by the connections they
+    send on, so every per-packet lookup is O(1). Iterates in insertion order like a list.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_address = {}
+        # Accepted connection (socket, StreamWriter, ...) -> neighbor sending on it
+        self._by_connection = {}
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, neighbor_id):
+        return neighbor_id in self._by_id
+
+    def __repr__(self):
+        return repr(list(self._by_id.values()))
+
+    def add(self, neighbor):
+        if neighbor.id in self._by_id:
+            raise ValueError(f"Neighbor {neighbor.id} is already registered.")
+        self._by_id[neighbor.id] = neighbor
+        self._by_address[(neighbor.ip, neighbor.port)] = neighbor
+
+    def get(self, neighbor_id):
+        return self._by_id.get(neighbor_id)
+
+    def by_address(self, ip: str, port: int):
+        return self._by_address.get((ip, port))
+
+    def by_connection(self, connection):
+        return self._by_connection.get(connection)
+
+    def bind_connection(self, connection, neighbor):
+        self._by_connection[connection] = neighbor
+
+    def unbind_connection(self, connection):
+        return self._by_connection.pop(connection, None)
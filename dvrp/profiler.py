@@ -0,0 +1,131 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+
+MODES = ("cprofile", "sample")
+
+
+class Profiler:
+    """
+    Runtime-toggled profiling of the thread running a router.
+
+    cprofile records every call with cProfile and is dumped as a pstats file. sample reads
+    the profiled thread's stack from a background thread every sample_interval seconds,
+    which costs the router little even under load, and is dumped as collapsed stacks
+    (one "frame;frame;frame count" line per stack) for flamegraph.pl or speedscope.
+    Nothing is installed while stopped, so an idle profiler costs nothing.
+    """
+
+    def __init__(self, name: str, sample_interval: float = 0.005):
+        # Default dump path, without the extension
+        self.name = name
+        self.sample_interval = sample_interval
+        self.mode = None
+        self._profile = None
+        self._profile_enabled = False
+        # Collapsed stack -> number of samples
+        self._samples = {}
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    @property
+    def running(self):
+        return self._profile_enabled or self._sampler is not None
+
+    def start(self, mode: str = "cprofile"):
+        """
+        Starts profiling the calling thread, discarding the previous profile.
+
+        Raises:
+            ValueError: If the mode is unknown or profiling is already running.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode {mode}, use one of {', '.join(MODES)}")
+        if self.running:
+            raise ValueError(f"Already profiling ({self.mode})")
+        self.mode = mode
+        self._profile, self._samples = None, {}
+        if mode == "cprofile":
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            self._profile_enabled = True
+        else:
+            self._stop_sampling.clear()
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(),), name="dvrp-profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def stop(self):
+        """
+        Raises:
+            ValueError: If profiling is not running.
+        """
+        if not self.running:
+            raise ValueError("Not profiling")
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        else:
+            self._profile.disable()
+            self._profile_enabled = False
+
+    def _sample(self, thread_id: int):
+        samples = self._samples
+        while not self._stop_sampling.wait(self.sample_interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                key = ";".join(reversed(stack))
+                samples[key] = samples.get(key, 0) + 1
+
+    def dump(self, path: str = None, top: int = 10):
+        """
+        Writes the profile gathered so far, which keeps running if it was.
+
+        Returns:
+            str: A summary: the hottest functions for cprofile, the sample count for sample.
+
+        Raises:
+            ValueError: If nothing has been profiled yet or the file cannot be written.
+        """
+        if self.mode is None:
+            raise ValueError("Nothing to dump, start profiling first")
+        if self.mode == "sample":
+            path = path or f"{self.name}.folded"
+            samples = dict(self._samples)
+            try:
+                with open(path, "w") as file:
+                    for stack, count in sorted(samples.items()):
+                        file.write(f"{stack} {count}\n")
+            except OSError as e:
+                raise ValueError(f"Could not write {path}: {e.strerror}") from e
+            return f"Wrote {sum(samples.values())} samples to {path}"
+
+        path = path or f"{self.name}.pstats"
+        # Collecting the stats disables the profiler
+        enabled = self._profile_enabled
+        summary = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=summary)
+        if enabled:
+            self._profile.enable()
+        try:
+            stats.dump_stats(path)
+        except OSError as e:
+            raise ValueError(f"Could not write {path}: {e.strerror}") from e
+        stats.sort_stats("cumulative").print_stats(top)
+        return f"{summary.getvalue().strip()}\nWrote {path}"
+
+    def close(self):
+        # Registered at exit by --profile, so a profile that was never dumped is not lost
+        if self.running:
+            self.stop()
+            print(self.dump())
@@ -0,0 +1,211 @@
+import os
+import queue
+import socket
+import stat
+import threading
+import time
+from itertools import chain
+from dvrp.dvrp_error import DVRPError
+
+# Longest request line, over 100k destination ids
+MAX_REQUEST = 1 << 20
+
+
+def _open_socket(address):
+    # A path is a Unix socket, anything else a (host, port) TCP address
+    if isinstance(address, str):
+        try:
+            if stat.S_ISSOCK(os.stat(address).st_mode):
+                _remove_stale_socket(address)
+        except FileNotFoundError:
+            pass
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    return sock
+
+
+def _remove_stale_socket(path: str):
+    # Only a socket nobody listens on was left behind by a killed router
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise DVRPError(f"{path} is in use by another route query server.")
+
+
+class RouteQueryServer:
+    """
+    Answers batched next hop lookups from a router's forwarding table snapshot over a
+    local Unix socket (address is a path) or TCP socket (address is (host, port)).
+
+    A request is a line of destination ids separated by spaces. The response is a line with
+    the version of the snapshot that answered it, then a next_hop:cost pair per id, in order,
+    with next hop 0 for unreachable or unknown destinations:
+
+        1 2 7   ->   42 1:0 2:3 0:65535
+
+    Connections are served by a fixed pool of daemon worker threads, so at most workers
+    clients are answered at once and the others wait. Workers only read the router's
+    current snapshot, which the router swaps in whole, so they never lock route processing.
+    They still share the GIL with the router, so while routes are changing (a route changed
+    within the last update interval) they pause between requests to keep the CPU time spent
+    answering under max_share.
+    """
+
+    def __init__(self, router, address, workers: int = 4, idle_timeout: float = 60.0, max_share: float = 0.1):
+        self.router = router
+        self.address = address
+        self.idle_timeout = idle_timeout
+        self.max_share = max_share
+        # Time the workers may answer again while throttled, pushed back by each answer
+        self._ready = 0.0
+        if router.forwarding_table is None:
+            router.publish_routes()
+
+        self.socket = _open_socket(address)
+        self.socket.bind(address)
+        self.socket.listen()
+        self._pending = queue.Queue()
+        self._open = set()
+        self._lock = threading.Lock()
+        self._workers = workers
+        threading.Thread(target=self._accept, daemon=True).start()
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                # Closed
+                return
+            self._pending.put(connection)
+
+    def _work(self):
+        while True:
+            connection = self._pending.get()
+            if connection is None:
+                return
+            with self._lock:
+                self._open.add(connection)
+            try:
+                self._serve(connection)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._open.discard(connection)
+                connection.close()
+
+    def _serve(self, connection):
+        connection.settimeout(self.idle_timeout)
+        with connection.makefile("rb") as reader:
+            while True:
+                request = reader.readline(MAX_REQUEST)
+                if not request:
+                    return
+                if not request.endswith(b"\n") and len(request) == MAX_REQUEST:
+                    connection.sendall(b"error request too long\n")
+                    return
+                start = time.thread_time()
+                response = self.answer(request)
+                spent = time.thread_time() - start
+                connection.sendall(response)
+                if time.time() - self.router.last_route_change < self.router.interval:
+                    self._throttle(spent)
+
+    def _throttle(self, spent: float):
+        # Idles for spent * (1 / max_share - 1) after the previous throttled answer of any worker
+        with self._lock:
+            now = time.perf_counter()
+            self._ready = max(self._ready, now) + spent * (1 / self.max_share - 1)
+            delay = self._ready - now
+        time.sleep(delay)
+
+    def answer(self, request: bytes):
+        """
+        Returns:
+            bytes: The response line to one request line.
+        """
+        try:
+            dest_ids = list(map(int, request.split()))
+        except ValueError:
+            return b"error destination ids must be integers\n"
+        # One read of the attribute, so the whole batch is answered from the same snapshot
+        snapshot = self.router.forwarding_table
+        next_hops, costs = snapshot.lookup_many(dest_ids)
+        pairs = map("{}:{}".format, next_hops, costs)
+        return (" ".join(chain((str(snapshot.version),), pairs)) + "\n").encode()
+
+    def close(self):
+        try:
+            # Wakes the accepting thread
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+        with self._lock:
+            for connection in self._open:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        for _ in range(self._workers):
+            self._pending.put(None)
+        if isinstance(self.address, str):
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+
+class RouteQueryClient:
+    """
+    One connection to a RouteQueryServer, for repeated batched lookups.
+    """
+
+    def __init__(self, address, timeout: float = 5.0):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self._reader = self.socket.makefile("rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def lookup(self, dest_ids):
+        """
+        Returns:
+            tuple: (version, routes) with the snapshot version and a (next_hop, cost) tuple
+                per destination id, next_hop None if unreachable or unknown.
+
+        Raises:
+            DVRPError: If the server rejects the request or closes the connection.
+        """
+        self.socket.sendall((" ".join(map(str, dest_ids)) + "\n").encode())
+        response = self._reader.readline()
+        if not response:
+            raise DVRPError("The route query server closed the connection.")
+        fields = response.split()
+        if fields[0] == b"error":
+            raise DVRPError(f"Route query failed: {b' '.join(fields[1:]).decode()}")
+        routes = []
+        for pair in fields[1:]:
+            next_hop, cost = pair.split(b":")
+            next_hop = int(next_hop)
+            routes.append((next_hop or None, int(cost)))
+        return int(fields[0]), routes
+
+    def close(self):
+        self._reader.close()
+        self.socket.close()
@@ -0,0 +1,144 @@
+import socket
+from array import array
+from collections.abc import Mapping
+from dvrp.routing_update import INFINITY
+
+# Next hop column value for unreachable destinations, server ids start at 1
+NO_HOP = 0
+
+
+class Route(Mapping):
+    """
+    Read-only view of one routing table row with the keys of the original route dicts:
+    "ip", "port", "cost" and "next_hop" (None while unreachable).
+    """
+
+    __slots__ = ("_table", "_index")
+
+    KEYS = ("ip", "port", "cost", "next_hop")
+
+    def __init__(self, table, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        table, index = self._table, self._index
+        if key == "cost":
+            return table.costs[index]
+        if key == "next_hop":
+            next_hop = table.next_hops[index]
+            return None if next_hop == NO_HOP else next_hop
+        if key == "ip":
+            return socket.inet_ntoa(table.ips[index].to_bytes(4, "big"))
+        if key == "port":
+            return table.ports[index]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class RoutingTable(Mapping):
+    """
+    Routing table stored column-wise: each destination id maps to a dense row index into
+    parallel arrays of destination ids, costs, next hops, ports and IPv4 addresses.
+
+    Reads go through the Mapping interface, where table[dest_id] is a Route view, so code
+    written against the dict of route dicts keeps working. Writes go through add and
+    set_route, or straight into the columns by index on hot paths.
+    """
+
+    def __init__(self):
+        self._index = {}
+        # index_of(dest_id, default=None) -> row index, bound straight to dict.get for hot loops
+        self.index_of = self._index.get
+        self.dest_ids = array("H")
+        self.costs = array("H")
+        self.next_hops = array("H")
+        self.ports = array("H")
+        # IPv4 addresses as big endian integers
+        self.ips = array("I")
+        # Bumped whenever rows are added or removed, see ForwardingTable
+        self.layout = 0
+
+    def __getitem__(self, dest_id):
+        return Route(self, self._index[dest_id])
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, dest_id):
+        return dest_id in self._index
+
+    def add(self, dest_id: int, ip, port: int, cost: int = INFINITY, next_hop: int = None):
+        """
+        Adds a destination, or overwrites its row if already present.
+
+        Args:
+            dest_id (int): Destination server id.
+            ip (str | bytes): Dotted or packed 4 byte IPv4 address.
+            port (int): Destination port.
+            cost (int): Route cost, capped at INFINITY.
+            next_hop (int): Next hop server id, None if unreachable.
+
+        Returns:
+            int: The row index of the destination.
+        """
+        if isinstance(ip, str):
+            ip = socket.inet_aton(ip)
+        ip = int.from_bytes(ip, "big")
+        cost = min(cost, INFINITY)
+        next_hop = NO_HOP if next_hop is None else next_hop
+
+        index = self._index.get(dest_id)
+        if index is not None:
+            self.ips[index] = ip
+            self.ports[index] = port
+            self.costs[index] = cost
+            self.next_hops[index] = next_hop
+            return index
+
+        index = self._index[dest_id] = len(self.dest_ids)
+        self.layout += 1
+        self.dest_ids.append(dest_id)
+        self.ips.append(ip)
+        self.ports.append(port)
+        self.costs.append(cost)
+        self.next_hops.append(next_hop)
+        return index
+
+    def set_route(self, dest_id: int, cost: int, next_hop: int = None):
+        index = self._index[dest_id]
+        self.costs[index] = min(cost, INFINITY)
+        self.next_hops[index] = NO_HOP if next_hop is None else next_hop
+
+    def remove(self, dest_id: int):
+        """
+        Removes a destination, moving the last row into its place to keep the columns dense.
+        """
+        index = self._index.pop(dest_id)
+        self.layout += 1
+        last = len(self.dest_ids) - 1
+        columns = (self.dest_ids, self.ips, self.ports, self.costs, self.next_hops)
+        if index != last:
+            for column in columns:
+                column[index] = column[last]
+            self._index[self.dest_ids[index]] = index
+        for column in columns:
+            del column[last]
+
+    def copy_index(self):
+        """
+        Returns:
+            dict: A copy of the destination id -> row index mapping.
+        """
+        return dict(self._index)
@@ -0,0 +1,665 @@
+import socket
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, repeat
+from dvrp.dvrp_error import MalformedPacketError
+
+INFINITY = 65535
+
+# Packet header: number of update fields, server port, server IPv4
+HEADER = struct.Struct("!H H 4s")
+# Routing entry: packed IPv4 + port, 2 padding bytes, destination id, cost
+ENTRY = struct.Struct("!6s 2x H H")
+# Same entry layout with the address split, as read by the decoder
+ENTRY_FIELDS = struct.Struct("!4s H 2x H H")
+ADDRESS = struct.Struct("!4s H")
+NUM_UPDATE_FIELDS = struct.Struct("!H")
+# Cost field, 10 bytes into each routing entry
+COST = struct.Struct("!H")
+COST_OFFSET = 10
+# Byte offset of each RoutingTable column within a routing entry
+COLUMN_OFFSETS = (("ips", 0), ("ports", 4), ("dest_ids", 8), ("costs", 10))
+
+# Highest wire format version spoken. Version 1 packets advertise it in the padding of their
+# first entry, which routers that only speak version 1 unpack and discard (0 there means
+# version 1); a router sends version 2 packets only to neighbors that advertised it.
+WIRE_VERSION = 2
+VERSION_FIELD = struct.Struct("!H")
+VERSION_OFFSET = HEADER.size + ADDRESS.size
+
+# Version 2 (compact) packets start with this in place of the entry count, which version 1
+# packets never reach: marker, version, flags, server port, server IPv4, body length
+COMPACT_MARKER = 0xFFFF
+COMPACT_HEADER = struct.Struct("!H B B H 4s I")
+# Flag set when the body is zlib compressed
+COMPRESSED = 0x01
+# Largest body accepted, compressed or not
+MAX_COMPACT_BODY = 16 << 20
+# Cost codes are varints of cost + 1, with 0 for INFINITY, so unreachable routes take one byte
+_COST_OF_CODE = (INFINITY,) + tuple(range(0x7F))
+_VARINT_BYTES = tuple(bytes([value]) for value in range(0x80))
+
+
+def column_bytes(column, count: int):
+    """
+    Returns the first count items of an array column as big endian bytes.
+    """
+    column = column[:count]
+    if sys.byteorder == "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def packet_size(num_update_fields: int):
+    return HEADER.size + ENTRY.size * num_update_fields
+
+
+def frame_size(buffer, offset: int = 0):
+    """
+    Returns the size of the packet starting at offset in buffer, of either wire version,
+    or None if its header is not complete yet.
+
+    Raises:
+        MalformedPacketError: If a compact header declares a body over MAX_COMPACT_BODY.
+            Nothing after it can be delimited, so the stream is unusable.
+    """
+    available = len(buffer) - offset
+    if available < HEADER.size:
+        return None
+    num_update_fields = NUM_UPDATE_FIELDS.unpack_from(buffer, offset)[0]
+    if num_update_fields != COMPACT_MARKER:
+        return packet_size(num_update_fields)
+    if available < COMPACT_HEADER.size:
+        return None
+    length = COMPACT_HEADER.unpack_from(buffer, offset)[5]
+    if length > MAX_COMPACT_BODY:
+        raise MalformedPacketError(f"Header declares a {length} byte body, over the {MAX_COMPACT_BODY} byte limit")
+    return COMPACT_HEADER.size + length
+
+
+def encode_varint(value: int):
+    # Unsigned LEB128: 7 bits per byte, low bits first, high bit set on all but the last
+    if value < 0x80:
+        return _VARINT_BYTES[value]
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def decode_varint(buffer, offset: int):
+    """
+    Returns:
+        tuple: (value, offset just past it)
+
+    Raises:
+        IndexError: If the varint runs past the end of buffer.
+    """
+    byte = buffer[offset]
+    offset += 1
+    value, shift = byte & 0x7F, 7
+    while byte & 0x80:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+    return value, offset
+
+
+def pack_address(ip: str, port: int):
+    """
+    Packs an IPv4 address and port into the 6 byte layout used by routing entries.
+
+    Args:
+        ip (str): Dotted IPv4 address.
+        port (int): Port number.
+
+    Returns:
+        bytes: The packed address.
+    """
+    return ADDRESS.pack(socket.inet_aton(ip), port)
+
+
+class EncodedUpdate:
+    """
+    An encoded routing update plus the next hop of each entry, used to derive the
+    poisoned reverse variant sent to each neighbor.
+    """
+
+    __slots__ = ("packet", "_next_hops", "_routes_via", "_poisoned")
+
+    def __init__(self, packet: bytes, next_hops):
+        self.packet = packet
+        # Next hop of each entry in packet order, only walked when a poisoned variant is first needed
+        self._next_hops = next_hops
+        self._routes_via = None
+        self._poisoned = {}
+
+    def for_neighbor(self, neighbor_id: int = None):
+        """
+        Returns the packet to send to a neighbor, with every route through that neighbor
+        advertised at an infinite cost (split horizon with poisoned reverse).
+
+        Args:
+            neighbor_id (int): The receiving neighbor, or None for the packet as encoded.
+        """
+        if neighbor_id is None:
+            return self.packet
+
+        packet = self._poisoned.get(neighbor_id)
+        if packet is None:
+            packet = self._poisoned[neighbor_id] = self._poison(neighbor_id)
+        return packet
+
+    def _poison(self, next_hop: int):
+        if self._routes_via is None:
+            self._routes_via = {}
+            offset = HEADER.size + COST_OFFSET
+            for hop in self._next_hops:
+                self._routes_via.setdefault(hop, []).append(offset)
+                offset += ENTRY.size
+
+        offsets = self._routes_via.get(next_hop)
+        if not offsets:
+            return self.packet
+        # Patch the cost fields of a copy rather than re-encoding
+        packet = bytearray(self.packet)
+        for offset in offsets:
+            COST.pack_into(packet, offset, INFINITY)
+        return bytes(packet)
+
+
+class CompactUpdate:
+    """
+    A version 2 routing update, encoded per neighbor: the destinations sorted by id and
+    sent as (id delta, cost code) varint pairs, after the addresses the neighbor has not
+    been sent yet.
+    """
+
+    __slots__ = ("_encoder", "_count", "_deltas", "_codes", "_next_hops", "_compress", "_routes_via", "_frames")
+
+    def __init__(self, encoder, dest_ids, codes, next_hops, compress: bool):
+        self._encoder = encoder
+        self._count = len(dest_ids)
+        deltas = [dest_id - previous for previous, dest_id in zip([0] + dest_ids, dest_ids)]
+        if not deltas or (max(deltas) < 0x80 and max(codes) < 0x80):
+            # Every varint is one byte, so each packet interleaves the two byte columns
+            self._deltas, self._codes = bytes(deltas), bytearray(codes)
+        else:
+            self._deltas, self._codes = deltas, codes
+        self._next_hops = next_hops
+        # Whether bodies over the encoder's compress_threshold are zlib compressed
+        self._compress = compress
+        self._routes_via = None
+        # Neighbor (or None) -> packet, for packets without addresses
+        self._frames = {}
+
+    def for_neighbor(self, neighbor_id: int = None, addresses_sent: int = None):
+        """
+        Returns the packet to send to a neighbor, with every route through that neighbor
+        advertised at an infinite cost (split horizon with poisoned reverse).
+
+        Args:
+            neighbor_id (int): The receiving neighbor, or None for the packet as encoded.
+            addresses_sent (int): How many of the encoder's addresses the neighbor was
+                sent (RoutingUpdateEncoder.num_addresses at the time), the rest go with
+                this packet. None sends no addresses.
+        """
+        encoder = self._encoder
+        if addresses_sent is None or addresses_sent >= encoder.num_addresses:
+            packet = self._frames.get(neighbor_id)
+            if packet is None:
+                packet = self._frames[neighbor_id] = self._encode(neighbor_id, b"\x00")
+            return packet
+        return self._encode(neighbor_id, encoder.address_section(addresses_sent))
+
+    def _encode(self, neighbor_id, addresses: bytes):
+        codes = self._codes
+        if neighbor_id is not None:
+            if self._routes_via is None:
+                self._routes_via = {}
+                for position, hop in enumerate(self._next_hops):
+                    self._routes_via.setdefault(hop, []).append(position)
+            positions = self._routes_via.get(neighbor_id)
+            if positions:
+                codes = codes.copy()
+                for position in positions:
+                    codes[position] = 0
+
+        if isinstance(self._deltas, bytes):
+            pairs = bytearray(2 * self._count)
+            pairs[0::2] = self._deltas
+            pairs[1::2] = codes
+        else:
+            pairs = b"".join(encode_varint(delta) + encode_varint(code) for delta, code in zip(self._deltas, codes))
+        body = b"".join((addresses, encode_varint(self._count), pairs))
+        return self._encoder.compact_packet(body, self._compress)
+
+
+class RoutingUpdateEncoder:
+    def __init__(self, ip: str, port: int, capacity: int = 0, compress_threshold: int = 1024,
+                 compress_level: int = 1):
+        self.ip = socket.inet_aton(ip)
+        self.port = port
+        # Packed ip/port blobs, interned per destination id
+        self._addresses = {}
+        # Destination ids in the order their address was interned, see CompactUpdate.for_neighbor
+        self._address_ids = []
+        # (start, end, bytes) of the last address section, the whole list is resent at times
+        self._address_section = None
+        self._buffer = bytearray(HEADER.size + ENTRY.size * capacity)
+        # Cached full table update, None when the routing table changed since it was encoded
+        self._full_table = None
+        self._compact_table = None
+        # Full table compact updates with bodies larger than this are zlib compressed, None never
+        self.compress_threshold = compress_threshold
+        # Level 1 compresses these bodies about as well as the higher levels, in a fraction of the time
+        self.compress_level = compress_level
+
+    @property
+    def is_dirty(self):
+        return self._full_table is None
+
+    def mark_dirty(self):
+        self._full_table = None
+        self._compact_table = None
+
+    @property
+    def num_addresses(self):
+        return len(self._address_ids)
+
+    def _intern(self, dest_id: int, address: bytes):
+        self._addresses[dest_id] = address
+        self._address_ids.append(dest_id)
+        return address
+
+    def address_of(self, dest_id: int, ip: str, port: int):
+        address = self._addresses.get(dest_id)
+        if address is None:
+            address = self._intern(dest_id, pack_address(ip, port))
+        return address
+
+    def address_section(self, start: int = 0):
+        """
+        Encodes the addresses interned from the start-th on, sorted by destination id, as a
+        varint count then (id delta varint, packed address) pairs.
+        """
+        end = len(self._address_ids)
+        cached = self._address_section
+        if cached is not None and cached[0] == start and cached[1] == end:
+            return cached[2]
+        dest_ids = sorted(self._address_ids[start:])
+        addresses = self._addresses
+        parts = [encode_varint(len(dest_ids))]
+        previous = 0
+        for dest_id in dest_ids:
+            parts.append(encode_varint(dest_id - previous))
+            parts.append(addresses[dest_id])
+            previous = dest_id
+        section = b"".join(parts)
+        self._address_section = (start, end, section)
+        return section
+
+    def compact_packet(self, body: bytes, compress: bool = False):
+        """
+        Prepends the compact header to a body, compressing it first if asked to and over
+        compress_threshold bytes.
+        """
+        flags = 0
+        if compress and self.compress_threshold is not None and len(body) > self.compress_threshold:
+            body = zlib.compress(body, self.compress_level)
+            flags |= COMPRESSED
+        return COMPACT_HEADER.pack(COMPACT_MARKER, WIRE_VERSION, flags, self.port, self.ip, len(body)) + body
+
+    def reserve(self, num_entries: int):
+        size = packet_size(num_entries)
+        if len(self._buffer) < size:
+            # Grow with headroom so tables learned one route at a time don't reallocate every packet
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+        return size
+
+    def encode_entries(self, entries, num_entries: int):
+        """
+        Encodes (dest_id, info) pairs into a routing update packet, bypassing the cache.
+
+        Args:
+            entries (iterable): (dest_id, info) pairs where info holds "ip", "port" and "cost".
+            num_entries (int): Number of pairs in entries.
+
+        Returns:
+            bytes: The binary routing update packet.
+        """
+        size = self.reserve(num_entries)
+        buffer = self._buffer
+        HEADER.pack_into(buffer, 0, num_entries, self.port, self.ip)
+
+        pack_into = ENTRY.pack_into
+        addresses = self._addresses
+        offset = HEADER.size
+        for dest_id, info in entries:
+            address = addresses.get(dest_id)
+            if address is None:
+                address = self.address_of(dest_id, info["ip"], info["port"])
+            cost = info["cost"]
+            if cost > INFINITY:
+                cost = INFINITY
+            pack_into(buffer, offset, address, dest_id, cost)
+            offset += ENTRY.size
+
+        return self._advertise_version(buffer, size)
+
+    def encode_table(self, routing_table, num_entries: int):
+        """
+        Encodes the first num_entries rows of a RoutingTable, bypassing the cache.
+
+        Every column is converted to big endian bytes once and each of its bytes is written
+        into the entries with one strided slice assignment, so no per-route Python code runs.
+
+        Returns:
+            bytes: The binary routing update packet.
+        """
+        size = self.reserve(num_entries)
+        buffer = self._buffer
+        HEADER.pack_into(buffer, 0, num_entries, self.port, self.ip)
+
+        for name, offset in COLUMN_OFFSETS:
+            column = getattr(routing_table, name)
+            data = column_bytes(column, num_entries)
+            width = column.itemsize
+            for byte in range(width):
+                start = HEADER.size + offset + byte
+                buffer[start:size:ENTRY.size] = data[byte::width]
+
+        return self._advertise_version(buffer, size)
+
+    def encode(self, routing_table, poison_next_hop: int = None):
+        """
+        Returns the full table routing update packet, re-encoding only if the table changed.
+
+        Args:
+            routing_table (RoutingTable): The server's routing table.
+            poison_next_hop (int): Neighbor the packet is sent to. Routes through it are
+                advertised with an infinite cost (split horizon with poisoned reverse).
+
+        Returns:
+            bytes: The binary routing update packet.
+        """
+        if self._full_table is None:
+            num_entries = len(routing_table)
+            packet = self.encode_table(routing_table, num_entries)
+            # Snapshot the next hops, the table keeps changing after the packet is cached
+            self._full_table = EncodedUpdate(packet, routing_table.next_hops[:num_entries])
+        return self._full_table.for_neighbor(poison_next_hop)
+
+    def encode_delta(self, routing_table, dest_ids):
+        """
+        Encodes only the given destinations, for triggered updates. Never cached.
+
+        Args:
+            routing_table (RoutingTable): The server's routing table.
+            dest_ids (list): Destinations to advertise.
+
+        Returns:
+            EncodedUpdate: The update, with per-neighbor poisoned reverse variants.
+        """
+        # Few rows, so a per-row pack with interned addresses beats converting whole columns
+        num_entries = len(dest_ids)
+        size = self.reserve(num_entries)
+        buffer = self._buffer
+        HEADER.pack_into(buffer, 0, num_entries, self.port, self.ip)
+
+        pack_into = ENTRY.pack_into
+        addresses = self._addresses
+        index_of = routing_table.index_of
+        costs, next_hops = routing_table.costs, routing_table.next_hops
+        hops = []
+        offset = HEADER.size
+        for dest_id in dest_ids:
+            index = index_of(dest_id)
+            address = addresses.get(dest_id)
+            if address is None:
+                address = self._intern_row(routing_table, dest_id, index)
+            pack_into(buffer, offset, address, dest_id, costs[index])
+            hops.append(next_hops[index])
+            offset += ENTRY.size
+
+        return EncodedUpdate(self._advertise_version(buffer, size), hops)
+
+    @staticmethod
+    def _advertise_version(buffer: bytearray, size: int):
+        # Written on every packet, the buffer is reallocated zeroed when it grows
+        if size > HEADER.size:
+            VERSION_FIELD.pack_into(buffer, VERSION_OFFSET, WIRE_VERSION)
+        return bytes(memoryview(buffer)[:size])
+
+    def _intern_row(self, routing_table, dest_id: int, index: int):
+        address = ADDRESS.pack(routing_table.ips[index].to_bytes(4, "big"), routing_table.ports[index])
+        return self._intern(dest_id, address)
+
+    def encode_compact(self, routing_table, dest_ids=None):
+        """
+        Encodes a version 2 update of the whole table, cached until the table changes, or
+        of the given destinations for triggered updates.
+
+        Only full tables are compressed: deltas are small and sent right away.
+
+        Args:
+            routing_table (RoutingTable): The server's routing table.
+            dest_ids (list): Destinations to advertise, None for the whole table.
+
+        Returns:
+            CompactUpdate: The update, with per-neighbor poisoned reverse variants.
+        """
+        if dest_ids is None and self._compact_table is not None:
+            return self._compact_table
+
+        if dest_ids is None:
+            num_entries = len(routing_table)
+            ids = routing_table.dest_ids[:num_entries].tolist()
+            costs = routing_table.costs[:num_entries].tolist()
+            next_hops = routing_table.next_hops[:num_entries].tolist()
+            # Rows are mostly in id order already, which sorted() checks in linear time
+            rows = sorted(range(num_entries), key=ids.__getitem__)
+            if rows != list(range(num_entries)):
+                ids = [ids[index] for index in rows]
+                costs = [costs[index] for index in rows]
+                next_hops = [next_hops[index] for index in rows]
+        else:
+            ids = sorted(dest_ids)
+            rows = list(map(routing_table.index_of, ids))
+            costs = [routing_table.costs[index] for index in rows]
+            next_hops = [routing_table.next_hops[index] for index in rows]
+
+        addresses = self._addresses
+        for dest_id in [dest_id for dest_id in ids if dest_id not in addresses]:
+            self._intern_row(routing_table, dest_id, routing_table.index_of(dest_id))
+        codes = [0 if cost >= INFINITY else cost + 1 for cost in costs]
+        update = CompactUpdate(self, ids, codes, next_hops, compress=dest_ids is None)
+        if dest_ids is None:
+            self._compact_table = update
+        return update
+
+
+class RoutingUpdateView:
+    """
+    Lazy, zero-copy view over the entries of a routing update packet.
+
+    Iterating yields (dest_id, cost, ip, port) tuples where ip is the packed 4 byte IPv4,
+    so callers only pay for socket.inet_ntoa on destinations they actually store.
+    version is the highest wire version the sender speaks, None for a packet without
+    entries, which has nowhere to advertise it.
+    """
+
+    __slots__ = ("_entries", "_count", "version")
+
+    def __init__(self, entries: memoryview, count: int, version: int = 1):
+        self._entries = entries
+        self._count = count
+        self.version = version
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def buffer(self):
+        # Raw entry bytes, for consumers that decode all entries at once
+        return self._entries
+
+    def __iter__(self):
+        for ip, port, dest_id, cost in ENTRY_FIELDS.iter_unpack(self._entries):
+            yield dest_id, cost, ip, port
+
+
+class CompactUpdateView:
+    """
+    The entries of a version 2 routing update.
+
+    Iterating yields (dest_id, cost, None, None) tuples: compact updates carry each address
+    once, into the address book given to decode_entries. When every varint is one byte,
+    as for ids in sequence at costs under 127, the pairs are left as they came and walked
+    at C speed.
+    """
+
+    __slots__ = ("_deltas", "_codes", "_dest_ids", "_costs")
+    version = WIRE_VERSION
+
+    def __init__(self, pairs: bytes, count: int):
+        self._dest_ids = self._costs = None
+        if len(pairs) == 2 * count and pairs.isascii():
+            self._deltas, self._codes = pairs[0::2], pairs[1::2]
+            if sum(self._deltas) > 0xFFFF:
+                raise MalformedPacketError("Compact update holds destination ids over 65535")
+            return
+
+        self._deltas = self._codes = None
+        dest_ids, costs = [], []
+        dest_id = offset = 0
+        try:
+            for _ in range(count):
+                delta, offset = decode_varint(pairs, offset)
+                code, offset = decode_varint(pairs, offset)
+                dest_id += delta
+                dest_ids.append(dest_id)
+                costs.append(INFINITY if code == 0 else code - 1)
+        except IndexError:
+            raise MalformedPacketError(
+                f"Compact update declares {count} entries but ends after {len(dest_ids)}"
+            ) from None
+        if offset != len(pairs) or dest_id > 0xFFFF or any(cost > INFINITY for cost in costs):
+            raise MalformedPacketError("Compact update entries are malformed")
+        self._dest_ids, self._costs = dest_ids, costs
+
+    def __len__(self):
+        return len(self._deltas) if self._dest_ids is None else len(self._dest_ids)
+
+    def columns(self):
+        """
+        Returns:
+            tuple: (dest_ids, costs) as array("H") columns, for consumers that take all entries at once.
+        """
+        if self._dest_ids is None:
+            return array("H", accumulate(self._deltas)), array("H", map(_COST_OF_CODE.__getitem__, self._codes))
+        return array("H", self._dest_ids), array("H", self._costs)
+
+    def __iter__(self):
+        if self._dest_ids is None:
+            costs = map(_COST_OF_CODE.__getitem__, self._codes)
+            return zip(accumulate(self._deltas), costs, repeat(None), repeat(None))
+        return zip(self._dest_ids, self._costs, repeat(None), repeat(None))
+
+
+def decode_routing_update(packet, addresses: dict = None):
+    """
+    Decodes the header of a routing update packet and wraps its entries in a view.
+
+    Args:
+        packet (bytes): The binary routing update packet, of either wire version.
+        addresses (dict): Address book, see decode_entries.
+
+    Returns:
+        tuple: (server_ip, server_port, RoutingUpdateView or CompactUpdateView)
+
+    Raises:
+        MalformedPacketError: If the packet is shorter than its header declares.
+    """
+    entries = decode_entries(packet, addresses)
+    if isinstance(entries, CompactUpdateView):
+        server_port, server_ip = COMPACT_HEADER.unpack_from(packet)[3:5]
+    else:
+        _, server_port, server_ip = HEADER.unpack_from(packet)
+    return socket.inet_ntoa(server_ip), server_port, entries
+
+
+def decode_entries(packet, addresses: dict = None):
+    """
+    Wraps the entries of a routing update packet in a view without resolving the sender
+    address, for connections already known to belong to a neighbor.
+
+    Args:
+        packet (bytes): The binary routing update packet, of either wire version.
+        addresses (dict): Address book, destination id -> (packed IPv4, port), that the
+            addresses carried by a compact packet are added to.
+
+    Raises:
+        MalformedPacketError: If the packet is shorter than its header declares.
+    """
+    view = memoryview(packet)
+    if len(view) < HEADER.size:
+        raise MalformedPacketError(f"Expected at least {HEADER.size} bytes but received {len(view)}")
+
+    num_update_fields = NUM_UPDATE_FIELDS.unpack_from(view)[0]
+    if num_update_fields == COMPACT_MARKER:
+        return _decode_compact(view, addresses)
+    end = packet_size(num_update_fields)
+    if len(view) < end:
+        raise MalformedPacketError(
+            f"Header declares {num_update_fields} entries ({end} bytes) but received {len(view)} bytes"
+        )
+    version = None
+    if num_update_fields:
+        version = VERSION_FIELD.unpack_from(view, VERSION_OFFSET)[0] or 1
+    return RoutingUpdateView(view[HEADER.size:end], num_update_fields, version)
+
+
+def _decode_compact(view: memoryview, addresses: dict):
+    if len(view) < COMPACT_HEADER.size:
+        raise MalformedPacketError(f"Expected at least {COMPACT_HEADER.size} bytes but received {len(view)}")
+    _, version, flags, _, _, length = COMPACT_HEADER.unpack_from(view)
+    if version != WIRE_VERSION:
+        raise MalformedPacketError(f"Unsupported wire version {version}")
+    end = COMPACT_HEADER.size + length
+    if length > MAX_COMPACT_BODY or len(view) < end:
+        raise MalformedPacketError(
+            f"Header declares a {length} byte body but received {len(view) - COMPACT_HEADER.size} bytes"
+        )
+
+    body = view[COMPACT_HEADER.size:end]
+    if flags & COMPRESSED:
+        decompressor = zlib.decompressobj()
+        try:
+            body = decompressor.decompress(body, MAX_COMPACT_BODY)
+        except zlib.error as e:
+            raise MalformedPacketError(f"Corrupt compressed update: {e}") from None
+        if not decompressor.eof:
+            raise MalformedPacketError("Compressed update is truncated or too large")
+    else:
+        body = body.tobytes()
+
+    try:
+        num_addresses, offset = decode_varint(body, 0)
+        dest_id = 0
+        for _ in range(num_addresses):
+            delta, offset = decode_varint(body, offset)
+            dest_id += delta
+            address = ADDRESS.unpack_from(body, offset)
+            offset += ADDRESS.size
+            if addresses is not None:
+                addresses[dest_id] = address
+        count, offset = decode_varint(body, offset)
+    except (IndexError, struct.error):
+        raise MalformedPacketError("Compact update is truncated") from None
+    return CompactUpdateView(body[offset:], count)
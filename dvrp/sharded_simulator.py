@@ -0,0 +1,326 @@
+import heapq
+import math
+import multiprocessing
+import os
+import time
+from collections import deque
+from dvrp.dvrp_error import DVRPError
+from dvrp.simulator import Simulation
+
+
+def partition(servers: dict, links: dict, shards: int):
+    """
+    Splits the routers into shards of at most ceil(n / shards) routers with few links
+    between shards, since every frame over such a link crosses a process boundary.
+
+    Shards grow breadth-first from seeds picked farthest-first, so each one is a compact
+    region of the graph, then boundary routers move to the shard holding most of their
+    neighbors while that cuts links and keeps the shards balanced.
+
+    Returns:
+        dict: Router id -> shard index.
+    """
+    adjacency = {server_id: [] for server_id in servers}
+    for id1, id2 in links:
+        adjacency[id1].append(id2)
+        adjacency[id2].append(id1)
+    shards = max(1, min(shards, len(servers)))
+    capacity = math.ceil(len(servers) / shards)
+
+    def hops_from(sources):
+        hops = dict.fromkeys(sources, 0)
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            for other in adjacency[node]:
+                if other not in hops:
+                    hops[other] = hops[node] + 1
+                    queue.append(other)
+        return hops
+
+    seeds = [min(servers)]
+    while len(seeds) < shards:
+        hops = hops_from(seeds)
+        # Unreachable routers come first, they seed their own component
+        seeds.append(max((s for s in servers if s not in seeds), key=lambda s: hops.get(s, math.inf)))
+
+    assignment = {}
+    sizes = [0] * shards
+    frontiers = [deque([seed]) for seed in seeds]
+    for shard, seed in enumerate(seeds):
+        assignment[seed] = shard
+        sizes[shard] = 1
+    growing = True
+    while growing:
+        growing = False
+        # Round-robin, one router per shard at a time, so regions grow evenly
+        for shard, frontier in enumerate(frontiers):
+            while frontier and sizes[shard] < capacity:
+                node = frontier[0]
+                other = next((o for o in adjacency[node] if o not in assignment), None)
+                if other is None:
+                    frontier.popleft()
+                    continue
+                assignment[other] = shard
+                sizes[shard] += 1
+                frontier.append(other)
+                growing = True
+                break
+    for server_id in servers:
+        if server_id not in assignment:
+            shard = sizes.index(min(sizes))
+            assignment[server_id] = shard
+            sizes[shard] += 1
+
+    for _ in range(4):
+        moved = 0
+        for node, neighbors in adjacency.items():
+            counts = {}
+            for other in neighbors:
+                counts[assignment[other]] = counts.get(assignment[other], 0) + 1
+            current = assignment[node]
+            best = max(counts, key=counts.get, default=current)
+            if counts.get(best, 0) > counts.get(current, 0) and sizes[best] < capacity and sizes[current] > 1:
+                assignment[node] = best
+                sizes[current] -= 1
+                sizes[best] += 1
+                moved += 1
+        if not moved:
+            break
+    return assignment
+
+
+class ShardSimulation(Simulation):
+    """
+    The routers of one shard. Frames to routers in other shards are kept in outbox, as
+    (delivery time, router id, frame), for the driver to hand to their shard.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outbox = []
+        self.events = 0
+
+    def transmit(self, router_id: int, message):
+        if router_id in self.routers:
+            super().transmit(router_id, message)
+            return
+        self.messages += 1
+        self.bytes += len(message)
+        self.outbox.append((self.now + self.latency, router_id, bytes(message)))
+
+    def receive(self, frames):
+        for at, router_id, message in frames:
+            heapq.heappush(self._events, (at, next(self._sequence), self._deliver, (router_id, message)))
+
+    def advance(self, until: float):
+        # Runs every event due before until, which no frame from another shard can precede
+        events = self._events
+        while events and events[0][0] < until:
+            at, _, callback, args = heapq.heappop(events)
+            self.now = at
+            callback(*args)
+            self.events += 1
+
+    def next_event(self):
+        return self._events[0][0] if self._events else math.inf
+
+
+def _serve_shard(connection, args: tuple, kwargs: dict):
+    # Runs in the shard's process, answering the driver's requests until told to stop
+    shard = ShardSimulation(*args, **kwargs)
+    while True:
+        request, *payload = connection.recv()
+        if request == "stop":
+            break
+        if request == "start":
+            shard.start()
+        elif request == "advance":
+            until, frames = payload
+            shard.receive(frames)
+            shard.advance(until)
+        elif request == "execute":
+            now, router_id, command_string = payload
+            shard.now = max(shard.now, now)
+            if router_id in shard.routers:
+                shard.execute(router_id, command_string)
+        elif request == "crashed":
+            shard.crashed.add(payload[0])
+        elif request == "link":
+            key, cost = payload
+            shard.links[key] = cost
+        elif request == "verify":
+            connection.send(shard.verify())
+            continue
+        outbox, shard.outbox = shard.outbox, []
+        connection.send((outbox, shard.next_event(), shard.messages, shard.bytes, shard.route_changes,
+                         shard.last_change, shard.events))
+    connection.close()
+
+
+class ShardedSimulation:
+    """
+    Runs the memory transport simulation of one topology across processes, one shard of
+    routers per process, so large topologies are not limited to one core by the GIL.
+
+    Shards advance in lockstep windows as long as the link latency, starting at the
+    earliest pending event anywhere: a frame sent within a window arrives after it ends,
+    so each shard can run its window on its own, and frames between shards are exchanged
+    in one batch per shard at the end of every window. Idle stretches between windows
+    are skipped, so the number of windows follows the activity, not the simulated time.
+    """
+
+    def __init__(self, servers: dict, links: dict, shards: int = None, interval: float = 1.0,
+                 latency: float = 0.001, vectorized: bool = False, seed: int = None):
+        if latency <= 0:
+            raise DVRPError("A sharded simulation needs a positive link latency.")
+        self.servers = servers
+        self.links = links
+        self.interval = interval
+        self.latency = latency
+        self.assignment = partition(servers, links, shards or os.cpu_count() or 1)
+        self.shards = max(self.assignment.values()) + 1
+        self.cut_links = sum(1 for id1, id2 in links if self.assignment[id1] != self.assignment[id2])
+        self.crashed = set()
+
+        self.now = 0.0
+        self.last_change = 0.0
+        self.windows = 0
+        self.crossing_messages = 0
+        self._inboxes = [[] for _ in range(self.shards)]
+        # Latest (next event, messages, bytes, route changes, last change, events) per shard
+        self._states = [(math.inf, 0, 0, 0, 0.0, 0)] * self.shards
+
+        members = [set() for _ in range(self.shards)]
+        for router_id, shard in self.assignment.items():
+            members[shard].add(router_id)
+        self._connections = []
+        self._processes = []
+        for shard in range(self.shards):
+            connection, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_serve_shard,
+                args=(child, (servers, dict(links), interval, latency),
+                      {"vectorized": vectorized, "seed": seed, "router_ids": members[shard]}),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for connection, process in zip(self._connections, self._processes):
+            try:
+                connection.send(("stop",))
+            except OSError:
+                pass
+            process.join()
+            connection.close()
+        self._connections, self._processes = [], []
+
+    def _request(self, shards, *request):
+        # Sends the request to every shard before waiting, so the shards work in parallel
+        for shard in shards:
+            self._connections[shard].send(request)
+        for shard in shards:
+            self._collect(shard, self._connections[shard].recv())
+
+    def _collect(self, shard: int, reply):
+        outbox, *state = reply
+        self._states[shard] = tuple(state)
+        self.last_change = max(self.last_change, state[4])
+        for frame in outbox:
+            self._inboxes[self.assignment[frame[1]]].append(frame)
+        self.crossing_messages += len(outbox)
+
+    def _totals(self):
+        return [sum(state[i] for state in self._states) for i in (1, 2, 3, 5)]
+
+    def start(self):
+        """
+        Connects every router to its neighbors and starts their timers.
+        """
+        self._request(range(self.shards), "start")
+
+    def execute(self, router_id: int, command_string: str):
+        """
+        Runs a router command (e.g. "update 1 2 10", "crash") in the router's shard.
+        """
+        self._request([self.assignment[router_id]], "execute", self.now, router_id, command_string)
+        if command_string.split()[0].lower() == "crash":
+            self.crashed.add(router_id)
+            self._request(range(self.shards), "crashed", router_id)
+
+    def set_link_cost(self, id1: int, id2: int, cost: int):
+        key = (min(id1, id2), max(id1, id2))
+        self.links[key] = cost
+        self._request(range(self.shards), "link", key, cost)
+        self.execute(id1, f"update {id1} {id2} {cost}")
+        self.execute(id2, f"update {id2} {id1} {cost}")
+
+    def run(self, max_time: float = 600.0, quiet_intervals: int = 3):
+        """
+        Advances every shard until no route has changed for quiet_intervals intervals, or
+        max_time simulated seconds have passed.
+
+        Returns:
+            dict: Convergence statistics for the run, aggregated over the shards.
+        """
+        start, wall_start = self.now, time.perf_counter()
+        messages, sent_bytes, route_changes, events = self._totals()
+        crossing_messages, windows = self.crossing_messages, self.windows
+        self.last_change = start
+        converged = False
+
+        while True:
+            pending = (frame[0] for inbox in self._inboxes for frame in inbox)
+            at = min(min(state[0] for state in self._states), min(pending, default=math.inf))
+            if at - self.last_change > quiet_intervals * self.interval:
+                converged = True
+                break
+            if at - start > max_time:
+                break
+            until = at + self.latency
+            for shard, connection in enumerate(self._connections):
+                connection.send(("advance", until, self._inboxes[shard]))
+                self._inboxes[shard] = []
+            for shard, connection in enumerate(self._connections):
+                self._collect(shard, connection.recv())
+            self.now = until
+            self.windows += 1
+
+        totals = self._totals()
+        convergence_time = self.last_change - start
+        return {
+            "transport": "memory",
+            "routers": len(self.servers),
+            "links": len(self.links),
+            "shards": self.shards,
+            "cut_links": self.cut_links,
+            "converged": converged,
+            "convergence_time": convergence_time,
+            "rounds": convergence_time / self.interval,
+            "messages": totals[0] - messages,
+            "bytes": totals[1] - sent_bytes,
+            "route_changes": totals[2] - route_changes,
+            "events": totals[3] - events,
+            "crossing_messages": self.crossing_messages - crossing_messages,
+            "windows": self.windows - windows,
+            "wall_time": time.perf_counter() - wall_start,
+        }
+
+    def verify(self):
+        """
+        Returns:
+            list: (router_id, dest_id, expected_cost, actual_cost) for every mismatch in any shard.
+        """
+        for connection in self._connections:
+            connection.send(("verify",))
+        return [mismatch for connection in self._connections for mismatch in connection.recv()]
@@ -0,0 +1,370 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+import random
+import time
+from dvrp.async_engine import AsyncEngine
+from dvrp.dvrp_error import DVRPError
+from dvrp.routing_update import INFINITY
+from dvrp.tcp_server import TCPServer
+from dvrp.timer_wheel import TimerWheel
+from dvrp.topology_parser import load_topology, topology_path
+
+
+class _Discard:
+    # Swallows the routers' console output during simulations
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+_DISCARD = _Discard()
+
+
+def load_network(paths: list, cache: bool = False):
+    """
+    Loads one whole network topology file, or merges several per-router files (t1.txt ...).
+
+    Args:
+        paths (list): Topology file paths, looked up under topologies/ if not found as given.
+        cache (bool): Load each file through its compiled topology cache (see load_topology).
+
+    Returns:
+        tuple: (servers, links) where servers maps id -> server info and links maps
+            (low_id, high_id) -> cost.
+    """
+    servers = {}
+    links = {}
+    for path in paths:
+        if not os.path.exists(path):
+            path = topology_path(path)
+        try:
+            topology = load_topology(path, network=len(paths) == 1, cache=cache)
+        except FileNotFoundError:
+            raise DVRPError(f"Topology file {path} not found.")
+
+        for server in topology.servers():
+            servers[server["id"]] = server
+        for id1, id2, cost in zip(topology.link_ids1, topology.link_ids2, topology.link_costs):
+            links[(id1, id2) if id1 < id2 else (id2, id1)] = cost
+    return servers, links
+
+
+def shortest_paths(servers: dict, links: dict, source: int):
+    """
+    Dijkstra over the topology, used to verify converged routing tables.
+    """
+    adjacency = {server_id: [] for server_id in servers}
+    for (id1, id2), cost in links.items():
+        adjacency[id1].append((id2, cost))
+        adjacency[id2].append((id1, cost))
+
+    distances = {source: 0}
+    heap = [(0, source)]
+    while heap:
+        distance, node = heapq.heappop(heap)
+        if distance > distances[node]:
+            continue
+        for other, cost in adjacency[node]:
+            candidate = distance + cost
+            if candidate < distances.get(other, INFINITY):
+                distances[other] = candidate
+                heapq.heappush(heap, (candidate, other))
+    return distances
+
+
+class SimulatedRouter(TCPServer):
+    def __init__(self, simulation, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.simulation = simulation
+
+    def routes_changed(self, dest_ids):
+        super().routes_changed(dest_ids)
+        if dest_ids:
+            self.simulation.record_route_changes(len(dest_ids))
+
+
+class MemoryLink:
+    """
+    In-memory stand-in for a neighbor connection: delivers each frame to the peer router
+    after the simulated link latency.
+    """
+
+    __slots__ = ("simulation", "peer_id", "closed")
+
+    def __init__(self, simulation, peer_id: int):
+        self.simulation = simulation
+        self.peer_id = peer_id
+        self.closed = False
+
+    def write(self, message):
+        if not self.closed:
+            self.simulation.transmit(self.peer_id, message)
+
+    def close(self):
+        self.closed = True
+
+
+class MemoryEngine:
+    """
+    Engine hook for a simulated router: reconnecting a neighbor attaches a new MemoryLink
+    instead of dialing a socket.
+    """
+
+    def __init__(self, simulation, router):
+        self.simulation = simulation
+        router.engine = self
+
+    def connect(self, neighbor):
+        if neighbor.is_down and neighbor.id not in self.simulation.crashed:
+            neighbor.attach_writer(MemoryLink(self.simulation, neighbor.id))
+
+
+class Simulation:
+    """
+    Runs every router of a topology in one process, or only router_ids when the simulation
+    is one shard of a ShardedSimulation.
+
+    With the memory transport, routers exchange the real binary frames through MemoryLinks
+    and every router's timers run on a virtual clock, so rounds run as fast as the CPU allows.
+    With the loopback transport every router listens on its topology port and the routers
+    share one asyncio event loop in real time.
+    """
+
+    def __init__(self, servers: dict, links: dict, interval: float = 1.0, latency: float = 0.001,
+                 transport: str = "memory", vectorized: bool = False, seed: int = None, router_ids=None):
+        if transport not in ("memory", "loopback"):
+            raise DVRPError(f"Unknown transport {transport}")
+        self.servers = servers
+        self.links = links
+        self.interval = interval
+        self.latency = latency
+        self.transport = transport
+        self.random = random.Random(seed)
+        self.routers = {}
+        self.crashed = set()
+
+        self.now = 0.0
+        self._events = []
+        self._sequence = itertools.count()
+        self._pending_flush = set()
+        # Router id -> virtual time its timer wheel is next woken up at
+        self._armed = {}
+        self.messages = 0
+        self.bytes = 0
+        self.route_changes = 0
+        self.last_change = 0.0
+
+        TCPServer.register_commands()
+        adjacency = {server_id: [] for server_id in servers}
+        for (id1, id2), cost in links.items():
+            adjacency[id1].append({"id1": id1, "id2": id2, "cost": cost})
+            adjacency[id2].append({"id1": id2, "id2": id1, "cost": cost})
+
+        server_list = list(servers.values())
+        with contextlib.redirect_stdout(_DISCARD):
+            for server_id, server in servers.items():
+                # Drawn for every server, so a router gets the same seed in any subset
+                router_seed = self.random.random()
+                if router_ids is not None and server_id not in router_ids:
+                    continue
+                router = SimulatedRouter(
+                    self, server_id, server["ip"], server["port"], interval,
+                    vectorized=vectorized, listen=transport == "loopback",
+                )
+                router.random = random.Random(router_seed)
+                if transport == "memory":
+                    router.timers = TimerWheel(clock=self._clock)
+                router.add_connections(server_list, adjacency[server_id])
+                router.create_routing_table(server_list, adjacency[server_id])
+                self.routers[server_id] = router
+
+    def _clock(self):
+        return self.now
+
+    def record_route_changes(self, count: int):
+        self.route_changes += count
+        self.last_change = self.now if self.transport == "memory" else time.perf_counter()
+
+    def schedule(self, delay: float, callback, *args):
+        heapq.heappush(self._events, (self.now + delay, next(self._sequence), callback, args))
+
+    def transmit(self, router_id: int, message):
+        self.messages += 1
+        self.bytes += len(message)
+        self.schedule(self.latency, self._deliver, router_id, message)
+
+    def _deliver(self, router_id: int, message):
+        if router_id in self.crashed:
+            return
+        self.routers[router_id].handle_frame(message)
+        # Like one mainloop wakeup, frames arriving together go out as one triggered update
+        if router_id not in self._pending_flush:
+            self._pending_flush.add(router_id)
+            self.schedule(0.0, self._flush, router_id)
+
+    def _flush(self, router_id: int):
+        self._pending_flush.discard(router_id)
+        if router_id not in self.crashed:
+            self.routers[router_id].send_triggered_update()
+            # Handling the frames may have started timers, e.g. hold-downs
+            self._arm(router_id)
+
+    def _arm(self, router_id: int):
+        # Wakes the router when its earliest timer is due, unless a wakeup is already due earlier
+        timeout = self.routers[router_id].timers.timeout()
+        if timeout is not None and self.now + timeout < self._armed.get(router_id, float("inf")):
+            self._armed[router_id] = self.now + timeout
+            self.schedule(timeout, self._run_timers, router_id)
+
+    def _run_timers(self, router_id: int):
+        if router_id in self.crashed:
+            return
+        if self._armed.get(router_id, float("inf")) <= self.now:
+            del self._armed[router_id]
+        router = self.routers[router_id]
+        router.timers.advance()
+        router.send_triggered_update()
+        self._arm(router_id)
+
+    def set_link_cost(self, id1: int, id2: int, cost: int):
+        """
+        Changes a link cost with the update command on both ends, like an operator would.
+        """
+        self.links[(min(id1, id2), max(id1, id2))] = cost
+        self.execute(id1, f"update {id1} {id2} {cost}")
+        self.execute(id2, f"update {id2} {id1} {cost}")
+
+    def execute(self, router_id: int, command_string: str):
+        """
+        Runs a router command (e.g. "update 1 2 10", "crash") at the current simulated time.
+        """
+        router = self.routers[router_id]
+        with contextlib.redirect_stdout(_DISCARD):
+            router.execute_command(command_string)
+            router.send_triggered_update()
+        if command_string.split()[0].lower() == "crash":
+            # A crashed router stops sending and receiving altogether
+            self.crashed.add(router_id)
+        else:
+            self._arm(router_id)
+
+    def start(self):
+        """
+        Connects every router to its neighbors and starts their timers.
+        """
+        for router_id, router in self.routers.items():
+            MemoryEngine(self, router)
+            router.connect_neighbors()
+            router.start_timers()
+            self._arm(router_id)
+
+    def run(self, max_time: float = 600.0, quiet_intervals: int = 3):
+        """
+        Advances the virtual clock until no route has changed for quiet_intervals
+        intervals, or max_time simulated seconds have passed.
+
+        Returns:
+            dict: Convergence statistics for the run.
+        """
+        start, wall_start = self.now, time.perf_counter()
+        messages, sent_bytes, route_changes = self.messages, self.bytes, self.route_changes
+        self.last_change = start
+        events = 0
+        converged = False
+
+        with contextlib.redirect_stdout(_DISCARD):
+            while self._events:
+                at, _, callback, args = self._events[0]
+                if at - self.last_change > quiet_intervals * self.interval:
+                    converged = True
+                    break
+                if at - start > max_time:
+                    break
+                heapq.heappop(self._events)
+                self.now = at
+                callback(*args)
+                events += 1
+
+        convergence_time = self.last_change - start
+        return {
+            "transport": "memory",
+            "routers": len(self.routers),
+            "links": len(self.links),
+            "converged": converged,
+            "convergence_time": convergence_time,
+            "rounds": convergence_time / self.interval,
+            "messages": self.messages - messages,
+            "bytes": self.bytes - sent_bytes,
+            "route_changes": self.route_changes - route_changes,
+            "events": events,
+            "wall_time": time.perf_counter() - wall_start,
+        }
+
+    def run_loopback(self, max_time: float = 60.0, quiet_intervals: int = 3):
+        """
+        Runs every router on its real topology port, all on one asyncio event loop.
+
+        Returns:
+            dict: Convergence statistics for the run, in wall clock seconds.
+        """
+        with contextlib.redirect_stdout(_DISCARD):
+            return asyncio.run(self._run_loopback(max_time, quiet_intervals))
+
+    async def _run_loopback(self, max_time: float, quiet_intervals: int):
+        engines = [AsyncEngine(router, read_stdin=False) for router in self.routers.values()]
+        start = self.last_change = time.perf_counter()
+        converged = False
+
+        tasks = [asyncio.create_task(engine.run()) for engine in engines]
+        while time.perf_counter() - start < max_time:
+            await asyncio.sleep(self.interval / 10)
+            if time.perf_counter() - self.last_change > quiet_intervals * self.interval:
+                converged = True
+                break
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for router in self.routers.values():
+            router.socket.close()
+
+        convergence_time = self.last_change - start
+        return {
+            "transport": "loopback",
+            "routers": len(self.routers),
+            "links": len(self.links),
+            "converged": converged,
+            "convergence_time": convergence_time,
+            "rounds": convergence_time / self.interval,
+            "route_changes": self.route_changes,
+            "wall_time": time.perf_counter() - start,
+        }
+
+    def verify(self):
+        """
+        Compares the routing table of every router run here with Dijkstra over the live topology.
+
+        Returns:
+            list: (router_id, dest_id, expected_cost, actual_cost) for every mismatch.
+        """
+        live_servers = {i: s for i, s in self.servers.items() if i not in self.crashed}
+        live_links = {
+            (id1, id2): cost for (id1, id2), cost in self.links.items()
+            if id1 in live_servers and id2 in live_servers and cost < INFINITY
+        }
+        mismatches = []
+        for router_id in live_servers:
+            if router_id not in self.routers:
+                continue
+            expected = shortest_paths(live_servers, live_links, router_id)
+            for dest_id, route in self.routers[router_id].routing_table.items():
+                if dest_id in self.crashed:
+                    continue
+                cost = min(expected.get(dest_id, INFINITY), INFINITY)
+                if route["cost"] != cost:
+                    mismatches.append((router_id, dest_id, cost, route["cost"]))
+        return mismatches
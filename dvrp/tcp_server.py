@@ -1,8 +1,9 @@
-import struct
 from select import select
+import random
 import socket
 import sys
 import time
+from time import perf_counter_ns
 from commands.decorators import register_command
 from commands.update_command import UpdateCommand
 from commands.step_command import StepCommand
@@ -10,37 +11,130 @@ from commands.packets_command import PacketsCommand
 from commands.display_command import DisplayCommand
 from commands.disable_command import DisableCommand
 from commands.crash_command import CrashCommand
+from commands.stats_command import StatsCommand
+from commands.profile_command import ProfileCommand
 
 from commands.command_registry import command_registry
+from dvrp.connection_manager import ConnectionManager
+from dvrp.distance_vector import DistanceVectorStore
+from dvrp.dvrp_error import MalformedPacketError
+from dvrp.flap_damping import FlapDamping
+from dvrp.vectorized_distance_vector import VectorizedDistanceVectorStore
+from dvrp.forwarding_table import ForwardingTable
+from dvrp.frame_buffer import FrameBuffer
+from dvrp.log import get_logger
+from dvrp.metrics import Metrics
 from dvrp.neighbor import Neighbor
+from dvrp.neighbor_registry import NeighborRegistry
+from dvrp.profiler import Profiler
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, WIRE_VERSION, RoutingUpdateEncoder, decode_entries, decode_routing_update
+from dvrp.timer_wheel import TimerWheel
+
+
+update_log = get_logger("updates")
+connection_log = get_logger("connections")
+routing_log = get_logger("routing")
 
 
 class TCPServer:
     __instance = None
+    RECV_SIZE = 64 * 1024
 
-    def __init__(self, id: int, ip: str, port: int, interval: int):
+    def __init__(self, id: int, ip: str, port: int, interval: int, vectorized: bool = False, listen: bool = True):
         self.interval = interval
         self.id = id
         self.ip = ip
         self.port = port
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.bind((ip, port))
-        self.socket.listen()
         # Maintain a list of incoming connections, starting with the server socket
-        self.connections = [self.socket]
-        self.neighbors = []
-        self.routing_table = {}
-        self.last_executed = time.time()
+        self.socket = None
+        self.connections = []
+        if listen:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.socket.bind((ip, port))
+            self.socket.listen()
+            self.connections.append(self.socket)
+        # Per-connection receive buffers and peer hosts for accepted connections
+        self.frame_buffers = {}
+        self.peer_addresses = {}
+        self.neighbors = NeighborRegistry()
+        self.routing_table = RoutingTable()
+        self.encoder = RoutingUpdateEncoder(ip, port)
+        # Latest vector advertised by each neighbor, used to recompute routes on any change
+        store_cls = VectorizedDistanceVectorStore if vectorized else DistanceVectorStore
+        self.distance_vectors = store_cls(id, self.routing_table, on_hold_down=self.start_hold_down)
+        # Advertise routes learned from a neighbor back to it with an infinite cost
+        self.poisoned_reverse = True
+        # Highest wire version sent to neighbors that advertise it, 1 to only send version 1
+        self.wire_version = WIRE_VERSION
+        # Destination id -> (packed IPv4, port) carried by compact updates, which send each address once
+        self.destination_addresses = {}
+        # Addresses are resent to datagram neighbors every this many periodic updates, in case
+        # the datagram that carried them was lost
+        self.address_refresh = 10
+        self._periodic_updates = 0
+        # Destinations whose route changed since the last advertisement
+        self.dirty_routes = set()
+        # Snapshot of the routes for readers on other threads (the route query service),
+        # republished on every route change once publish_routes has been called
+        self.forwarding_table = None
         self.num_packets = 0
-        print(f"Connection started, listening on {self.ip}:{self.port}")
+        # Traffic, error and latency figures shown by the stats command
+        self.metrics = Metrics(id)
+        self.metrics.gauge("routes_reachable", "Destinations with a finite cost, this router included.",
+                           lambda: sum(1 for cost in list(self.routing_table.costs) if cost < INFINITY))
+        self.metrics.gauge("neighbors_up", "Neighbors with an open connection.",
+                           lambda: sum(1 for neighbor in self.neighbors if not neighbor.is_down))
+        self.metrics.gauge("last_route_change_timestamp_seconds", "Unix time of the last route change.",
+                           lambda: self.last_route_change)
+        self.last_route_change = 0.0
+        # Started and dumped by the profile command, or from startup with --profile
+        self.profiler = Profiler(f"profile-{id}")
+        # CaptureWriter logging every received frame for replay, None while not capturing
+        self.capture = None
+        # Periodic updates, neighbor liveness and route hold-downs, advanced by the running engine
+        self.timers = TimerWheel()
+        self.random = random.Random()
+        # Periodic updates go out every interval, shortened by up to this fraction at random
+        # so that routers started together do not keep sending in lockstep
+        self.update_jitter = 0.2
+        # A neighbor not heard from for this long is considered down
+        self.dead_interval = 3 * interval
+        # Lost routes stay unreachable this long unless a route as good comes up, 0 disables hold-downs
+        self.hold_down_time = 2 * interval
+        # Learned destinations still unreachable this long after their hold-down are removed
+        self.gc_time = 4 * interval
+        # Ids of the servers in the topology file, which are never garbage collected
+        self.topology_ids = set()
+        self._liveness_timers = {}
+        self._hold_down_timers = {}
+        self._gc_timers = {}
+        # Triggered updates go out at most once per gap, changes in between are coalesced
+        self.triggered_update_gap = interval / 10
+        self._last_triggered_update = float("-inf")
+        self._paced_update = None
+        # Flapping neighbors are ignored and flapping routes left out of triggered updates
+        # until their penalty decays, None disables either
+        self.neighbor_damping = FlapDamping(half_life=5 * interval)
+        self.route_damping = FlapDamping(half_life=5 * interval)
+        # Neighbors heard from since their last flap, so one outage counts as one flap
+        self._neighbors_up = set()
+        # Set when an alternative engine (e.g. AsyncEngine) drives this server instead of mainloop
+        self.engine = None
+        # Opens outbound connections for mainloop without blocking it
+        self.connection_manager = ConnectionManager(on_connected=self.connection_opened)
+        if listen:
+            print(f"Connection started, listening on {self.ip}:{self.port}")
 
     @staticmethod
-    def getTCPServer(server_info: dict, interval: int, servers: list, neighbors: list):
+    def getTCPServer(server_info: dict, interval: int, servers: list, neighbors: list, vectorized: bool = False,
+                     listen: bool = True):
         if TCPServer.__instance is None:
             id = server_info["id"]
             ip = server_info["ip"]
             port = server_info["port"]
-            TCPServer.__instance = TCPServer(id, ip, port, interval)
+            TCPServer.__instance = TCPServer(id, ip, port, interval, vectorized, listen)
             TCPServer.__instance.add_connections(servers, neighbors)
             TCPServer.__instance.create_routing_table(servers, neighbors)
             TCPServer.register_commands()
@@ -49,36 +143,28 @@ class TCPServer:
         return TCPServer.__instance
 
     def create_routing_table(self, servers: list, neighbors: list):
-        infinity = 65535
+        infinity = INFINITY
 
         # Initialize the routing table with all routers and set the cost to infinity
-        self.routing_table[self.id] = {
-            "ip": self.ip,
-            "port": self.port,
-            "cost": 0,
-            "next_hop": self.id
-        }
+        self.routing_table.add(self.id, self.ip, self.port, 0, self.id)
+        self.topology_ids = {server["id"] for server in servers} | {self.id}
         for server in servers:
             if server["id"] != self.id:
-                self.routing_table[server['id']] = {
-                    "ip": server['ip'],
-                    "port": server['port'],
-                    "cost": infinity,
-                    "next_hop": None
-                }
+                self.routing_table.add(server['id'], server['ip'], server['port'], infinity)
 
         # Update the routing table with the directly connected neighbors
+        servers_by_id = {server['id']: server for server in servers}
         for neighbor in neighbors:
-            neighbor_info = next(
-                (r for r in servers if r["id"] == neighbor['id2']), None
-            )
+            neighbor_info = servers_by_id.get(neighbor['id2'])
             if neighbor_info:
-                self.routing_table[neighbor['id2']] = {
-                    "ip": neighbor_info['ip'],
-                    "port": neighbor_info['port'],
-                    "cost": neighbor['cost'],
-                    "next_hop": neighbor['id2']
-                }
+                self.routing_table.add(
+                    neighbor['id2'], neighbor_info['ip'], neighbor_info['port'], neighbor['cost'], neighbor['id2']
+                )
+                self.distance_vectors.add_neighbor(neighbor['id2'], neighbor['cost'])
+        self.encoder.reserve(len(self.routing_table))
+        self.encoder.mark_dirty()
+        if self.forwarding_table is not None:
+            self.publish_routes()
 
         # Print the routing table
         print("Routing table for router", self.id)
@@ -90,65 +176,194 @@ class TCPServer:
             )
 
     def send_routing_update(self):
-        # Prepare the routing update packet
-        num_update_fields = len(self.routing_table)
-        packet_format = f"!H H 4s {num_update_fields * 12}s"
-        server_ip = socket.inet_aton(self.ip)
-        server_port = self.port
-
-        # Fill in the routing table information
-        routing_data = b""
-        for dest, info in self.routing_table.items():
-            dest_ip = socket.inet_aton(info['ip'])
-            dest_port = info['port']
-            dest_id = dest
-            cost = info['cost']
-            routing_data += struct.pack("!4s H 2s H H", dest_ip, dest_port, b'\x00\x00', dest_id, int(cost))
-
-        # Create the binary message
-        message = struct.pack(
-            packet_format, num_update_fields, server_port, server_ip, routing_data
-        )
-        # Send the message to each neighbor
+        # A full table covers every pending change
+        self.dirty_routes.clear()
+        self._periodic_updates += 1
+        refresh_addresses = self._periodic_updates % self.address_refresh == 0
+
+        # The encoder keeps the last packets until the routing table changes
         for neighbor in self.neighbors:
             if not neighbor.is_down:
-                neighbor.send(message)
-
-    def decode_routing_update_packet(self, packet):
-        # Unpack the packet header
-        num_update_fields, server_port, server_ip = struct.unpack("!H H 4s", packet[:8])
-        packet = packet[8:]
-
-        # Convert the server IP address to a string
-        server_ip = socket.inet_ntoa(server_ip)
-
-        # Iterate over the routing table entries and unpack each one
-        routing_table = []
-        for i in range(num_update_fields):
-            dest_ip, dest_port, _, dest_id, cost = struct.unpack("!4s H 2s H H", packet[:12])
-            packet = packet[12:]
+                if refresh_addresses and neighbor.max_frame_size is not None:
+                    neighbor.addresses_sent = 0
+                start = perf_counter_ns()
+                message = self.encode_full_table(neighbor)
+                self.metrics.observe("encode", perf_counter_ns() - start)
+                # Supersedes anything still waiting to go out to this neighbor
+                self.send_to(neighbor, message, full_table=True)
+
+    def encode_full_table(self, neighbor):
+        """
+        Returns the full table update for a neighbor, in the wire version negotiated with it.
+        """
+        poison_next_hop = neighbor.id if self.poisoned_reverse else None
+        if neighbor.wire_version >= 2:
+            message = self._compact_message(self.encoder.encode_compact(self.routing_table), neighbor)
+            if message is not None:
+                return message
+        return self.encoder.encode(self.routing_table, poison_next_hop)
+
+    def _compact_message(self, update, neighbor):
+        # None if the packet does not fit the neighbor's datagrams, version 1 is split instead
+        message = update.for_neighbor(neighbor.id if self.poisoned_reverse else None, neighbor.addresses_sent)
+        max_frame_size = neighbor.max_frame_size
+        if max_frame_size is not None and len(message) > max_frame_size:
+            return None
+        neighbor.addresses_sent = self.encoder.num_addresses
+        return message
+
+    def send_triggered_update(self):
+        # Advertise only the routes that changed since the last update
+        if not self.dirty_routes:
+            return
+        now = self.timers.clock()
+        wait = self._last_triggered_update + self.triggered_update_gap - now
+        if wait > 0:
+            if self._paced_update is None:
+                self._paced_update = self.timers.schedule(wait, self._send_paced_update)
+            return
 
-            # Convert the destination IP address to a string
-            dest_ip = socket.inet_ntoa(dest_ip)
+        dest_ids, self.dirty_routes = self.dirty_routes, set()
+        if self.route_damping is not None and self.route_damping.suppressed:
+            # Suppressed routes wait for the next periodic update
+            is_suppressed = self.route_damping.is_suppressed
+            dest_ids = [dest_id for dest_id in dest_ids if not is_suppressed(dest_id, now)]
+            if not dest_ids:
+                return
+        dest_ids = sorted(dest_ids)
+        neighbors = [neighbor for neighbor in self.neighbors if not neighbor.is_down]
+        start = perf_counter_ns()
+        # Encoded once per wire version in use
+        update = compact_update = None
+        if any(neighbor.wire_version < 2 for neighbor in neighbors):
+            update = self.encoder.encode_delta(self.routing_table, dest_ids)
+        if any(neighbor.wire_version >= 2 for neighbor in neighbors):
+            compact_update = self.encoder.encode_compact(self.routing_table, dest_ids)
+        self.metrics.observe("encode", perf_counter_ns() - start)
+        self._last_triggered_update = now
 
-            # Add the routing table entry to the dictionary
-            routing_table.append({'id': dest_id, 'ip': dest_ip, 'port': dest_port, 'cost': cost})
+        for neighbor in neighbors:
+            message = None
+            if neighbor.wire_version >= 2:
+                message = self._compact_message(compact_update, neighbor)
+            if message is None:
+                if update is None:
+                    update = self.encoder.encode_delta(self.routing_table, dest_ids)
+                message = update.for_neighbor(neighbor.id if self.poisoned_reverse else None)
+            self.send_to(neighbor, message)
+
+    def send_to(self, neighbor, message, full_table: bool = False):
+        # Every routing update frame goes out through here, so it is counted once
+        neighbor.send(message, full_table)
+        self.metrics.inc_neighbor("packets_sent", neighbor.id)
+        self.metrics.inc_neighbor("bytes_sent", neighbor.id, len(message))
 
-        # Return a tuple containing the server IP, server port, and routing table
-        return server_ip, server_port, routing_table
+    def decode_routing_update_packet(self, packet):
+        # Returns the server IP, server port and a lazy view of (dest_id, cost, ip, port) entries
+        return decode_routing_update(packet, self.destination_addresses)
 
     def add_connections(self, servers: list, neighbors: list):
-        neighbor_servers = {n['id2']: {'cost': n['cost'], **(next((s for s in servers if s['id'] == n['id2']), None))}
-                            for n in neighbors}
+        servers_by_id = {s['id']: s for s in servers}
+        neighbor_servers = {n['id2']: {'cost': n['cost'], **servers_by_id[n['id2']]} for n in neighbors}
 
         for server_id, details in neighbor_servers.items():
             ip = details["ip"]
             port = details["port"]
             cost = details["cost"]
             new_neighbor = Neighbor(server_id, ip, port, cost)
-            self.neighbors.append(new_neighbor)
-            new_neighbor.connect()
+            self.neighbors.add(new_neighbor)
+
+    def connect_neighbor(self, neighbor):
+        # Connections are opened in the background by the running engine, or by the
+        # connection manager when mainloop drives the server
+        if self.engine is not None:
+            self.engine.connect(neighbor)
+        else:
+            self.connection_manager.request(neighbor)
 
+    def connect_neighbors(self):
+        for neighbor in self.neighbors:
+            if not neighbor.disabled:
+                self.connect_neighbor(neighbor)
+
+    def adopt_connection(self, neighbor, connection, dialed: bool):
+        """
+        Makes a connection the single full-duplex connection of a neighbor.
+
+        When both ends dialed at the same time, each side keeps the connection dialed by
+        the lower server id and closes the other one, so both agree without negotiating.
+        The first frame on an adopted connection is a full table update: its header
+        identifies this server to the peer, acting as the hello.
+
+        Args:
+            neighbor (Neighbor): The neighbor at the other end.
+            connection: A connected socket, or a writer (e.g. StreamWriter) for engines.
+            dialed (bool): True if this server opened the connection.
+
+        Returns:
+            bool: False if the connection was refused; the caller then closes it.
+        """
+        current = neighbor.connection or neighbor.writer
+        if current is connection:
+            return True
+        if neighbor.disabled:
+            return False
+        if current is not None:
+            if dialed != (self.id < neighbor.id):
+                return False
+            neighbor.close_connection()
+
+        if isinstance(connection, socket.socket):
+            neighbor.attach_socket(connection)
+        else:
+            neighbor.attach_writer(connection)
+        self.neighbors.bind_connection(connection, neighbor)
+        # Version 1, as the peer has not advertised anything on this connection yet
+        self.send_to(neighbor, self.encode_full_table(neighbor), full_table=True)
+        return True
+
+    def connection_opened(self, neighbor, sock):
+        # An outbound connect finished, the socket is read by mainloop like accepted ones
+        if not self.adopt_connection(neighbor, sock, dialed=True):
+            sock.close()
+            return
+        self.connections.append(sock)
+        self.frame_buffers[sock] = FrameBuffer()
+        self.peer_addresses[sock] = neighbor.ip
+
+    def connection_lost(self, connection):
+        """
+        Forgets a closed connection. If it was a neighbor's connection, the neighbor is
+        down until one side reconnects.
+        """
+        neighbor = self.neighbors.unbind_connection(connection)
+        if neighbor is not None and connection in (neighbor.connection, neighbor.writer):
+            neighbor.close_connection()
+            self.neighbor_flapped(neighbor)
+            self.metrics.inc_neighbor("reconnects", neighbor.id)
+            self.connect_neighbor(neighbor)
+        else:
+            connection.close()
+
+    def drop_connection(self, sock):
+        # Removes an accepted or dialed socket from mainloop and closes it
+        self.connections.remove(sock)
+        self.frame_buffers.pop(sock, None)
+        self.peer_addresses.pop(sock, None)
+        self.connection_lost(sock)
+
+    def stream_error(self, error):
+        # A frame header that cannot be trusted leaves no way to find the next frame
+        self.metrics.inc("decode_errors")
+        connection_log.warning("Closing a connection that sent a malformed frame: %s", error)
+
+    def _forget_closed_connections(self):
+        # Sockets closed through their Neighbor (timeouts, commands, send errors) leave mainloop here
+        for sock in [c for c in self.connections if c.fileno() == -1]:
+            self.connections.remove(sock)
+            self.frame_buffers.pop(sock, None)
+            self.peer_addresses.pop(sock, None)
+            self.neighbors.unbind_connection(sock)
 
     @staticmethod
     def register_commands():
@@ -158,6 +373,8 @@ class TCPServer:
         register_command("display")(DisplayCommand)
         register_command("disable")(DisableCommand)
         register_command("crash")(CrashCommand)
+        register_command("stats")(StatsCommand)
+        register_command("profile")(ProfileCommand)
 
     def get_command(self, command_string):
         command_parts = command_string.split()
@@ -171,155 +388,351 @@ class TCPServer:
 
         return command_cls(self, *command_args)
 
-    def periodic_update(self):
+    def execute_command(self, command_string):
+        if not command_string:
+            return
+        if self.capture is not None:
+            self.capture.record_command(self.timers.clock(), command_string)
+        try:
+            command = self.get_command(command_string)
+            command.execute()
+        except ValueError as e:
+            print(e)
+
+    def start_timers(self):
+        """
+        Schedules the first periodic update and starts watching every neighbor's liveness.
+        """
+        self.timers.schedule(self._update_delay(), self.periodic_update)
         for neighbor in self.neighbors:
-            if not neighbor.is_down:
-                neighbor.increment_missed_updates()
-                if neighbor.missed_updates >= 3:
-                    neighbor.close_connection()
+            self._watch_liveness(neighbor)
+        if self.capture is not None:
+            self.timers.schedule(self.capture.flush_interval, self._flush_capture)
+
+    def _flush_capture(self):
+        # Frames buffered on a quiet link would otherwise wait for the next one to be written
+        self.capture.flush(self.timers.clock())
+        self.timers.schedule(self.capture.flush_interval, self._flush_capture)
+
+    def _update_delay(self):
+        return self.interval * (1 - self.update_jitter * self.random.random())
+
+    def periodic_update(self):
         self.send_routing_update()
+        self.timers.schedule(self._update_delay(), self.periodic_update)
 
-    def process_routing_update(self, sender_ip, sender_port, sender_routing_table):
-        # Find the sender's ID and cost
-        sender_id = None
-        sender_cost = None
-        for neighbor in self.neighbors:
-            if neighbor.ip == sender_ip and neighbor.port == sender_port:
-                sender_id = neighbor.id
-                sender_cost = neighbor.cost
-                break
+    def _watch_liveness(self, neighbor):
+        if neighbor.id not in self._liveness_timers:
+            self._liveness_timers[neighbor.id] = self.timers.schedule(
+                self.dead_interval, self._check_liveness, neighbor
+            )
 
-        if sender_id is None:
-            print(f"Could not find sender {sender_ip}:{sender_port} in neighbors")
+    def _check_liveness(self, neighbor):
+        # Hearing from a neighbor only records the time, the timer catches up here
+        if neighbor.last_heard is not None:
+            remaining = neighbor.last_heard + self.dead_interval - self.timers.clock()
+            if remaining > 0:
+                self._liveness_timers[neighbor.id] = self.timers.schedule(remaining, self._check_liveness, neighbor)
+                return
+        # Watched again once the neighbor is heard from
+        del self._liveness_timers[neighbor.id]
+        if neighbor.disabled:
+            return
+        self.metrics.inc_neighbor("timeouts", neighbor.id)
+        if not neighbor.is_down:
+            neighbor.close_connection()
+            self.metrics.inc_neighbor("reconnects", neighbor.id)
+            self.connect_neighbor(neighbor)
+        self.neighbor_flapped(neighbor)
+        # Routes through the silent neighbor are recomputed from the other vectors
+        self.routes_changed(self.distance_vectors.remove_neighbor(neighbor.id))
+
+    def neighbor_flapped(self, neighbor, force: bool = False):
+        """
+        Penalizes a neighbor that went down, unless it has not been heard from since its
+        last flap, or whose link cost changed (force). Once suppressed, its routes are
+        withdrawn and its updates ignored until the penalty decays.
+        """
+        if self.neighbor_damping is None or not (force or neighbor.id in self._neighbors_up):
             return
+        self._neighbors_up.discard(neighbor.id)
+        now = self.timers.clock()
+        was_suppressed = self.neighbor_damping.is_suppressed(neighbor.id, now)
+        if self.neighbor_damping.flap(neighbor.id, now) and not was_suppressed:
+            routing_log.warning("Neighbor %d is flapping, ignoring it for now", neighbor.id)
+            self.routes_changed(self.distance_vectors.remove_neighbor(neighbor.id))
+
+    def _send_paced_update(self):
+        self._paced_update = None
+        self.send_triggered_update()
+
+    def start_hold_down(self, dest_id):
+        """
+        Called by the distance vector store when a route is lost and only worse ones are left.
+
+        Returns:
+            bool: Whether the destination is held down, until the hold-down timer expires.
+        """
+        if not self.hold_down_time:
+            return False
+        timer = self._hold_down_timers.get(dest_id)
+        if timer is not None:
+            timer.cancel()
+        self._hold_down_timers[dest_id] = self.timers.schedule(self.hold_down_time, self._end_hold_down, dest_id)
+        return True
+
+    def _end_hold_down(self, dest_id):
+        del self._hold_down_timers[dest_id]
+        self.routes_changed(self.distance_vectors.release(dest_id))
+        if (dest_id not in self.topology_ids and self.routing_table[dest_id]["cost"] == INFINITY
+                and dest_id not in self._gc_timers):
+            self._gc_timers[dest_id] = self.timers.schedule(self.gc_time, self._collect_route, dest_id)
+
+    def _collect_route(self, dest_id):
+        del self._gc_timers[dest_id]
+        if self.routing_table[dest_id]["cost"] < INFINITY or dest_id in self._hold_down_timers:
+            return
+        # Neighbors have been told it is unreachable for a whole hold-down by now
+        self.routing_table.remove(dest_id)
+        self.distance_vectors.forget(dest_id)
+        self.dirty_routes.discard(dest_id)
+        self.encoder.mark_dirty()
+        if self.forwarding_table is not None:
+            self.publish_routes()
+        if self.route_damping is not None:
+            self.route_damping.forget(dest_id)
 
-        for neighbor in self.neighbors:
-            if neighbor.id == sender_id:
-                neighbor.reset_missed_updates()
-                if neighbor.is_down:
-                    neighbor.connect()
-                break
+    def process_routing_update(self, sender_ip, sender_port, sender_routing_table):
+        # Find the sender by the address in the packet header
+        neighbor = self.neighbors.by_address(sender_ip, sender_port)
+        if neighbor is None:
+            update_log.warning("Could not find sender %s:%d in neighbors", sender_ip, sender_port)
+            return
+        self.receive_routing_update(neighbor, sender_routing_table)
+
+    def receive_routing_update(self, neighbor, sender_routing_table):
+        # Updates over a disabled link are ignored until the server restarts
+        if neighbor.disabled:
+            return
+        neighbor.last_heard = self.timers.clock()
+        self._watch_liveness(neighbor)
+        if neighbor.is_down:
+            self.connect_neighbor(neighbor)
+        if self.neighbor_damping is not None and self.neighbor_damping.is_suppressed(neighbor.id, neighbor.last_heard):
+            return
+        self._neighbors_up.add(neighbor.id)
 
         # Update the routing table using the received routing table
-        self.update_routing_table(sender_id, sender_cost, sender_routing_table)
-        print(f"RECEIVED A MESSAGE FROM SERVER {sender_id}")
+        start = perf_counter_ns()
+        self.update_routing_table(neighbor.id, neighbor.cost, sender_routing_table)
+        self.metrics.observe("update_routing_table", perf_counter_ns() - start)
+        update_log.info("RECEIVED A MESSAGE FROM SERVER %d", neighbor.id)
 
     def update_routing_table(self, sender_id, sender_cost, routing_update):
         # Check if the sender is a direct neighbor
-        if sender_id not in self.routing_table:
-            print(f"Sender {sender_id} not in the routing table")
+        if sender_id not in self.distance_vectors:
+            update_log.warning("Sender %d not in the routing table", sender_id)
             return
 
-        # Update the routing table for the sender
-        self.routing_table[sender_id]['cost'] = sender_cost
-        self.routing_table[sender_id]['next_hop'] = sender_id
-
-        # Apply the Bellman-Ford algorithm
-        for entry in routing_update:
-            dest_id = entry['id']
-            dest_cost = entry['cost']
-
-            if dest_id == self.id:
-                continue
-
-            if dest_id not in self.routing_table:
-                self.routing_table[dest_id] = {
-                    'ip': entry['ip'],
-                    'port': entry['port'],
-                    'cost': sender_cost + dest_cost,
-                    'next_hop': sender_id
-                }
-            else:
-                new_cost = sender_cost + dest_cost
-                current_cost = self.routing_table[dest_id]['cost']
-
-                if new_cost < current_cost:
-                    self.routing_table[dest_id]['cost'] = new_cost
-                    self.routing_table[dest_id]['next_hop'] = sender_id
+        # A neighbor that was timed out is reachable at its link cost again
+        changed = self.distance_vectors.set_link_cost(sender_id, sender_cost)
+
+        # Store the sender's vector and recompute only the destinations it affects
+        changed |= self.distance_vectors.update_vector(sender_id, routing_update, self.learn_destination)
+        self.routes_changed(changed)
+
+    def routes_changed(self, dest_ids):
+        # Invalidate the cached full table and queue the routes for the next triggered update
+        if dest_ids:
+            self.encoder.mark_dirty()
+            self.dirty_routes |= dest_ids
+            self.metrics.inc("route_changes", len(dest_ids))
+            self.last_route_change = time.time()
+            if self.forwarding_table is not None:
+                self.publish_routes()
+            if self.route_damping is not None:
+                # A withdrawn route counts as a flap
+                now = self.timers.clock()
+                index_of, costs = self.routing_table.index_of, self.routing_table.costs
+                for dest_id in dest_ids:
+                    if costs[index_of(dest_id)] == INFINITY:
+                        self.route_damping.flap(dest_id, now)
+
+    def publish_routes(self):
+        """
+        Swaps in a new forwarding table snapshot of the routing table. The swap is a single
+        reference assignment, so readers on other threads need no lock.
+        """
+        self.forwarding_table = ForwardingTable.of(self.routing_table, self.forwarding_table)
+
+    def learn_destination(self, dest_id, dest_ip, dest_port):
+        """
+        Adds a destination advertised by a neighbor to the routing table.
+
+        Args:
+            dest_ip: The packed IPv4, or None for entries of compact updates, whose address
+                is looked up among those received so far.
+
+        Returns:
+            bool: False if the address of the destination is not known yet.
+        """
+        if dest_ip is None:
+            address = self.destination_addresses.get(dest_id)
+            if address is None:
+                return False
+            dest_ip, dest_port = address
+        # The packed IP goes straight into the table's address column
+        self.routing_table.add(dest_id, dest_ip, dest_port)
+        self.encoder.mark_dirty()
+        return True
 
     def update_link_cost(self, neighbor_id, cost):
-        for neighbor in self.neighbors:
-            if neighbor.id == neighbor_id:
-                neighbor.cost = cost
-                break
-
-        # Prepare the routing update packet
-        packet_format = f"!H H 4s 12s"
-        server_ip = socket.inet_aton(self.ip)
-        server_port = self.port
-
-        # Fill in the routing table information
-        routing_data = b""
-        dest_ip, dest_port, _ = self.routing_table[neighbor_id]
-        dest_ip = socket.inet_aton(dest_ip)
-        routing_data += struct.pack("!4s H 2s H H", dest_ip, dest_port, b'\x00\x00', neighbor_id, int(cost))
-
-        # Create the binary message
-        message = struct.pack(
-            packet_format, 1, server_port, server_ip, routing_data
-        )
-        # Send the message to each neighbor
-        for neighbor in self.neighbors:
-            if neighbor.id == neighbor_id:
-                if not neighbor.is_down:
-                    neighbor.send(message)
+        neighbor = self.neighbors.get(neighbor_id)
+        if neighbor is None:
+            print(f"Server {neighbor_id} is not a neighbor")
+            return
+        if not 1 <= cost <= INFINITY:
+            print(f"Link cost {cost} is out of range 1-{INFINITY}")
+            return
+        neighbor.cost = cost
+
+        self.neighbor_flapped(neighbor, force=True)
+        if self.neighbor_damping is None or not self.neighbor_damping.is_suppressed(neighbor_id, self.timers.clock()):
+            self.routes_changed(self.distance_vectors.set_link_cost(neighbor_id, cost))
+
+        # Prepare a single entry routing update packet for the changed link
+        route = dict(self.routing_table[neighbor_id], cost=cost)
+        message = self.encoder.encode_entries([(neighbor_id, route)], 1)
+
+        # Send the message to the neighbor on the other end of the link
+        if not neighbor.is_down:
+            self.send_to(neighbor, message)
+
+    def disable_link(self, neighbor_id):
+        neighbor = self.neighbors.get(neighbor_id)
+        if neighbor is None:
+            print(f"Server {neighbor_id} is not a neighbor")
+            return
+        neighbor.disabled = True
+        neighbor.close_connection()
+        # Routes through the disabled link are recomputed from the other vectors
+        self.routes_changed(self.distance_vectors.remove_neighbor(neighbor_id))
+
+    def handle_frame(self, frame, connection=None):
+        """
+        Processes a single complete routing update frame.
+
+        Args:
+            frame (bytes): The routing update packet.
+            connection: The connection the frame arrived on, if any. The first frame on
+                an accepted connection identifies the neighbor, which adopts it; later
+                frames skip the sender lookup by header address.
+        """
+        self.num_packets += 1
+        metrics = self.metrics
+        neighbor = self.neighbors.by_connection(connection) if connection is not None else None
+        if self.capture is not None:
+            self.capture.record(self.timers.clock(), 0 if neighbor is None else neighbor.id, frame)
+        try:
+            start = perf_counter_ns()
+            if neighbor is not None:
+                entries = decode_entries(frame, self.destination_addresses)
+            else:
+                sender_ip, sender_port, entries = self.decode_routing_update_packet(frame)
+            metrics.observe("decode", perf_counter_ns() - start)
+        except MalformedPacketError as e:
+            metrics.inc("decode_errors")
+            update_log.warning("%s", e)
+            return
+
+        if neighbor is None:
+            neighbor = self.neighbors.by_address(sender_ip, sender_port)
+            if neighbor is None:
+                update_log.warning("Could not find sender %s:%d in neighbors", sender_ip, sender_port)
+                return
+            if connection is not None and not self.adopt_connection(neighbor, connection, dialed=False):
+                # A duplicate connection, its frames are still valid updates
+                connection.close()
+        metrics.inc_neighbor("packets_received", neighbor.id)
+        metrics.inc_neighbor("bytes_received", neighbor.id, len(frame))
+        # Every frame with entries advertises the highest wire version its sender speaks
+        if entries.version is not None:
+            neighbor.wire_version = min(self.wire_version, entries.version)
+        self.receive_routing_update(neighbor, entries)
 
     def mainloop(self):
+        self.connect_neighbors()
+        self.start_timers()
         print("Listening...")
         # Prompt the user for input
-        print(">> ", end="")
+        print(">> ", end="", flush=True)
+        # Commands are read until stdin is closed
+        stdin = [sys.stdin]
         while True:
-            sys.stdout.flush()
-            # Calculate the remaining time until the next execution of the periodic_function
-            remaining_time = self.interval - (time.time() - self.last_executed)
-            # Ensure that the remaining time is non-negative
-            remaining_time = max(remaining_time, 0)
+            self._forget_closed_connections()
+            # Sleep until the next timer is due, or a connect is due or timing out
+            timeouts = [t for t in (self.timers.timeout(), self.connection_manager.timeout()) if t is not None]
+            remaining_time = min(timeouts) if timeouts else None
+
+            # Watch the sockets of neighbors with queued outbound frames for writability,
+            # and connecting sockets for the connect to complete
+            pending = {n.connection: n for n in self.neighbors if n.wants_write}
 
             # Use the remaining time as the timeout value for select
-            rlist, _, _ = select(self.connections +
-                                 [sys.stdin], [], [], remaining_time)
+            rlist, wlist, _ = select(self.connections + stdin,
+                                     list(pending) + self.connection_manager.sockets, [], remaining_time)
+            for w in wlist:
+                if w in pending:
+                    pending[w].flush()
+                else:
+                    self.connection_manager.on_writable(w)
+            self.connection_manager.poll()
+
             for r in rlist:
                 if r == self.socket:
                     # Accept the new connection and add it to the list of connections
                     conn, address = self.socket.accept()
+                    conn.setblocking(False)
                     self.connections.append(conn)
-                    # Print a message to indicate that a new connection has been established
-                    print(f"The connection to peer {address} is successfully established;")
+                    self.frame_buffers[conn] = FrameBuffer()
+                    self.peer_addresses[conn] = address[0]
+                    connection_log.info("The connection to peer %s is successfully established;", address)
                 elif r == sys.stdin:
-                    # Process the user's command
-                    command_string = sys.stdin.readline().strip()
-                    try:
-                        command = self.get_command(command_string)
-                        command.execute()
-                    except ValueError as e:
-                        print(e)
+                    # Process the user's command, then prompt for the next one
+                    line = sys.stdin.readline()
+                    if not line:
+                        stdin = []
+                        continue
+                    self.execute_command(line.strip())
+                    print(">> ", end="", flush=True)
+                elif r.fileno() == -1:
+                    # Closed earlier in this batch, e.g. a duplicate connection
+                    continue
                 else:
-                    # TODO this will need to be reworked probably to handle the different types of messages
-                    # Receive a message from the connection and display it
                     try:
-                        # Receive a message from the connection and display it
-                        data = r.recv(1024)
-                    except ConnectionResetError:
+                        data = r.recv(self.RECV_SIZE)
+                    except BlockingIOError:
+                        continue
+                    except OSError:
                         data = None
 
-                    host, port = r.getpeername()
                     if not data:
-                        print(r)
-                        # If the connection has been closed, remove it from the list of connections and print a message
-                        self.connections.remove(r)
-                        r.close()
-                        print(f"Peer {host} terminates the connection")
+                        # If the connection has been closed, remove it from the list of connections
+                        connection_log.info("Peer %s terminates the connection", self.peer_addresses.get(r))
+                        self.drop_connection(r)
                     else:
-                        # If a message has been received, process it
-                        self.num_packets += 1
-                        sender_ip, sender_port, sender_routing_table = self.decode_routing_update_packet(data)
-                        self.process_routing_update(sender_ip, sender_port, sender_routing_table)
-                        sender_id = -1
-
-                # Prompt the user for input
-                print(">> ", end="")
-
-            # Check if it's time to execute the periodic_function
-            if time.time() - self.last_executed >= self.interval:
-                self.periodic_update()
-                self.last_executed = time.time()
+                        # Buffer the stream and process every complete frame it now holds
+                        frame_buffer = self.frame_buffers[r]
+                        frame_buffer.feed(data)
+                        try:
+                            frames = frame_buffer.read_frames()
+                        except MalformedPacketError as e:
+                            self.stream_error(e)
+                            self.drop_connection(r)
+                            continue
+                        for frame in frames:
+                            self.handle_frame(frame, r)
+
+            self.timers.advance()
+            # Changes made while handling this batch of events go out as one delta update
+            self.send_triggered_update()
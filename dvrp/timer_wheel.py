@@ -0,0 +1,151 @@
+import math
+import time
+
+# Slack in tick arithmetic, so a deadline computed as ticks * tick is not rounded down a tick
+_EPSILON = 1e-6
+
+
+class Timer:
+    """
+    Handle of a scheduled callback, returned by TimerWheel.schedule.
+    """
+
+    __slots__ = ("wheel", "expires", "callback", "args", "active")
+
+    def __init__(self, wheel, expires: int, callback, args):
+        self.wheel = wheel
+        # Absolute tick the timer fires on
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.active = True
+
+    def cancel(self):
+        # The entry stays in its slot and is skipped when the slot comes up
+        if self.active:
+            self.active = False
+            self.wheel._active -= 1
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: levels of slots wheels, where a slot of level n spans
+    slots ** n ticks. A timer goes into the lowest level whose range covers its delay and
+    moves down a level each time the slot it sits in comes up, so scheduling and
+    cancelling are O(1) and advancing only touches the slots that are due, however many
+    timers are pending.
+
+    The wheel keeps no thread of its own: the engine sleeps for timeout() (e.g. as the
+    select timeout) and then calls advance(), which runs every callback that is due.
+    clock is injectable so the simulator can run the wheel on its virtual clock.
+    """
+
+    def __init__(self, tick: float = 0.05, slots: int = 64, levels: int = 4, clock=time.monotonic):
+        self.tick = tick
+        self.slots = slots
+        self.clock = clock
+        self._wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        # Entries per level, cancelled ones included, so timeout() knows if a cascade is pending
+        self._entries = [0] * levels
+        self._active = 0
+        # Next tick to process
+        self._next = self._ticks(clock()) + 1
+
+    def __len__(self):
+        return self._active
+
+    def _ticks(self, now: float):
+        return int(now / self.tick + _EPSILON)
+
+    def schedule(self, delay: float, callback, *args):
+        """
+        Runs callback(*args) from advance() once delay seconds have passed, rounded up
+        to the next tick.
+
+        Returns:
+            Timer: The handle to cancel the timer with.
+        """
+        expires = max(math.ceil((self.clock() + delay) / self.tick - _EPSILON), self._next)
+        timer = Timer(self, expires, callback, args)
+        self._place(timer)
+        self._active += 1
+        return timer
+
+    def _place(self, timer):
+        slots = self.slots
+        delta = timer.expires - self._next
+        level, span = 0, slots
+        while delta >= span and level < len(self._wheels) - 1:
+            level += 1
+            span *= slots
+        self._wheels[level][timer.expires // (span // slots) % slots].append(timer)
+        self._entries[level] += 1
+
+    def _cascade(self, level: int, slot: int):
+        timers = self._wheels[level][slot]
+        if timers:
+            self._wheels[level][slot] = []
+            self._entries[level] -= len(timers)
+            for timer in timers:
+                if timer.active:
+                    self._place(timer)
+
+    def timeout(self):
+        """
+        Returns:
+            float: Seconds until advance() next has work, None if no timer is pending.
+        """
+        if not self._active:
+            return None
+        slots, base = self.slots, self._next
+        due = None
+        if self._entries[0]:
+            wheel = self._wheels[0]
+            for tick in range(base, base + slots):
+                if wheel[tick % slots]:
+                    due = tick
+                    break
+        if any(self._entries[1:]):
+            # Timers on the upper levels move down when the lowest wheel wraps around
+            boundary = -(-base // slots) * slots
+            due = boundary if due is None else min(due, boundary)
+        if due is None:
+            return None
+        return max(due * self.tick - self.clock(), 0.0)
+
+    def advance(self, now: float = None):
+        """
+        Runs the callbacks of every timer due by now, in expiry order.
+
+        Returns:
+            int: The number of callbacks run.
+        """
+        target = self._ticks(self.clock() if now is None else now)
+        slots, wheels = self.slots, self._wheels
+        fired = 0
+        while self._next <= target:
+            if not self._active:
+                # Nothing pending, skip the idle ticks
+                self._next = target + 1
+                break
+            tick = self._next
+            level, span = 1, slots
+            while level < len(wheels) and tick % span == 0:
+                self._cascade(level, tick // span % slots)
+                level += 1
+                span *= slots
+
+            timers = wheels[0][tick % slots]
+            # Timers scheduled by the callbacks below land on a later tick
+            self._next += 1
+            if not timers:
+                continue
+            wheels[0][tick % slots] = []
+            self._entries[0] -= len(timers)
+            for timer in timers:
+                if timer.active:
+                    timer.active = False
+                    self._active -= 1
+                    timer.callback(*timer.args)
+                    fired += 1
+        return fired
@@ -1,7 +1,25 @@
-import socket
+import hashlib
+import io
+import os
 import re
+import socket
+import struct
+import sys
+from array import array
 from dvrp.dvrp_error import *
 
+_IPV4 = re.compile(r"^(\d{1,3}\.){3}\d{1,3}$")
+
+# main.py and replay.py take the name of a topology file in this directory
+TOPOLOGY_DIR = "topologies"
+# Compiled topologies are cached next to the source file under this suffix
+CACHE_SUFFIX = ".topocache"
+# magic, version, source mtime (ns), source size, source BLAKE2b digest,
+# declared servers, declared links, server rows, link rows
+_CACHE_HEADER = struct.Struct("<4s H q q 32s q q q q")
+_CACHE_MAGIC = b"DVTC"
+_CACHE_VERSION = 1
+
 
 def is_valid_ipv4(ip_address: str):
     """
@@ -45,44 +63,126 @@ def is_valid_port(port: int):
     return 1024 <= port <= 65535
 
 
-def read_topology(lines: list):
-    num_servers = int(lines[0].strip())
-    num_neighbors = int(lines[1].strip())
+class Topology:
+    """
+    Servers and links of a topology file in parallel array columns, one row per line.
+
+    servers() and links() return the lists of dicts read_topology always has; server(id)
+    looks a server up by id through an index built on first use.
+    """
+
+    def __init__(self, num_servers: int = 0, num_links: int = 0):
+        # Counts declared on the first two lines of the file
+        self.num_servers = num_servers
+        self.num_links = num_links
+        self.ids = array("q")
+        # IPv4 addresses as integers in network order, like RoutingTable.ips
+        self.ips = array("L")
+        self.ports = array("H")
+        self.link_ids1 = array("q")
+        self.link_ids2 = array("q")
+        self.link_costs = array("q")
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index_of(self, server_id: int):
+        if self._index is None:
+            self._index = {server_id: row for row, server_id in enumerate(self.ids)}
+        return self._index.get(server_id)
+
+    def _server(self, row: int):
+        ip = socket.inet_ntoa(self.ips[row].to_bytes(4, "big"))
+        return {"id": self.ids[row], "ip": ip, "port": self.ports[row]}
+
+    def server(self, server_id: int):
+        row = self.index_of(server_id)
+        return None if row is None else self._server(row)
+
+    def servers(self):
+        # Most topologies share a handful of addresses, convert each one once
+        addresses = {}
+        servers = []
+        for server_id, ip, port in zip(self.ids, self.ips, self.ports):
+            address = addresses.get(ip)
+            if address is None:
+                address = addresses[ip] = socket.inet_ntoa(ip.to_bytes(4, "big"))
+            servers.append({"id": server_id, "ip": address, "port": port})
+        return servers
 
+    def links(self):
+        return [
+            {"id1": id1, "id2": id2, "cost": cost}
+            for id1, id2, cost in zip(self.link_ids1, self.link_ids2, self.link_costs)
+        ]
+
+
+def check_counts(num_servers: int, num_neighbors: int, network: bool = False):
     if num_servers <= 1:
         raise InvalidNumServersError("num_servers must be greater than 1")
 
-    if num_neighbors >= num_servers:
+    # A whole network file lists every link, which can outnumber the servers
+    if not network and num_neighbors >= num_servers:
         raise InvalidNumNeighborsError("num_neighbors must be less than num_servers")
 
-    # validate server information
-    server_info_lines = lines[2 : 2 + num_servers]
-    servers = []
-    for i, server_line in enumerate(server_info_lines, start=3):
-        parts = server_line.strip().split()
+
+def parse_topology(lines, network: bool = False):
+    """
+    Parses a topology line by line, e.g. straight from an open file, into a Topology.
+
+    Args:
+        lines: An iterable of lines, read lazily.
+        network (bool): Whether this is a whole network file, which may list more links
+            than servers.
+
+    Raises:
+        TopologyFileError: The same errors, with the same messages, as read_topology.
+        ValueError, IndexError: If a count or number does not parse or a count is missing.
+    """
+    lines = iter(lines)
+    try:
+        num_servers = int(next(lines).strip())
+        num_neighbors = int(next(lines).strip())
+    except StopIteration:
+        raise IndexError("Topology file is missing its server and neighbor counts") from None
+    check_counts(num_servers, num_neighbors, network)
+    topology = Topology(num_servers, num_neighbors)
+
+    # validate server information, converting each distinct address once
+    packed_ips = {}
+    ids, ips, ports = topology.ids, topology.ips, topology.ports
+    # range comes first so that zip stops without consuming the first link line
+    for i, server_line in zip(range(3, 3 + num_servers), lines):
+        parts = server_line.split()
         if len(parts) != 3:
             raise InvalidServerInfoError(f"Invalid server information at line {i}")
         server_id = int(parts[0])
         server_ip = parts[1]
         server_port = int(parts[2])
 
-        if not re.match(r"^(\d{1,3}\.){3}\d{1,3}$", server_ip) or not is_valid_ipv4(
-            server_ip
-        ):
-            raise InvalidServerInfoError(f"Invalid IPv4 address at line {i}")
+        packed_ip = packed_ips.get(server_ip)
+        if packed_ip is None:
+            if not _IPV4.match(server_ip) or not is_valid_ipv4(server_ip):
+                raise InvalidServerInfoError(f"Invalid IPv4 address at line {i}")
+            packed_ip = packed_ips[server_ip] = int.from_bytes(socket.inet_aton(server_ip), "big")
 
         if not is_valid_port(server_port):
             raise InvalidServerInfoError(
                 f"Invalid server port at line {i}: (port must be within 1024-65535)"
             )
 
-        servers.append({"id": server_id, "ip": server_ip, "port": server_port})
+        try:
+            ids.append(server_id)
+        except OverflowError:
+            raise InvalidServerInfoError(f"Invalid integer value at line {i}") from None
+        ips.append(packed_ip)
+        ports.append(server_port)
 
     # validate neighbor information
-    neighbor_info_lines = lines[2 + num_servers :]
-    neighbors = []
-    for i, neighbor_line in enumerate(neighbor_info_lines, start=3 + num_servers):
-        parts = neighbor_line.strip().split()
+    link_ids1, link_ids2, link_costs = topology.link_ids1, topology.link_ids2, topology.link_costs
+    for i, neighbor_line in enumerate(lines, start=3 + num_servers):
+        parts = neighbor_line.split()
         if len(parts) != 3:
             raise InvalidNeighborInfoError(f"Invalid neighbor information at line {i}")
         id1 = int(parts[0])
@@ -92,11 +192,124 @@ def read_topology(lines: list):
         if not (1 <= id1 <= num_servers and 1 <= id2 <= num_servers):
             raise InvalidNeighborInfoError("Invalid neighbor IDs")
 
-        neighbors.append({"id1": id1, "id2": id2, "cost": cost})
+        try:
+            link_costs.append(cost)
+        except OverflowError:
+            raise InvalidNeighborInfoError(f"Invalid integer value at line {i}") from None
+        link_ids1.append(id1)
+        link_ids2.append(id2)
 
-    if len(neighbors) != num_neighbors:
+    if len(link_costs) != num_neighbors:
         raise InvalidNeighborInfoError(
-            f"Expected {num_neighbors} neighbor information but received {len(neighbors)}"
+            f"Expected {num_neighbors} neighbor information but received {len(link_costs)}"
         )
 
-    return servers, neighbors
+    return topology
+
+
+def read_topology(lines: list, network: bool = False):
+    """
+    Returns:
+        tuple: (servers, neighbors), lists of {"id", "ip", "port"} and {"id1", "id2", "cost"} dicts.
+    """
+    topology = parse_topology(lines, network)
+    return topology.servers(), topology.links()
+
+
+def _columns(topology: Topology):
+    return (topology.ids, topology.ips, topology.ports,
+            topology.link_ids1, topology.link_ids2, topology.link_costs)
+
+
+def _read_cache(cache_path: str):
+    # The cached header and topology, None if the cache is missing or unreadable
+    try:
+        with open(cache_path, "rb") as file:
+            data = file.read()
+        fields = _CACHE_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    magic, version, mtime_ns, size, digest, num_servers, num_links, rows, link_rows = fields
+    if magic != _CACHE_MAGIC or version != _CACHE_VERSION:
+        return None
+
+    topology = Topology(num_servers, num_links)
+    offset = _CACHE_HEADER.size
+    for column, count in zip(_columns(topology), (rows,) * 3 + (link_rows,) * 3):
+        end = offset + count * column.itemsize
+        if end > len(data):
+            return None
+        column.frombytes(data[offset:end])
+        if sys.byteorder == "big":
+            column.byteswap()
+        offset = end
+    return (mtime_ns, size, digest), topology
+
+
+def _write_cache(cache_path: str, key: tuple, topology: Topology):
+    header = _CACHE_HEADER.pack(
+        _CACHE_MAGIC, _CACHE_VERSION, *key, topology.num_servers, topology.num_links,
+        len(topology.ids), len(topology.link_costs),
+    )
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            for column in _columns(topology):
+                if sys.byteorder == "big":
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                file.write(column.tobytes())
+        # Readers never see a partly written cache
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # The cache is an optimization, e.g. the directory may be read-only
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def topology_path(name: str):
+    """
+    Returns the path of the topology file a router is started with, given the name passed to -t.
+    """
+    return os.path.join(TOPOLOGY_DIR, name)
+
+
+def load_topology(path: str, network: bool = False, cache: bool = False):
+    """
+    Reads a topology file into a Topology.
+
+    Without cache the file is parsed line by line as it is read. With cache the parsed
+    tables are also compiled to path + CACHE_SUFFIX, keyed by the file's modification time,
+    size and BLAKE2b digest: while the time and size match the cache is loaded without
+    reading the file at all, and a file that was only touched or copied is recognized by
+    its digest. Files with errors are never cached, so errors are reported the same way.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        TopologyFileError, ValueError, IndexError: As parse_topology.
+    """
+    if not cache:
+        with open(path, "r") as file:
+            return parse_topology(file, network)
+
+    stat = os.stat(path)
+    cache_path = path + CACHE_SUFFIX
+    cached = _read_cache(cache_path)
+    if cached is not None and cached[0][:2] == (stat.st_mtime_ns, stat.st_size):
+        topology = cached[1]
+        check_counts(topology.num_servers, topology.num_links, network)
+        return topology
+
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = hashlib.blake2b(data, digest_size=32).digest()
+    if cached is not None and cached[0][2] == digest:
+        topology = cached[1]
+        check_counts(topology.num_servers, topology.num_links, network)
+    else:
+        topology = parse_topology(io.StringIO(data.decode()), network)
+    _write_cache(cache_path, (stat.st_mtime_ns, stat.st_size, digest), topology)
+    return topology
@@ -0,0 +1,134 @@
+import socket
+import sys
+from select import select
+from dvrp.routing_update import COMPACT_MARKER, ENTRY, HEADER, NUM_UPDATE_FIELDS, VERSION_FIELD, VERSION_OFFSET
+
+# Largest UDP payload over IPv4
+MAX_DATAGRAM = 65507
+MAX_DATAGRAM_ENTRIES = (MAX_DATAGRAM - HEADER.size) // ENTRY.size
+
+
+def split_update(packet: bytes, max_entries: int = MAX_DATAGRAM_ENTRIES):
+    """
+    Splits a routing update into updates of at most max_entries entries, each a complete
+    packet with its own header, so every datagram can be decoded on its own.
+
+    Compact packets are never split: the server only sends those that fit in a datagram,
+    see DatagramLink.max_frame_size.
+
+    Returns:
+        list: The packets, [packet] itself if it already fits.
+    """
+    num_entries = NUM_UPDATE_FIELDS.unpack_from(packet)[0]
+    if num_entries <= max_entries or num_entries == COMPACT_MARKER:
+        return [packet]
+
+    header = packet[NUM_UPDATE_FIELDS.size:HEADER.size]
+    view = memoryview(packet)
+    # The first entry of every piece carries the sender's wire version, as the packet's does
+    version = view[VERSION_OFFSET:VERSION_OFFSET + VERSION_FIELD.size]
+    packets = []
+    for first in range(0, num_entries, max_entries):
+        count = min(max_entries, num_entries - first)
+        start = HEADER.size + first * ENTRY.size
+        piece = bytearray(NUM_UPDATE_FIELDS.pack(count) + header + view[start:start + count * ENTRY.size])
+        piece[VERSION_OFFSET:VERSION_OFFSET + VERSION_FIELD.size] = version
+        packets.append(bytes(piece))
+    return packets
+
+
+class DatagramLink:
+    """
+    Writer for a neighbor reached over the router's UDP socket: every update is sent as
+    one datagram (or several for tables too large for one) to the neighbor's address.
+    """
+
+    __slots__ = ("sock", "address", "closed")
+    # Largest compact update sent as is, larger tables go out as split version 1 updates
+    max_frame_size = MAX_DATAGRAM
+
+    def __init__(self, sock, address: tuple):
+        self.sock = sock
+        self.address = address
+        self.closed = False
+
+    def write(self, message):
+        if self.closed:
+            return
+        for packet in split_update(message):
+            try:
+                self.sock.sendto(packet, self.address)
+            except OSError:
+                # Datagrams are fire and forget, the next periodic update makes up for it
+                pass
+
+    def close(self):
+        self.closed = True
+
+
+class UDPEngine:
+    """
+    Drives a TCPServer over a single UDP socket bound on its topology port instead of
+    per-neighbor TCP connections.
+
+    Updates are idempotent and resent every interval, so there is no connection state:
+    a neighbor is always reachable through its DatagramLink, and a lost datagram is
+    simply superseded by the next update. Received datagrams need no framing and are
+    handed to TCPServer.handle_frame as they are.
+    """
+
+    RECV_SIZE = 64 * 1024
+
+    def __init__(self, server, read_stdin: bool = True):
+        self.server = server
+        self.read_stdin = read_stdin
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((server.ip, server.port))
+        self.socket.setblocking(False)
+        server.engine = self
+
+    def connect(self, neighbor):
+        if neighbor.is_down and not neighbor.disabled:
+            neighbor.attach_writer(DatagramLink(self.socket, (neighbor.ip, neighbor.port)))
+
+    def receive(self):
+        """
+        Handles every datagram waiting on the socket.
+        """
+        server = self.server
+        while True:
+            try:
+                packet = self.socket.recv(self.RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. an ICMP port unreachable reported for an earlier datagram
+                continue
+            server.handle_frame(packet)
+
+    def run(self):
+        server = self.server
+        server.connect_neighbors()
+        server.start_timers()
+        print(f"Listening on UDP {server.ip}:{server.port}")
+        print(">> ", end="", flush=True)
+        inputs = [self.socket, sys.stdin] if self.read_stdin else [self.socket]
+        while True:
+            rlist, _, _ = select(inputs, [], [], server.timers.timeout())
+
+            for r in rlist:
+                if r is self.socket:
+                    self.receive()
+                else:
+                    line = sys.stdin.readline()
+                    if not line:
+                        # stdin was closed, keep routing without it
+                        inputs.remove(sys.stdin)
+                        continue
+                    server.execute_command(line.strip())
+                    print(">> ", end="", flush=True)
+
+            server.timers.advance()
+            # Changes made while handling this batch of datagrams go out as one delta update
+            server.send_triggered_update()
@@ -0,0 +1,214 @@
+from dvrp.dvrp_error import DVRPError
+from dvrp.routing_table import NO_HOP
+from dvrp.routing_update import INFINITY, CompactUpdateView
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    # Wire layout of a routing entry, see routing_update.ENTRY
+    ENTRY_DTYPE = np.dtype(
+        [("ip", "V4"), ("port", ">u2"), ("pad", "V2"), ("id", ">u2"), ("cost", ">u2")]
+    )
+
+
+class VectorizedDistanceVectorStore:
+    """
+    NumPy backend with the same interface as DistanceVectorStore.
+
+    Advertised costs are kept in a dense neighbors x destinations uint16 matrix with
+    INFINITY for unknown routes, so recomputing any set of destinations is a single
+    (link_costs[:, None] + matrix).min/argmin(axis=0). Only routes whose cost or next hop
+    actually changed are written back into the RoutingTable columns.
+
+    Hold-downs follow DistanceVectorStore, with the cost of each lost route kept per
+    column (-1 while not held) so held columns are masked without leaving NumPy.
+    """
+
+    def __init__(self, own_id: int, routing_table, capacity: int = 64, on_hold_down=None):
+        if np is None:
+            raise DVRPError("The vectorized distance vector backend requires numpy")
+        self.own_id = own_id
+        self.routing_table = routing_table
+        self.on_hold_down = on_hold_down
+        self.neighbor_ids = np.empty(0, dtype=np.int32)
+        self._row_of = {}
+        self._link_costs = np.empty(0, dtype=np.int32)
+        # Destination id -> column, -1 for destinations without one
+        self._column_of = np.full(INFINITY + 1, -1, dtype=np.int32)
+        self._dest_ids = np.empty(capacity, dtype=np.int32)
+        self._num_columns = 0
+        self._matrix = np.full((0, capacity), INFINITY, dtype=np.uint16)
+        self._best_cost = np.full(capacity, INFINITY, dtype=np.int32)
+        self._best_hop = np.full(capacity, NO_HOP, dtype=np.int32)
+        self._held_cost = np.full(capacity, -1, dtype=np.int32)
+
+    def __contains__(self, neighbor_id):
+        return neighbor_id in self._row_of
+
+    @property
+    def link_costs(self):
+        return {int(n): int(self._link_costs[row]) for n, row in self._row_of.items()}
+
+    def _column(self, dest_id: int):
+        column = self._column_of[dest_id]
+        if column >= 0:
+            return column
+
+        column = self._num_columns
+        if column == len(self._dest_ids):
+            grow = len(self._dest_ids)
+            self._dest_ids = np.concatenate([self._dest_ids, np.empty(grow, dtype=np.int32)])
+            self._matrix = np.concatenate(
+                [self._matrix, np.full((len(self._matrix), grow), INFINITY, dtype=np.uint16)], axis=1
+            )
+            self._best_cost = np.concatenate([self._best_cost, np.full(grow, INFINITY, dtype=np.int32)])
+            self._best_hop = np.concatenate([self._best_hop, np.full(grow, NO_HOP, dtype=np.int32)])
+            self._held_cost = np.concatenate([self._held_cost, np.full(grow, -1, dtype=np.int32)])
+
+        index = self.routing_table.index_of(dest_id)
+        self._dest_ids[column] = dest_id
+        self._best_cost[column] = self.routing_table.costs[index]
+        self._best_hop[column] = self.routing_table.next_hops[index]
+        self._column_of[dest_id] = column
+        self._num_columns += 1
+        return column
+
+    def add_neighbor(self, neighbor_id: int, cost: int):
+        row = len(self._link_costs)
+        self._row_of[neighbor_id] = row
+        self.neighbor_ids = np.append(self.neighbor_ids, np.int32(neighbor_id))
+        self._link_costs = np.append(self._link_costs, np.int32(cost))
+        self._matrix = np.vstack([self._matrix, np.full((1, self._matrix.shape[1]), INFINITY, np.uint16)])
+        column = self._column(neighbor_id)
+        # A neighbor is always reachable at its link cost, even before it advertises anything
+        self._matrix[row, column] = 0
+        return self._refresh(np.array([column]))
+
+    def set_link_cost(self, neighbor_id: int, cost: int):
+        row = self._row_of[neighbor_id]
+        if self._link_costs[row] == cost:
+            return set()
+        self._link_costs[row] = cost
+        return self._refresh(np.flatnonzero(self._matrix[row, :self._num_columns] < INFINITY))
+
+    def update_vector(self, neighbor_id: int, routing_update, learn=None):
+        row = self._row_of[neighbor_id]
+        compact = isinstance(routing_update, CompactUpdateView)
+        if compact:
+            # No addresses, learn looks them up
+            dest_ids, costs = routing_update.columns()
+            entries = np.zeros(len(dest_ids), dtype=ENTRY_DTYPE)
+            entries["id"] = np.frombuffer(dest_ids, dtype=np.uint16)
+            entries["cost"] = np.frombuffer(costs, dtype=np.uint16)
+        else:
+            entries = np.frombuffer(routing_update.buffer, dtype=ENTRY_DTYPE)
+        entries = entries[entries["id"] != self.own_id]
+        dest_ids = entries["id"].astype(np.intp)
+
+        columns = self._column_of[dest_ids]
+        unknown = np.flatnonzero(columns < 0)
+        if len(unknown):
+            # New destinations are rare, so these go through Python one at a time
+            for i in unknown:
+                dest_id = int(dest_ids[i])
+                if dest_id not in self.routing_table:
+                    # Unreachable destinations are not worth learning
+                    if learn is None or entries["cost"][i] >= INFINITY:
+                        continue
+                    if compact:
+                        learned = learn(dest_id, None, None)
+                    else:
+                        learned = learn(dest_id, bytes(entries["ip"][i]), int(entries["port"][i]))
+                    if not learned:
+                        continue
+                columns[i] = self._column(dest_id)
+            known = columns >= 0
+            columns, entries = columns[known], entries[known]
+
+        costs = entries["cost"]
+        differs = self._matrix[row, columns] != costs
+        columns = columns[differs]
+        self._matrix[row, columns] = costs[differs]
+        return self._refresh(columns)
+
+    def remove_neighbor(self, neighbor_id: int):
+        row = self._row_of[neighbor_id]
+        affected = np.flatnonzero(self._matrix[row, :self._num_columns] < INFINITY)
+        self._link_costs[row] = INFINITY
+        self._matrix[row, :] = INFINITY
+        self._matrix[row, self._column(neighbor_id)] = 0
+        return self._refresh(affected)
+
+    def release(self, dest_id: int):
+        column = self._column_of[dest_id]
+        if column < 0 or self._held_cost[column] < 0:
+            return set()
+        self._held_cost[column] = -1
+        return self._refresh(np.array([column]))
+
+    def forget(self, dest_id: int):
+        column = self._column_of[dest_id]
+        if column < 0:
+            return
+        # Move the last column into the freed one to keep the columns dense
+        last = self._num_columns - 1
+        moved = self._dest_ids[last]
+        for values in (self._dest_ids, self._best_cost, self._best_hop, self._held_cost):
+            values[column] = values[last]
+        self._matrix[:, column] = self._matrix[:, last]
+        self._matrix[:, last] = INFINITY
+        self._held_cost[last] = -1
+        self._column_of[moved] = column
+        self._column_of[dest_id] = -1
+        self._num_columns = last
+
+    def _refresh(self, columns):
+        if not len(columns) or not len(self._link_costs):
+            return set()
+
+        totals = self._link_costs[:, None] + self._matrix[:, columns]
+        best_rows = totals.argmin(axis=0)
+        best_cost = np.minimum(totals[best_rows, np.arange(len(columns))], INFINITY)
+        best_hop = np.where(best_cost < INFINITY, self.neighbor_ids[best_rows], NO_HOP)
+
+        held_cost = self._held_cost[columns]
+        holding = held_cost >= 0
+        if holding.any():
+            # A route as good as the lost one ends the hold-down early
+            self._held_cost[columns[holding & (best_cost <= held_cost)]] = -1
+            holding &= best_cost > held_cost
+            best_cost[holding] = INFINITY
+            best_hop[holding] = NO_HOP
+        if self.on_hold_down is not None:
+            self._hold_down_lost(columns, totals, best_cost, best_hop, holding)
+
+        changed = (best_cost != self._best_cost[columns]) | (best_hop != self._best_hop[columns])
+        columns = columns[changed]
+        self._best_cost[columns] = best_cost[changed]
+        self._best_hop[columns] = best_hop[changed]
+
+        # Keep the routing table read by DisplayCommand and the encoder in sync
+        dest_ids = self._dest_ids[columns].tolist()
+        index_of = self.routing_table.index_of
+        costs, next_hops = self.routing_table.costs, self.routing_table.next_hops
+        for dest_id, cost, hop in zip(dest_ids, best_cost[changed].tolist(), best_hop[changed].tolist()):
+            index = index_of(dest_id)
+            costs[index] = cost
+            next_hops[index] = hop
+        return set(dest_ids)
+
+    def _hold_down_lost(self, columns, totals, best_cost, best_hop, holding):
+        # Routes lost through their next hop with only worse alternatives left, see DistanceVectorStore
+        for i in np.flatnonzero((best_cost > self._best_cost[columns]) & ~holding).tolist():
+            column = columns[i]
+            row = self._row_of.get(int(self._best_hop[column]))
+            if row is None or totals[row, i] < INFINITY:
+                continue
+            dest_id = int(self._dest_ids[column])
+            if self.on_hold_down(dest_id):
+                self._held_cost[column] = self._best_cost[column]
+                best_cost[i] = INFINITY
+                best_hop[i] = NO_HOP
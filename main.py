@@ -1,20 +1,15 @@
 import sys
 import argparse
+import atexit
+import asyncio
 from dvrp import *
 
 
-def process_topology(file_path: str):
+def process_topology(file_path: str, cache: bool = False):
     try:
-        with open("topologies/" + file_path, "r") as file:
-            lines = file.readlines()
+        topology = load_topology(topology_path(file_path), cache=cache)
     except FileNotFoundError:
         raise DVRPError("Topology file not found.")
-
-    try:
-        server, neighbors = read_topology(lines)
-        print(
-            f"Validated topology, detected {len(server)} servers and {len(neighbors)} neighbors info"
-        )
     except TopologyFileError as custom_error:
         raise DVRPError(
             f"Error processing topology file:\n\t {custom_error}"
@@ -23,6 +18,10 @@ def process_topology(file_path: str):
         raise DVRPError(
             "Error processing topology file:\n\t Check file syntax")
 
+    server, neighbors = topology.servers(), topology.links()
+    print(
+        f"Validated topology, detected {len(server)} servers and {len(neighbors)} neighbors info"
+    )
     return server, neighbors
 
 
@@ -35,22 +34,70 @@ def main():
                             help="Output file path", required=True, type=str)
         parser.add_argument("-i", "--interval",
                             help="Input file path", required=True, type=int)
+        parser.add_argument("-e", "--engine", choices=["select", "asyncio"], default="select",
+                            help="Event loop driving the router")
+        parser.add_argument("--transport", choices=["tcp", "udp"], default="tcp",
+                            help="Send updates over per-neighbor TCP connections or as UDP datagrams")
+        parser.add_argument("--vectorized", action="store_true",
+                            help="Compute routes with the NumPy backend (requires numpy)")
+        parser.add_argument("--log-level", choices=list(LOG_LEVELS), default="info",
+                            help="Events at or above this level are logged, off silences the event log")
+        parser.add_argument("--log-file",
+                            help="Append the event log to this file instead of writing it to stderr")
+        parser.add_argument("--topology-cache", action="store_true",
+                            help="Load the topology from a compiled cache next to the file, rebuilt when it changes")
+        parser.add_argument("--metrics-port", type=int,
+                            help="Serve metrics in the Prometheus text format at http://127.0.0.1:PORT/metrics")
+        parser.add_argument("--capture",
+                            help="Log every received frame to this file, for replay.py")
+        parser.add_argument("--profile", choices=["cprofile", "sample"],
+                            help="Profile the router from startup, the profile is dumped at exit")
+        parser.add_argument("--wire-version", type=int, choices=[1, 2], default=2,
+                            help="Highest update format sent to neighbors that support it (1 always sends version 1)")
+        parser.add_argument("--query-socket",
+                            help="Answer batched next hop lookups on a Unix socket at this path")
+        parser.add_argument("--query-port", type=int,
+                            help="Answer batched next hop lookups on 127.0.0.1:PORT")
 
         args = parser.parse_args()
+        if args.transport == "udp" and args.engine != "select":
+            raise DVRPError("The UDP transport runs on the select engine.")
+        configure_logging(args.log_level, open(args.log_file, "a") if args.log_file else None)
 
         file_path = args.topology
         interval = args.interval
 
-        servers, neighbors = process_topology(file_path)
+        servers, neighbors = process_topology(file_path, args.topology_cache)
         tcp_server = TCPServer.getTCPServer(
-            servers.pop(0), interval, servers, neighbors)
+            servers.pop(0), interval, servers, neighbors, args.vectorized, listen=args.transport == "tcp")
+        tcp_server.wire_version = args.wire_version
 
         # Print TCPServer attributes
         print(f"IP: {tcp_server.ip}")
         print(f"Port: {tcp_server.port}")
         print(f"Additional servers: {tcp_server.neighbors}")
+        if args.metrics_port is not None:
+            serve_metrics(tcp_server.metrics, args.metrics_port)
+            print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+        if args.query_socket:
+            atexit.register(RouteQueryServer(tcp_server, args.query_socket).close)
+            print(f"Route queries: {args.query_socket}")
+        if args.query_port is not None:
+            atexit.register(RouteQueryServer(tcp_server, ("127.0.0.1", args.query_port)).close)
+            print(f"Route queries: 127.0.0.1:{args.query_port}")
+        if args.capture:
+            tcp_server.capture = CaptureWriter(args.capture, tcp_server.id, interval)
+            atexit.register(tcp_server.capture.close)
+        if args.profile:
+            tcp_server.profiler.start(args.profile)
+            atexit.register(tcp_server.profiler.close)
 
-        tcp_server.mainloop()
+        if args.transport == "udp":
+            UDPEngine(tcp_server).run()
+        elif args.engine == "asyncio":
+            asyncio.run(AsyncEngine(tcp_server).run())
+        else:
+            tcp_server.mainloop()
 
     except DVRPError as e:
         print(e.args[0])  # print the error message from the exception
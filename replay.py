@@ -0,0 +1,46 @@
+import sys
+import argparse
+import json
+from dvrp import *
+
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(
+            description="Replays a capture log (main.py --capture) into a fresh router without sockets")
+
+        parser.add_argument("capture", help="The capture log")
+        parser.add_argument("-t", "--topology", required=True,
+                            help="The topology file in topologies/ the captured router was started with (its main.py -t)")
+        parser.add_argument("--pace", type=float, nargs="?", const=1.0,
+                            help="Keep the recorded pacing, sped up by this factor (default 1), "
+                                 "instead of replaying as fast as possible")
+        parser.add_argument("--vectorized", action="store_true",
+                            help="Compute routes with the NumPy backend (requires numpy)")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the update jitter")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+        args = parser.parse_args()
+        try:
+            router, report = replay(args.capture, topology_path(args.topology), args.pace, args.vectorized, args.seed)
+        except FileNotFoundError as e:
+            raise DVRPError(f"File {e.filename} not found.")
+
+        if args.json:
+            report["routing_table"] = {dest: dict(route) for dest, route in router.routing_table.items()}
+            print(json.dumps(report))
+            return
+        for key, value in report.items():
+            print(f"{key}: {value}")
+        print("Routing table for router", router.id)
+        print("Destination\tCost\tNext Hop\tIP\t\tPort")
+        for dest, info in router.routing_table.items():
+            print(f"{dest}\t\t{info['cost']}\t{info['next_hop']}\t{info['ip']}\t{info['port']}")
+
+    except DVRPError as e:
+        print(e.args[0])
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
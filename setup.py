@@ -4,5 +4,6 @@ from setuptools import setup, find_packages
 setup(
     name='dvrp-network',
     version='0.1',
-    packages=find_packages()
+    packages=find_packages(),
+    extras_require={"numpy": ["numpy"]}
 )
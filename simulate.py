@@ -0,0 +1,70 @@
+import sys
+import argparse
+import json
+from dvrp import *
+from dvrp.sharded_simulator import ShardedSimulation
+from dvrp.simulator import Simulation, load_network
+
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(
+            description="Runs every router of a topology in one process and reports convergence")
+
+        parser.add_argument("-t", "--topology", nargs="+", required=True,
+                            help="One whole network file, or several per-router files to merge")
+        parser.add_argument("-i", "--interval", type=float, default=1.0,
+                            help="Periodic update interval in (simulated) seconds")
+        parser.add_argument("--transport", choices=["memory", "loopback"], default="memory",
+                            help="In-memory frames on a virtual clock, or real loopback sockets")
+        parser.add_argument("--latency", type=float, default=0.001,
+                            help="Simulated link latency in seconds (memory transport)")
+        parser.add_argument("--max-time", type=float, default=600.0,
+                            help="Give up after this many (simulated) seconds")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--vectorized", action="store_true",
+                            help="Compute routes with the NumPy backend (requires numpy)")
+        parser.add_argument("--shards", type=int, nargs="?", const=0,
+                            help="Split the routers across this many processes (default one per core)")
+        parser.add_argument("--verify", action="store_true",
+                            help="Check converged tables against Dijkstra")
+        parser.add_argument("--topology-cache", action="store_true",
+                            help="Load topologies from compiled caches next to the files, rebuilt when they change")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+        args = parser.parse_args()
+
+        servers, links = load_network(args.topology, args.topology_cache)
+        if args.shards is not None:
+            if args.transport != "memory":
+                raise DVRPError("Sharded simulations run on the memory transport.")
+            simulation = ShardedSimulation(servers, links, args.shards or None, args.interval,
+                                           args.latency, args.vectorized, args.seed)
+        else:
+            simulation = Simulation(servers, links, args.interval, args.latency,
+                                    args.transport, args.vectorized, args.seed)
+
+        if args.transport == "loopback":
+            report = simulation.run_loopback(args.max_time)
+        else:
+            simulation.start()
+            report = simulation.run(args.max_time)
+
+        if args.verify:
+            report["mismatches"] = len(simulation.verify())
+        if args.shards is not None:
+            simulation.close()
+
+        if args.json:
+            print(json.dumps(report))
+        else:
+            for key, value in report.items():
+                print(f"{key}: {value}")
+
+    except DVRPError as e:
+        print(e.args[0])
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from dvrp.distance_vector import DistanceVectorStore
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import INFINITY, RoutingUpdateEncoder, decode_entries
+from dvrp.vectorized_distance_vector import VectorizedDistanceVectorStore
+
+OWN_ID = 1
+STORES = (DistanceVectorStore, VectorizedDistanceVectorStore)
+
+
+def make_table(num_destinations):
+    table = RoutingTable()
+    table.add(OWN_ID, "127.0.0.1", 1024 + OWN_ID, 0, OWN_ID)
+    for dest_id in range(2, num_destinations + 1):
+        table.add(dest_id, "127.0.0.1", 1024 + dest_id)
+    return table
+
+
+def make_stores(num_destinations, link_costs, on_hold_down=None):
+    stores = []
+    for store_cls in STORES:
+        store = store_cls(OWN_ID, make_table(num_destinations), on_hold_down=on_hold_down)
+        for neighbor_id, cost in link_costs.items():
+            store.add_neighbor(neighbor_id, cost)
+        stores.append(store)
+    return stores
+
+
+def advertise(stores, neighbor_id, costs):
+    # Sends {dest_id: cost} from neighbor_id through the wire format, as a router would
+    table = RoutingTable()
+    for dest_id, cost in costs.items():
+        table.add(dest_id, "127.0.0.1", 1024 + dest_id, cost)
+    packet = RoutingUpdateEncoder("127.0.0.1", 1024 + neighbor_id).encode_table(table, len(table))
+    return [store.update_vector(neighbor_id, decode_entries(packet)) for store in stores]
+
+
+def routes(store):
+    return {dest_id: (route["cost"], route["next_hop"]) for dest_id, route in store.routing_table.items()}
+
+
+def assert_parity(stores):
+    python_store, vectorized_store = stores
+    for dest_id, route in python_store.routing_table.items():
+        other = vectorized_store.routing_table[dest_id]
+        assert route["cost"] == other["cost"], (dest_id, dict(route), dict(other))
+        next_hop = other["next_hop"]
+        # Ties may pick different neighbors, but the chosen one must achieve the cost
+        if next_hop is not None and dest_id != OWN_ID:
+            through = python_store.link_costs[next_hop] + python_store.vectors[next_hop].get(dest_id, INFINITY)
+            assert min(through, INFINITY) == other["cost"], (dest_id, dict(route), dict(other))
+
+
+def assert_same_changes(changed, stores):
+    # Only a switch between next hops of equal cost may be reported by one store alone
+    for dest_id in changed[0] ^ changed[1]:
+        costs = [store.routing_table[dest_id]["cost"] for store in stores]
+        assert costs[0] == costs[1], (dest_id, costs)
+
+
+@pytest.mark.parametrize("seed", [429, 1, 2024])
+def test_random_updates_agree(seed):
+    rng = random.Random(seed)
+    num_destinations = 60
+    neighbor_ids = list(range(2, 8))
+    stores = make_stores(num_destinations, {n: rng.randint(1, 20) for n in neighbor_ids})
+
+    for step in range(60):
+        neighbor_id = rng.choice(neighbor_ids)
+        costs = {d: rng.choice((rng.randint(1, 200), INFINITY)) for d in range(1, num_destinations + 1)}
+        assert_same_changes(advertise(stores, neighbor_id, costs), stores)
+        if step % 3 == 1:
+            neighbor_id, cost = rng.choice(neighbor_ids), rng.choice((rng.randint(1, 300), INFINITY))
+            assert_same_changes([store.set_link_cost(neighbor_id, cost) for store in stores], stores)
+        if step % 7 == 5:
+            neighbor_id = rng.choice(neighbor_ids)
+            assert_same_changes([store.remove_neighbor(neighbor_id) for store in stores], stores)
+        assert_parity(stores)
+
+
+def test_infinite_advertisements_leave_destinations_unreachable():
+    stores = make_stores(5, {2: 1, 3: 4})
+    advertise(stores, 2, {4: INFINITY, 5: 3})
+    advertise(stores, 3, {4: INFINITY, 5: INFINITY})
+    for store in stores:
+        assert routes(store)[4] == (INFINITY, None)
+        assert routes(store)[5] == (4, 2)
+    # Costs near INFINITY saturate instead of wrapping
+    advertise(stores, 3, {5: INFINITY - 1})
+    assert_parity(stores)
+    for store in stores:
+        assert routes(store)[5] == (4, 2)
+
+
+def test_removed_neighbor_reroutes_or_withdraws():
+    stores = make_stores(5, {2: 1, 3: 5})
+    advertise(stores, 2, {4: 1, 5: 1})
+    advertise(stores, 3, {4: 1})
+    for store in stores:
+        assert routes(store)[4] == (2, 2)
+
+    changed = [store.remove_neighbor(2) for store in stores]
+    assert changed[0] == changed[1] == {2, 4, 5}
+    for store in stores:
+        assert routes(store)[2] == (INFINITY, None)
+        assert routes(store)[4] == (6, 3)
+        assert routes(store)[5] == (INFINITY, None)
+    assert_parity(stores)
+
+
+def test_hold_down_until_an_equal_route_or_release():
+    stores = make_stores(4, {2: 1, 3: 1}, on_hold_down=lambda dest_id: True)
+    advertise(stores, 2, {4: 1})
+    advertise(stores, 3, {4: 5})
+    for store in stores:
+        assert routes(store)[4] == (2, 2)
+
+    # Losing the route with only a worse one left holds the destination down
+    advertise(stores, 2, {4: INFINITY})
+    for store in stores:
+        assert routes(store)[4] == (INFINITY, None)
+    # Worse routes are ignored while held
+    advertise(stores, 3, {4: 3})
+    for store in stores:
+        assert routes(store)[4] == (INFINITY, None)
+    # A route as good as the lost one ends the hold-down
+    advertise(stores, 3, {4: 1})
+    for store in stores:
+        assert routes(store)[4] == (2, 3)
+
+    advertise(stores, 3, {4: INFINITY})
+    for store in stores:
+        assert routes(store)[4] == (INFINITY, None)
+    # Releasing takes the best route on offer, however costly
+    advertise(stores, 2, {4: 9})
+    assert [store.release(4) for store in stores] == [{4}, {4}]
+    for store in stores:
+        assert routes(store)[4] == (10, 2)
+    assert_parity(stores)
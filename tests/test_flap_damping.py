@@ -0,0 +1,67 @@
+import pytest
+
+from dvrp.flap_damping import FlapDamping
+
+HALF_LIFE = 10.0
+
+
+def make_damping(**kwargs):
+    return FlapDamping(HALF_LIFE, penalty=1000.0, suppress=2000.0, reuse=750.0, **kwargs)
+
+
+def test_penalty_decays_by_half_every_half_life():
+    damping = make_damping()
+    damping.flap(1, 0.0)
+    assert damping.penalty_of(1, 0.0) == pytest.approx(1000.0)
+    assert damping.penalty_of(1, HALF_LIFE) == pytest.approx(500.0)
+    assert damping.penalty_of(1, 3 * HALF_LIFE) == pytest.approx(125.0)
+    assert damping.penalty_of(2, 0.0) == 0.0
+
+
+def test_suppressed_once_the_penalty_reaches_suppress():
+    damping = make_damping()
+    assert not damping.flap(1, 0.0)
+    assert damping.flap(1, 0.0)
+    assert damping.is_suppressed(1, 0.0)
+    # Flaps far enough apart decay in between and never suppress
+    assert not damping.flap(2, 0.0)
+    assert not damping.flap(2, HALF_LIFE)
+    assert not damping.flap(2, 2 * HALF_LIFE)
+
+
+def test_reused_once_the_penalty_decays_below_reuse():
+    damping = make_damping()
+    damping.flap(1, 0.0)
+    damping.flap(1, 0.0)
+    delay = damping.reuse_delay(1, 0.0)
+    # 2000 decays to 750 after log2(2000 / 750) half-lives
+    assert delay == pytest.approx(HALF_LIFE * 1.415, abs=0.01)
+    assert damping.is_suppressed(1, delay - 0.01)
+    assert not damping.is_suppressed(1, delay + 0.01)
+    # The history is forgotten on reuse, a single flap does not suppress again
+    assert damping.penalty_of(1, delay + 0.01) == 0.0
+    assert not damping.flap(1, delay + 0.02)
+    assert damping.reuse_delay(1, delay + 0.02) == 0.0
+
+
+def test_penalty_is_capped_by_max_suppress_time():
+    damping = make_damping(max_suppress_time=3 * HALF_LIFE)
+    for _ in range(50):
+        damping.flap(1, 0.0)
+    assert damping.penalty_of(1, 0.0) == pytest.approx(750.0 * 2 ** 3)
+    assert damping.reuse_delay(1, 0.0) == pytest.approx(3 * HALF_LIFE)
+    assert not damping.is_suppressed(1, 3 * HALF_LIFE + 0.01)
+
+
+def test_forget_clears_suppression():
+    damping = make_damping()
+    damping.flap(1, 0.0)
+    damping.flap(1, 0.0)
+    damping.forget(1)
+    assert not damping.is_suppressed(1, 0.0)
+    assert damping.penalty_of(1, 0.0) == 0.0
+
+
+def test_thresholds_are_validated():
+    with pytest.raises(ValueError):
+        FlapDamping(HALF_LIFE, suppress=500.0, reuse=750.0)
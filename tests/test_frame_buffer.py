@@ -0,0 +1,60 @@
+import pytest
+
+from dvrp.dvrp_error import MalformedPacketError
+from dvrp.frame_buffer import FrameBuffer
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import COMPACT_HEADER, COMPACT_MARKER, MAX_COMPACT_BODY, RoutingUpdateEncoder
+
+
+def make_frames():
+    table = RoutingTable()
+    for dest_id in range(1, 30):
+        table.add(dest_id, "127.0.0.1", 1024 + dest_id, dest_id, 2)
+    encoder = RoutingUpdateEncoder("127.0.0.1", 9091)
+    empty = RoutingUpdateEncoder("127.0.0.1", 9091).encode_table(RoutingTable(), 0)
+    compact = encoder.encode_compact(table).for_neighbor(2, 0)
+    return [encoder.encode(table), empty, encoder.encode_delta(table, [3, 7]).packet, compact]
+
+
+def test_frames_split_across_reads_are_reassembled():
+    frames = make_frames()
+    stream = b"".join(frames)
+    frame_buffer = FrameBuffer()
+    received = []
+    for offset in range(len(stream)):
+        frame_buffer.feed(stream[offset:offset + 1])
+        received += frame_buffer.read_frames()
+    assert received == frames
+    assert len(frame_buffer) == 0
+
+
+def test_frames_read_together_are_split_apart():
+    frames = make_frames()
+    frame_buffer = FrameBuffer()
+    frame_buffer.feed(b"".join(frames) + frames[0][:5])
+    assert frame_buffer.read_frames() == frames
+    # A partial header is kept until the rest arrives
+    assert len(frame_buffer) == 5
+    assert frame_buffer.read_frames() == []
+    frame_buffer.feed(frames[0][5:])
+    assert frame_buffer.read_frames() == [frames[0]]
+
+
+def test_consumed_bytes_are_compacted():
+    frames = make_frames()
+    frame_buffer = FrameBuffer(compact_threshold=len(frames[0]))
+    frame_buffer.feed(frames[0] + frames[1][:3])
+    assert frame_buffer.read_frames() == [frames[0]]
+    assert len(frame_buffer) == 3
+    assert len(frame_buffer._buffer) == 3
+    frame_buffer.feed(frames[1][3:])
+    assert frame_buffer.read_frames() == [frames[1]]
+    assert len(frame_buffer._buffer) == 0
+
+
+def test_oversized_compact_header_is_a_protocol_error():
+    header = COMPACT_HEADER.pack(COMPACT_MARKER, 2, 0, 9091, bytes(4), MAX_COMPACT_BODY + 1)
+    frame_buffer = FrameBuffer()
+    frame_buffer.feed(header + bytes(64))
+    with pytest.raises(MalformedPacketError):
+        frame_buffer.read_frames()
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+
+import main
+import replay
+from dvrp.capture import CaptureWriter, ReplayEngine
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import RoutingUpdateEncoder
+from dvrp.tcp_server import TCPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOPOLOGY = "t1.txt"
+INTERVAL = 5
+
+
+def make_router(servers, neighbors):
+    # The router main.py starts, without its sockets
+    server = servers.pop(0)
+    router = TCPServer(server["id"], server["ip"], server["port"], INTERVAL, listen=False)
+    router.add_connections(servers, neighbors)
+    router.create_routing_table(servers, neighbors)
+    ReplayEngine(router)
+    router.connect_neighbors()
+    return router
+
+
+def neighbor_update(port, costs):
+    table = RoutingTable()
+    for dest_id, cost in costs.items():
+        table.add(dest_id, "127.0.0.1", 9090 + dest_id, cost)
+    return RoutingUpdateEncoder("127.0.0.1", port).encode(table)
+
+
+def test_replay_takes_the_topology_name_main_was_started_with(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(ROOT)
+    router = make_router(*main.process_topology(TOPOLOGY))
+    capture_path = str(tmp_path / "capture")
+    router.capture = CaptureWriter(capture_path, router.id, INTERVAL)
+    router.handle_frame(neighbor_update(9092, {1: 3, 2: 0, 4: 1, 5: 6}))
+    router.handle_frame(neighbor_update(9093, {1: 1, 3: 0, 4: 7, 5: 2}))
+    router.capture.close()
+    live = {str(dest_id): dict(route) for dest_id, route in router.routing_table.items()}
+    assert live["4"]["next_hop"] == 2 and live["5"]["next_hop"] == 3
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, "argv", ["replay.py", capture_path, "-t", TOPOLOGY, "--json"])
+    replay.main()
+    report = json.loads(capsys.readouterr().out)
+    assert report["frames"] == 2
+    assert report["routing_table"] == live
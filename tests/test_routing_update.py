@@ -0,0 +1,166 @@
+import socket
+import struct
+
+import pytest
+
+from dvrp.capture import ReplayEngine
+from dvrp.dvrp_error import MalformedPacketError
+from dvrp.routing_table import RoutingTable
+from dvrp.routing_update import (
+    COMPACT_MARKER,
+    INFINITY,
+    NUM_UPDATE_FIELDS,
+    RoutingUpdateEncoder,
+    decode_entries,
+    decode_routing_update,
+    frame_size,
+)
+from dvrp.tcp_server import TCPServer
+from dvrp.udp_engine import split_update
+
+IP = "127.0.0.1"
+
+
+def baseline_decode(packet):
+    # The decoder of routers that only speak version 1, as it was before version 2 existed
+    num_update_fields, server_port, server_ip = struct.unpack("!H H 4s", packet[:8])
+    packet = packet[8:]
+    entries = []
+    for _ in range(num_update_fields):
+        dest_ip, dest_port, _, dest_id, cost = struct.unpack("!4s H 2s H H", packet[:12])
+        packet = packet[12:]
+        entries.append((dest_id, cost, socket.inet_ntoa(dest_ip), dest_port))
+    return socket.inet_ntoa(server_ip), server_port, entries
+
+
+def baseline_encode(port, routes):
+    # A version 1 update as sent by such a router: zeroed padding, so no version advertised
+    data = b"".join(struct.pack("!4s H 2s H H", socket.inet_aton(IP), 9000 + dest_id, b"\x00\x00", dest_id, cost)
+                    for dest_id, cost in routes)
+    return struct.pack("!H H 4s", len(routes), port, socket.inet_aton(IP)) + data
+
+
+def make_table():
+    table = RoutingTable()
+    for dest_id, cost, next_hop in [(1, 0, 1), (2, 3, 2), (3, 7, 2), (4, INFINITY, None), (300, 200, 5)]:
+        table.add(dest_id, IP, 9000 + dest_id, cost, next_hop)
+    return table
+
+
+def expected_entries(table, poisoned=None):
+    entries = []
+    for dest_id, route in table.items():
+        cost = INFINITY if poisoned is not None and route["next_hop"] == poisoned else route["cost"]
+        entries.append((dest_id, cost, IP, route["port"]))
+    return entries
+
+
+def test_version_1_round_trip():
+    table = make_table()
+    encoder = RoutingUpdateEncoder(IP, 9001)
+    for poisoned in (None, 2):
+        packet = encoder.encode(table, poisoned)
+        assert frame_size(packet) == len(packet)
+        server_ip, server_port, view = decode_routing_update(packet)
+        assert (server_ip, server_port, view.version) == (IP, 9001, 2)
+        decoded = [(dest_id, cost, socket.inet_ntoa(ip), port) for dest_id, cost, ip, port in view]
+        assert decoded == expected_entries(table, poisoned)
+
+    delta = encoder.encode_delta(table, [3, 300])
+    assert [entry[:2] for entry in decode_entries(delta.for_neighbor(2))] == [(3, INFINITY), (300, 200)]
+    assert decode_entries(encoder.encode_table(RoutingTable(), 0)).version is None
+
+
+@pytest.mark.parametrize("compress_threshold", [None, 0])
+def test_version_2_round_trip(compress_threshold):
+    table = make_table()
+    encoder = RoutingUpdateEncoder(IP, 9001, compress_threshold=compress_threshold)
+    update = encoder.encode_compact(table)
+    for poisoned in (None, 2):
+        addresses = {}
+        packet = update.for_neighbor(poisoned, 0)
+        assert NUM_UPDATE_FIELDS.unpack_from(packet)[0] == COMPACT_MARKER
+        assert frame_size(packet) == len(packet)
+        server_ip, server_port, view = decode_routing_update(packet, addresses)
+        assert (server_ip, server_port, view.version) == (IP, 9001, 2)
+        expected = sorted((dest_id, cost) for dest_id, cost, _, _ in expected_entries(table, poisoned))
+        assert [entry[:2] for entry in view] == expected
+        assert addresses == {dest_id: (socket.inet_aton(IP), 9000 + dest_id) for dest_id in table}
+
+        # Addresses already sent are left out
+        addresses = {}
+        view = decode_entries(update.for_neighbor(poisoned, encoder.num_addresses), addresses)
+        assert addresses == {} and [entry[:2] for entry in view] == expected
+
+    delta = encoder.encode_compact(table, [300, 3]).for_neighbor(2, encoder.num_addresses)
+    assert [entry[:2] for entry in decode_entries(delta)] == [(3, INFINITY), (300, 200)]
+
+
+def test_truncated_packets_are_rejected():
+    encoder = RoutingUpdateEncoder(IP, 9001)
+    table = make_table()
+    for packet in (encoder.encode(table), encoder.encode_compact(table).for_neighbor(None, 0)):
+        with pytest.raises(MalformedPacketError):
+            decode_entries(packet[:-1])
+
+
+def test_version_1_peers_decode_every_version_1_packet():
+    table = make_table()
+    encoder = RoutingUpdateEncoder(IP, 9001)
+    packets = [encoder.encode(table), encoder.encode(table, 2), encoder.encode_delta(table, [2, 4]).packet,
+               encoder.encode_entries([(2, table[2])], 1)]
+    packets += split_update(encoder.encode(table), max_entries=2)
+    for packet in packets:
+        server_ip, server_port, entries = baseline_decode(packet)
+        assert (server_ip, server_port) == (IP, 9001)
+        assert len(packet) == 8 + 12 * len(entries)
+        assert all(dest_id in table for dest_id, _, _, _ in entries)
+    # Split pieces advertise the version like the whole packet
+    assert {decode_entries(piece).version for piece in packets[4:]} == {2}
+    assert [entry for piece in packets[4:] for entry in baseline_decode(piece)[2]] == expected_entries(table)
+
+
+def make_router(router_id, wire_version=2):
+    # Line topology 1 - 2 - 3 with every link at cost 1
+    servers = [{"id": i, "ip": IP, "port": 9000 + i} for i in (1, 2, 3)]
+    links = [{"id1": router_id, "id2": other, "cost": 1} for other in (router_id - 1, router_id + 1) if 1 <= other <= 3]
+    router = TCPServer(router_id, IP, 9000 + router_id, 1, listen=False)
+    router.wire_version = wire_version
+    others = [server for server in servers if server["id"] != router_id]
+    router.add_connections(others, links)
+    router.create_routing_table(others, links)
+    ReplayEngine(router)
+    router.connect_neighbors()
+    return router
+
+
+def test_version_2_is_negotiated_per_neighbor():
+    router1, router2 = make_router(1), make_router(2)
+    neighbor1, neighbor2 = router2.neighbors.get(1), router1.neighbors.get(2)
+    # Until a neighbor advertises version 2 it is sent version 1, which a version 1 peer decodes
+    fallback = router2.encode_full_table(neighbor1)
+    assert NUM_UPDATE_FIELDS.unpack_from(fallback)[0] == len(router2.routing_table)
+    entries = baseline_decode(fallback)[2]
+    assert sorted((dest_id, cost) for dest_id, cost, _, _ in entries) == [(1, INFINITY), (2, 0), (3, 1)]
+
+    router2.handle_frame(router1.encode_full_table(neighbor2))
+    assert neighbor1.wire_version == 2
+    compact = router2.encode_full_table(neighbor1)
+    assert NUM_UPDATE_FIELDS.unpack_from(compact)[0] == COMPACT_MARKER
+    router1.handle_frame(compact)
+    assert router1.routing_table[3]["cost"] == 2 and router1.routing_table[3]["next_hop"] == 2
+
+    # A peer that stops advertising it, e.g. after a downgrade, is sent version 1 again
+    router2.handle_frame(baseline_encode(9001, [(1, 0), (2, 1)]))
+    assert neighbor1.wire_version == 1
+    # Packets without entries advertise nothing
+    router2.handle_frame(router1.encoder.encode_table(RoutingTable(), 0))
+    assert neighbor1.wire_version == 1
+
+
+def test_wire_version_1_never_sends_version_2():
+    router1, router2 = make_router(1), make_router(2, wire_version=1)
+    neighbor1 = router2.neighbors.get(1)
+    router2.handle_frame(router1.encode_full_table(router1.neighbors.get(2)))
+    assert neighbor1.wire_version == 1
+    assert NUM_UPDATE_FIELDS.unpack_from(router2.encode_full_table(neighbor1))[0] != COMPACT_MARKER
@@ -0,0 +1,100 @@
+import math
+import random
+
+from dvrp.timer_wheel import TimerWheel
+
+TICK = 0.5
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_wheel(slots=4, levels=3):
+    # Small wheels, so a few ticks already cascade through every level
+    clock = Clock()
+    return clock, TimerWheel(tick=TICK, slots=slots, levels=levels, clock=clock)
+
+
+def test_timers_cascade_down_and_fire_on_their_tick():
+    clock, wheel = make_wheel()
+    fired = []
+    # Level 0 covers 4 ticks, level 1 16, level 2 64, and the top level wraps beyond that
+    delays = [1, 3, 4, 5, 15, 16, 17, 40, 63, 64, 65, 200]
+    for ticks in delays:
+        wheel.schedule(ticks * TICK, lambda ticks=ticks: fired.append((ticks, round(clock.now / TICK))))
+    assert len(wheel) == len(delays)
+
+    for tick in range(1, 202):
+        clock.now = tick * TICK
+        wheel.advance()
+    assert fired == [(ticks, ticks) for ticks in delays]
+    assert len(wheel) == 0
+
+
+def test_cancelled_timers_do_not_fire():
+    clock, wheel = make_wheel()
+    fired = []
+    keep = wheel.schedule(20 * TICK, fired.append, "keep")
+    cancelled = wheel.schedule(20 * TICK, fired.append, "cancelled")
+    cancelled.cancel()
+    cancelled.cancel()
+    assert len(wheel) == 1
+
+    clock.now = 20 * TICK
+    assert wheel.advance() == 1
+    assert fired == ["keep"]
+    assert not keep.active and len(wheel) == 0
+
+
+def test_timers_scheduled_by_callbacks_never_run_on_the_current_tick():
+    clock, wheel = make_wheel()
+    fired = []
+
+    def periodic():
+        fired.append(wheel._next - 1)
+        wheel.schedule(0, periodic)
+
+    wheel.schedule(TICK, periodic)
+    clock.now = 10 * TICK
+    # Catching up from tick 1, the rescheduled timer is due at tick 10, and from there at 11
+    assert wheel.advance() == 2
+    assert fired == [1, 10]
+    clock.now = 11 * TICK
+    assert wheel.advance() == 1
+    assert fired == [1, 10, 11]
+
+
+def test_engine_loop_driven_by_timeout_is_never_early_or_late():
+    rng = random.Random(16)
+    clock, wheel = make_wheel(slots=8, levels=3)
+    deadlines = []
+
+    def fire(deadline):
+        assert deadline <= clock.now + 1e-9
+        assert clock.now - deadline < TICK + 1e-9
+        deadlines.remove(deadline)
+
+    timers = []
+    for _ in range(300):
+        delay = rng.uniform(0, 700 * TICK)
+        deadline = math.ceil(delay / TICK) * TICK
+        deadlines.append(deadline)
+        timers.append((wheel.schedule(delay, fire, deadline), deadline))
+    for timer, deadline in rng.sample(timers, 50):
+        timer.cancel()
+        deadlines.remove(deadline)
+
+    # As the engines do: sleep for timeout(), then advance
+    while True:
+        timeout = wheel.timeout()
+        if timeout is None:
+            break
+        clock.now += timeout
+        wheel.advance()
+    assert deadlines == []
+    assert len(wheel) == 0